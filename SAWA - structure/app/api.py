@@ -0,0 +1,19 @@
+"""
+SAWA - Scientific Argumentative Writing Assistant
+Database-backed API: accounts, dialogue turns and class management
+
+Unlike the in-memory demo in app/main.py, conversations live in the
+database, so any worker can serve any request and the production launcher
+may run several workers (run_server.py --production --api).
+"""
+
+from app.core.application import create_app
+from app.routers import admin, auth, sawa, teacher
+
+app = create_app(database=True)
+
+app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
+app.include_router(sawa.router, prefix="/api/sawa", tags=["sawa"])
+app.include_router(teacher.router, prefix="/api/teacher", tags=["teacher"])
+# Every endpoint requires an admin account (ADMIN_USERNAMES); profiling also needs PROFILING_ENABLED
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
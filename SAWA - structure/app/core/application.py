@@ -0,0 +1,114 @@
+"""
+Application factory for SAWA application
+
+Both entry points, the in-memory demo (app/main.py) and the database-backed
+API (app/api.py), are built here so they share one middleware stack and the
+same health, readiness and metrics endpoints.
+"""
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.profiling import ProfilerMiddleware
+from app.core.readiness import readiness
+from app.core.metrics import MetricsMiddleware, render_metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background; /health/ready answers 503 until it is done
+    readiness.start()
+    yield
+    readiness.stop()
+
+def create_app(database: bool) -> FastAPI:
+    """A SAWA app with the middleware stack and health endpoints, before its API routes
+
+    `database` says whether the app serves from the database; without it the
+    warm-up skips the database steps (pool, rubric, question banks) and
+    readiness never pings it.
+    """
+    readiness.check_database = database and settings.READINESS_CHECK_DATABASE
+    app = FastAPI(
+        title="SAWA - Scientific Argumentative Writing Assistant",
+        description="A pre-writing facilitator for scientific argumentative essays using CER + Toulmin framework",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
+
+    # Middleware added last runs first: CORS wraps everything so that even
+    # rejected (429) responses carry CORS headers
+    #
+    # Per-user and per-IP token buckets for login, dialogue turns and reads
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware)
+
+    # Compress large responses (history, prep sheets, reference data)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.GZIP_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
+    )
+
+    # Request latency per route (inside CORS, so it also times 429s and compression)
+    app.add_middleware(MetricsMiddleware)
+
+    # Per-request query counts and N+1 warnings (debug and test runs only)
+    if settings.QUERY_DEBUG:
+        app.add_middleware(QueryBudgetMiddleware)
+
+    # Counts finished requests for request-bounded profiling sessions
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilerMiddleware)
+
+    # Trace IDs on every response; sampled requests are written to TRACE_FILE
+    app.add_middleware(TracingMiddleware)
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["Retry-After", "X-Trace-Id", "traceparent", "X-Query-Count", "X-Query-Time-Ms"],
+    )
+
+    @app.get("/")
+    async def root():
+        """Root endpoint"""
+        return {
+            "message": "Welcome to SAWA - Scientific Argumentative Writing Assistant",
+            "description": "A pre-writing facilitator for scientific argumentative essays using CER + Toulmin framework",
+            "version": "1.0.0",
+            "docs": "/docs"
+        }
+
+    @app.get("/health")
+    @app.get("/health/live")
+    async def health_check():
+        """Liveness: the worker is up and serving requests"""
+        return {"status": "healthy", "service": "SAWA API"}
+
+    @app.get("/health/ready")
+    def readiness_check():
+        """Readiness: warm-up finished and dependencies usable (503 otherwise)"""
+        status_code, body = readiness.check()
+        return JSONResponse(content=body, status_code=status_code)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics"""
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
+    return app
@@ -11,6 +11,8 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.metrics import PhaseTimer, AUTH
+from app.core.tracing import start_span
 from app.database import get_db
 from app.models.user import User
 
@@ -51,21 +53,39 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     """Get the current authenticated user from JWT token"""
+    return get_user_from_token(token, db)
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Get the current user, requiring them to be listed in ADMIN_USERNAMES"""
+    admins = {name.strip() for name in settings.ADMIN_USERNAMES.split(",") if name.strip()}
+    if current_user.username not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+async def get_current_teacher(current_user: User = Depends(get_current_user)) -> User:
+    """Get the current user, requiring a teacher account"""
+    if not current_user.is_teacher:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Teacher access required")
+    return current_user
+
+def get_user_from_token(token: str, db: Session) -> User:
+    """Resolve a JWT token to its user (also used where headers are unavailable, e.g. WebSockets)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    with PhaseTimer(AUTH), start_span("auth.get_current_user"):
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
+        
+        user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
     
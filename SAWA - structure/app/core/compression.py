@@ -0,0 +1,146 @@
+"""
+Content-negotiated response compression for SAWA application
+"""
+
+import gzip
+from typing import Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.serialization import dumps
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Preferred first when the client weighs several encodings equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+# Streams must reach the client as they are produced, never buffered
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+def negotiate_encoding(accept_encoding: str, available: Sequence[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """Pick the best encoding from an Accept-Encoding header, or None"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.partition(";")
+        token = token.strip()
+        if not token:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    """Compress `body`; `level` is the gzip level or the brotli quality"""
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+def is_compressible(content_type: str) -> bool:
+    """Whether a response of this type is worth compressing"""
+    if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+class CompressionMiddleware:
+    """Compress complete responses above `minimum_size` bytes
+
+    Small bodies (a typical dialogue turn) are sent as-is so they do not pay
+    the compression CPU cost. Streaming responses and responses that already
+    carry a Content-Encoding (e.g. precompressed payloads) pass through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not is_compressible(headers.get("content-type", ""))
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding, self.levels[encoding])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+class PrecompressedPayload:
+    """A pre-serialized response body stored with its compressed variants
+
+    Compression happens once, at the highest level, when the payload is
+    built; each request only picks the variant the client accepts.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json", minimum_size: int = 1024):
+        self.media_type = media_type
+        self.variants = {None: body}
+        if len(body) >= minimum_size:
+            for encoding in SUPPORTED_ENCODINGS:
+                self.variants[encoding] = compress(body, encoding, 11 if encoding == "br" else 9)
+
+    @classmethod
+    def from_obj(cls, obj, minimum_size: int = 1024) -> "PrecompressedPayload":
+        """Serialize `obj` to JSON and precompress it"""
+        return cls(dumps(obj), minimum_size=minimum_size)
+
+    def response(self, request: Request) -> Response:
+        """Build a response using the best variant for this request"""
+        available = [encoding for encoding in self.variants if encoding is not None]
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), available)
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.variants[encoding], media_type=self.media_type, headers=headers)
@@ -23,6 +23,85 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
+    # Production server (see run_server.py --production)
+    WORKERS: Optional[int] = None  # Defaults to the number of usable CPUs
+    KEEP_ALIVE_TIMEOUT: int = 5  # Seconds an idle keep-alive connection is held open
+    BACKLOG: int = 2048  # Pending connections queued by the listening socket
+    LIMIT_CONCURRENCY: Optional[int] = None  # Per-worker cap before answering 503
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30  # Seconds in-flight requests get to finish on SIGTERM
+    
+    # Response compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes; smaller responses are sent uncompressed
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    
+    # Rate limiting (token buckets, requests per minute per user)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND_URL: Optional[str] = None  # e.g. redis://localhost:6379/0 to share buckets across workers
+    RATE_LIMIT_LOGIN_PER_MINUTE: int = 10
+    RATE_LIMIT_TURNS_PER_MINUTE: int = 30
+    RATE_LIMIT_READS_PER_MINUTE: int = 120
+    RATE_LIMIT_IP_MULTIPLIER: int = 40  # Per-IP budget multiplier; classrooms often share one NAT address
+    
+    # Evaluation scheduler (per worker process)
+    EVALUATION_WORKERS: int = 4
+    EVALUATION_QUEUE_DEPTH_INTERACTIVE: int = 200  # Queued turns before answering 503
+    EVALUATION_QUEUE_DEPTH_BATCH: int = 1000
+    EVALUATION_BATCH_WORKERS: Optional[int] = None  # Batch jobs running at once; default keeps one worker free for turns
+    
+    # Idempotency-Key support on /start and /respond
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000  # Per worker, in memory
+    IDEMPOTENCY_BACKEND_URL: Optional[str] = None  # e.g. redis://localhost:6379/1; needed for keys to hold across workers
+    
+    # Conversation event streams (SSE / WebSocket)
+    EVENTS_BACKEND_URL: Optional[str] = None  # e.g. redis://localhost:6379/2; needed for streams to see other workers' turns
+    
+    # Background task runner for off-path writes (SQLite queue file, per host)
+    BACKGROUND_TASKS_PATH: str = "sawa_tasks.db"
+    BACKGROUND_TASK_WORKERS: int = 2  # Threads per worker process
+    BACKGROUND_TASK_MAX_ATTEMPTS: int = 5  # Failures before a task is parked as dead
+    
+    # Request tracing (OTLP JSON lines, size-rotated)
+    TRACE_SAMPLE_RATE: float = 0.0  # Fraction of requests traced; 0 disables
+    TRACE_TRUST_INCOMING: bool = False  # Honour an incoming traceparent's sampled flag; only behind a proxy that sets it
+    TRACE_FILE: str = "traces.jsonl"  # Each worker process writes its own, PID-suffixed: traces.<pid>.jsonl
+    TRACE_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    TRACE_FILE_BACKUPS: int = 5
+    
+    # SQL query accounting for debug and test runs (see app/core/query_budget.py)
+    QUERY_DEBUG: bool = False
+    QUERY_BUDGET_PER_REQUEST: int = 20  # Log requests that run more statements than this
+    QUERY_REPEAT_THRESHOLD: int = 5  # Log a statement shape repeated this often in one request (N+1)
+    
+    # Administration
+    ADMIN_USERNAMES: str = ""  # Comma-separated usernames allowed to use /api/admin endpoints
+    
+    # On-demand profiling (POST /api/admin/profile); off unless enabled
+    PROFILING_ENABLED: bool = False
+    PROFILING_MAX_SECONDS: int = 60
+    
+    # Readiness probe and start-up warm-up (GET /health/ready)
+    READINESS_CHECK_DATABASE: bool = True  # Database warm-up and checks for app/api.py; the demo never has them
+    READINESS_FAIL_WHEN_DEGRADED: bool = False  # Answer 503 rather than 200 on a saturated pool or full queue
+    WARMUP_RETRY_SECONDS: float = 2.0  # Wait between attempts at failed warm-up steps
+    
+    # Research export (scripts/export_research_data.py)
+    RESEARCH_EXPORT_SALT: Optional[str] = None  # Secret key for anonymized user ids; keep it stable across runs
+    
+    # Near-duplicate detection across a class (MinHash LSH)
+    SIMILARITY_THRESHOLD: float = 0.8  # Estimated Jaccard similarity of word 3-grams that counts as a match
+    SIMILARITY_MIN_WORDS: int = 8  # Shorter responses are not checked
+    
+    # Rubric and prompt catalog (served from memory; workers poll for published versions)
+    CATALOG_REFRESH_SECONDS: float = 30.0  # 0 disables polling
+    CONTENT_PACK: str = "default"  # Pack this deployment serves (scripts/load_content_pack.py)
+    
+    # Topic question banks, generated off the request path (OpenAI when OPENAI_API_KEY is set, templates otherwise)
+    QUESTION_BANK_MODEL: str = "gpt-4o-mini"
+    QUESTION_BANK_TIMEOUT_SECONDS: float = 30.0
+    QUESTION_BANK_RETRY_SECONDS: float = 60.0  # Wait before re-requesting a topic whose bank has not arrived
+    
     # Email
     SMTP_SERVER: Optional[str] = None
     SMTP_PORT: int = 587
@@ -0,0 +1,183 @@
+"""
+Conversation event hub for SAWA streaming (SSE / WebSocket)
+
+Events are delivered to the streams subscribed in this process by default,
+which only covers a single worker. With EVENTS_BACKEND_URL set to Redis they
+are published on a pub/sub channel and every worker delivers them to its own
+subscribers, so a stream sees turns served by any worker or pod.
+
+Events describing a turn are published after it commits. The exception is
+`token`: model text streams while the turn is still being evaluated, and
+becomes final only with the `message` and `state` events that follow it.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_SECONDS = 1.0
+
+# Event types sent to streaming clients
+FEEDBACK = "feedback"    # Feedback nudge, sent as soon as it is chosen
+TOKEN = "token"          # One chunk of LLM-generated text
+MESSAGE = "message"      # A committed message row (same shape as /history)
+STATE = "state"          # Changed conversation fields only
+RESPONSE = "response"    # The full SAWAResponse for a turn
+DONE = "done"            # Conversation completed; the stream will close
+
+Deliver = Callable[[int, Dict[str, Any]], None]
+
+class InMemoryBackend:
+    """Events reach only the streams subscribed in this process"""
+
+    shared = False
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def listen(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def publish(self, conversation_id: int, payload: Dict[str, Any]):
+        if self._deliver is not None:
+            self._deliver(conversation_id, payload)
+
+class RedisBackend:
+    """Events fanned out to every worker and pod through Redis pub/sub
+
+    Each process publishes on the conversation's channel and runs one
+    listener thread that hands everything it receives to its own streams.
+    """
+
+    shared = True
+    PREFIX = "sawa:events:"
+
+    def __init__(self, url: str):
+        import redis  # Optional dependency, only needed for a shared backend
+        self._client = redis.Redis.from_url(url)
+        self._deliver: Optional[Deliver] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def listen(self, deliver: Deliver):
+        # Started on the first subscription, so workers without streams never connect
+        with self._lock:
+            self._deliver = deliver
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="sawa-events", daemon=True)
+                self._thread.start()
+
+    def publish(self, conversation_id: int, payload: Dict[str, Any]):
+        try:
+            self._client.publish(f"{self.PREFIX}{conversation_id}", dumps(payload))
+        except Exception as e:  # Streams are best effort; clients resync from /history
+            logger.warning("Could not publish %s event for conversation %s: %s",
+                           payload["event"], conversation_id, e)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{self.PREFIX}*")
+                for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    conversation_id = int(message["channel"][len(self.PREFIX):])
+                    self._deliver(conversation_id, json.loads(message["data"]))
+            except Exception as e:
+                logger.warning("Conversation event listener lost Redis, reconnecting: %s", e)
+                time.sleep(RECONNECT_SECONDS)
+
+class ConversationEventHub:
+    """Fan out conversation events to the streams subscribed to them
+
+    Publishing is thread-safe. Without a shared backend it costs a single
+    dict lookup when nobody in this process is listening. Each subscriber
+    has a bounded queue; a client too slow to drain it misses events and
+    should resync from /history.
+    """
+
+    def __init__(self, max_queue_size: int = 256, backend=None):
+        self.max_queue_size = max_queue_size
+        self.backend = backend or self._default_backend()
+        self._subscribers: Dict[int, Set[Tuple[asyncio.Queue, asyncio.AbstractEventLoop]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_backend():
+        if settings.EVENTS_BACKEND_URL:
+            return RedisBackend(settings.EVENTS_BACKEND_URL)
+        return InMemoryBackend()
+
+    def has_subscribers(self, conversation_id: int) -> bool:
+        """Whether any stream may be listening to this conversation"""
+        # Another worker's streams are invisible from here
+        return self.backend.shared or bool(self._subscribers.get(conversation_id))
+
+    def publish(self, conversation_id: int, event: str, data: Any):
+        """Send an event to every subscriber of a conversation"""
+        if not self.has_subscribers(conversation_id):
+            return
+        self.backend.publish(conversation_id, {"event": event, "data": data})
+
+    def _deliver(self, conversation_id: int, payload: Dict[str, Any]):
+        """Hand an event to this process's subscribers"""
+        subscribers = self._subscribers.get(conversation_id)
+        if not subscribers:
+            return
+        with self._lock:
+            targets = list(subscribers)
+        for queue, loop in targets:
+            loop.call_soon_threadsafe(self._offer, queue, payload)
+
+    def publish_text(self, conversation_id: int, chunks: Iterable[str]) -> str:
+        """Stream generated text chunk by chunk and return the full text
+
+        Intended for model-backed evaluators: pass the token iterator from
+        the model client and the text reaches clients as it is produced. The
+        turn is not committed yet, so clients show the text as provisional
+        until its `message` event arrives; a turn that fails sends none.
+        """
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            self.publish(conversation_id, TOKEN, {"text": chunk})
+        return "".join(parts)
+
+    @asynccontextmanager
+    async def subscribe(self, conversation_id: int):
+        """Yield a queue receiving this conversation's events"""
+        entry = (asyncio.Queue(maxsize=self.max_queue_size), asyncio.get_running_loop())
+        self.backend.listen(self._deliver)
+        with self._lock:
+            self._subscribers[conversation_id].add(entry)
+        try:
+            yield entry[0]
+        finally:
+            with self._lock:
+                self._subscribers[conversation_id].discard(entry)
+                if not self._subscribers[conversation_id]:
+                    del self._subscribers[conversation_id]
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, payload: Dict[str, Any]):
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            pass
+
+def format_sse(payload: Dict[str, Any]) -> bytes:
+    """Encode an event as a Server-Sent Events frame"""
+    return b"event: " + payload["event"].encode() + b"\ndata: " + dumps(payload["data"]) + b"\n\n"
+
+conversation_events = ConversationEventHub()
@@ -0,0 +1,173 @@
+"""
+Idempotency-Key support for SAWA application
+
+A retried request with the same key gets the stored response back without
+re-running evaluation or writing to the database. Keys are scoped per user
+and endpoint and live for IDEMPOTENCY_TTL_SECONDS.
+
+Entries are held in memory per worker process by default, which only
+covers retries that reach the same worker. With IDEMPOTENCY_BACKEND_URL set
+to Redis they are shared by every worker and pod: the first request claims
+the key, and a duplicate arriving on another worker while it runs waits for
+its response instead of running again.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+PENDING_TTL_SECONDS = 120  # A claim outlives any turn; a crashed worker's claim expires
+WAIT_POLL_SECONDS = 0.05
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used for a request with a different body"""
+
+class IdempotencyKeyInProgress(Exception):
+    """Another worker is still running the request for this key"""
+
+def _encode(value: Hashable) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+class InMemoryBackend:
+    """Completed responses held in this process (one set per worker)
+
+    The oldest entries are evicted once `max_entries` is reached, so memory
+    stays bounded however many keys are used.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # key -> (expires_at, fingerprint, response); insertion order == expiry order
+        self._entries: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+
+    async def claim(self, key: str, fingerprint: str, ttl: float) -> Optional[Tuple[str, bool, Any]]:
+        """None if the caller should run the request, else (fingerprint, done, response)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, stored_fingerprint, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return stored_fingerprint, True, response
+
+    async def complete(self, key: str, fingerprint: str, response: Any, ttl: float):
+        now = time.monotonic()
+        # Drop expired entries from the front, then enforce the size bound
+        while self._entries:
+            oldest_key, (expires_at, _, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) < self.max_entries:
+                break
+            del self._entries[oldest_key]
+        self._entries[key] = (now + ttl, fingerprint, response)
+
+    async def release(self, key: str):
+        pass  # Nothing is claimed in memory; the in-flight map covers this worker
+
+class RedisBackend:
+    """Responses shared by every worker and pod through Redis
+
+    Responses must be pydantic models; they come back as plain dicts.
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # Optional dependency, only needed for a shared backend
+        self._client = redis.from_url(url)
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"sawa:idempotency:{key}"
+
+    async def claim(self, key: str, fingerprint: str, ttl: float) -> Optional[Tuple[str, bool, Any]]:
+        pending = json.dumps({"fingerprint": fingerprint, "done": False})
+        if await self._client.set(self._key(key), pending, nx=True, ex=PENDING_TTL_SECONDS):
+            return None
+        stored = await self._client.get(self._key(key))
+        if stored is None:  # Expired or released between the two calls
+            return await self.claim(key, fingerprint, ttl)
+        entry = json.loads(stored)
+        return entry["fingerprint"], entry["done"], entry.get("response")
+
+    async def complete(self, key: str, fingerprint: str, response: Any, ttl: float):
+        entry = {"fingerprint": fingerprint, "done": True, "response": response.model_dump(mode="json")}
+        await self._client.set(self._key(key), json.dumps(entry), ex=int(ttl))
+
+    async def release(self, key: str):
+        await self._client.delete(self._key(key))
+
+class IdempotencyStore:
+    """TTL store of completed responses plus the requests still in flight"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, backend=None):
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend or self._default_backend(max_entries)
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.replays = 0
+
+    @staticmethod
+    def _default_backend(max_entries: int):
+        if settings.IDEMPOTENCY_BACKEND_URL:
+            return RedisBackend(settings.IDEMPOTENCY_BACKEND_URL)
+        return InMemoryBackend(max_entries)
+
+    async def run(self, key: Hashable, fingerprint: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the stored response for `key`, or compute and store it
+
+        A duplicate that arrives while the first request is still running
+        waits for that result instead of running again. Failures are not
+        stored, so the client may retry them.
+        """
+        key, fingerprint = _encode(key), _encode(fingerprint)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            if pending[0] != fingerprint:
+                raise IdempotencyKeyMismatch("Idempotency-Key was already used with a different request")
+            self.replays += 1
+            return await asyncio.shield(pending[1])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            response = await self._run_once(key, fingerprint, compute)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited future does not warn
+            raise
+        finally:
+            del self._in_flight[key]
+        future.set_result(response)
+        return response
+
+    async def _run_once(self, key: str, fingerprint: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        deadline = time.monotonic() + PENDING_TTL_SECONDS
+        while True:
+            stored = await self.backend.claim(key, fingerprint, self.ttl_seconds)
+            if stored is None:
+                break
+            stored_fingerprint, done, response = stored
+            if stored_fingerprint != fingerprint:
+                raise IdempotencyKeyMismatch("Idempotency-Key was already used with a different request")
+            if done:
+                self.replays += 1
+                return response
+            # Another worker is running it; its response will be stored under the key
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still running")
+            await asyncio.sleep(WAIT_POLL_SECONDS)
+
+        try:
+            response = await compute()
+        except BaseException:
+            await self.backend.release(key)
+            raise
+        await self.backend.complete(key, fingerprint, response, self.ttl_seconds)
+        return response
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES
+)
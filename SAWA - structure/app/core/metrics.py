@@ -0,0 +1,146 @@
+"""
+Prometheus metrics for SAWA application
+
+Request latency per route, a breakdown of each dialogue turn into phases and
+counters for how students move through the stages. State that is already
+kept in memory (evaluation queue, background tasks, rate limiter,
+idempotency store) is read at scrape time, so it adds nothing per request.
+"""
+
+import os
+from time import perf_counter
+from typing import Dict, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Phases of a dialogue turn
+AUTH = "auth"            # Token decode and user lookup
+LOAD = "load"            # Conversation load
+EVALUATE = "evaluate"    # Rubric evaluation (labelled by stage)
+COMMIT = "commit"        # Database commit
+SERIALIZE = "serialize"  # Response encoding
+
+# Seconds; dense at the low end where a rule-based turn sits
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "sawa_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+PHASE_LATENCY = Histogram(
+    "sawa_turn_phase_duration_seconds", "Time spent in each phase of a dialogue turn",
+    ["phase", "stage"], buckets=LATENCY_BUCKETS
+)
+STAGE_SCORES = Counter("sawa_stage_scores_total", "Rubric levels awarded, by stage", ["stage", "score"])
+FEEDBACK_LOOPS = Counter("sawa_feedback_loops_total", "Below-threshold answers that were sent a feedback nudge", ["stage"])
+COMPLETIONS = Counter("sawa_conversations_completed_total", "Conversations that reached the prep sheet")
+
+# Labelled children are cached: .labels() takes a lock on every call
+_phase_children: Dict[Tuple[str, str], object] = {}
+
+class PhaseTimer:
+    """Time one phase of a turn: `with PhaseTimer(EVALUATE, stage): ...`"""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, phase: str, stage: str = ""):
+        key = (phase, stage)
+        histogram = _phase_children.get(key)
+        if histogram is None:
+            histogram = _phase_children[key] = PHASE_LATENCY.labels(phase, stage)
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(perf_counter() - self._start)
+
+def record_score(stage: str, score: int):
+    """Count an evaluated answer"""
+    STAGE_SCORES.labels(stage, str(score)).inc()
+
+class RuntimeStatsCollector:
+    """Expose the in-memory queue and limiter counters at scrape time"""
+
+    def collect(self):
+        # Imported here so /metrics does not pull these in at startup
+        from app.core.idempotency import idempotency_store
+        from app.core.rate_limit import rate_limiter
+        from app.services.background_tasks import background_tasks
+        from app.services.evaluation_scheduler import evaluation_scheduler
+
+        depth = GaugeMetricFamily("sawa_evaluation_queue_depth", "Queued evaluation jobs", labels=["lane"])
+        rejected = CounterMetricFamily("sawa_evaluation_queue_rejected", "Jobs refused because the lane was full", labels=["lane"])
+        wait_max = GaugeMetricFamily("sawa_evaluation_queue_wait_seconds_max", "Longest queue wait seen", labels=["lane"])
+        running = GaugeMetricFamily("sawa_evaluation_jobs_running", "Evaluation jobs running now", labels=["lane"])
+        for lane, stats in evaluation_scheduler.stats().items():
+            depth.add_metric([lane], stats["depth"])
+            running.add_metric([lane], stats["running"])
+            rejected.add_metric([lane], stats["rejected"])
+            wait_max.add_metric([lane], stats["wait_seconds_max"])
+        yield from (depth, rejected, wait_max, running)
+
+        # The queue file is shared by every worker on the host; skip it until something creates it
+        if os.path.exists(background_tasks.path):
+            stats = background_tasks.stats()
+            yield GaugeMetricFamily("sawa_background_tasks_pending", "Background tasks waiting to run", value=stats["pending"])
+            yield GaugeMetricFamily("sawa_background_tasks_dead", "Background tasks that exhausted their retries", value=stats["dead"])
+            yield GaugeMetricFamily("sawa_background_task_lag_seconds", "How long the oldest due task has waited", value=stats["lag_seconds"])
+
+        rejections = CounterMetricFamily("sawa_rate_limit_rejections", "Requests answered 429", labels=["budget", "scope"])
+        for (budget, scope), count in rate_limiter.rejections.items():
+            rejections.add_metric([budget, scope], count)
+        yield rejections
+        yield CounterMetricFamily(
+            "sawa_rate_limit_backend_errors", "Requests let through because the rate limit backend failed",
+            value=rate_limiter.backend_errors
+        )
+
+        yield CounterMetricFamily(
+            "sawa_idempotent_replays", "Turns answered from the idempotency store without re-evaluating",
+            value=idempotency_store.replays
+        )
+
+REGISTRY.register(RuntimeStatsCollector())
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Body and content type for the /metrics endpoint"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Several workers: aggregate the per-process files; runtime stats are this worker's only
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(RuntimeStatsCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+class MetricsMiddleware:
+    """Record request latency labelled by route template, not raw path"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(perf_counter() - start)
@@ -0,0 +1,145 @@
+"""
+On-demand sampling profiler for live SAWA workers
+
+A profiling session samples the stacks of every thread in this worker
+(event loop, request threadpool, evaluation scheduler, background tasks)
+until a time limit or a number of completed requests is reached. Results
+come back as collapsed stacks (flamegraph.pl, speedscope, inferno) or as a
+pstats file (snakeviz, `python -m pstats`).
+
+Nothing runs unless PROFILING_ENABLED is set and an admin starts a session;
+the sampler thread exists only for the length of that session.
+"""
+
+import asyncio
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+COLLAPSED = "collapsed"
+PSTATS = "pstats"
+FORMATS = (COLLAPSED, PSTATS)
+
+# (filename, first line, function name), the key pstats uses for a function
+Frame = Tuple[str, int, str]
+
+class ProfilerBusy(Exception):
+    """A profiling session is already running in this worker"""
+
+class ProfileSession:
+    """Stack samples collected by one profiling run"""
+
+    def __init__(self, interval: float, max_requests: Optional[int]):
+        self.interval = interval
+        self.max_requests = max_requests
+        self.requests = 0
+        self.samples: Counter = Counter()  # (thread name, stack root-first) -> count
+        self.sample_count = 0
+        self.started = time.monotonic()
+        self.duration = 0.0
+        self.stop = threading.Event()
+
+    def request_finished(self):
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.stop.set()
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self.stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+            self.sample_count += 1
+        self.duration = time.monotonic() - self.started
+
+    def collapsed(self) -> str:
+        """One line per distinct stack: `thread;outer;...;inner count`"""
+        lines = []
+        for (thread_name, stack), count in self.samples.most_common():
+            frames = ";".join(f"{name} ({os.path.basename(filename)}:{line})" for filename, line, name in stack)
+            lines.append(f"{thread_name};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def pstats(self) -> bytes:
+        """The samples as a marshalled pstats table (times are sample estimates)"""
+        # func -> [primitive calls, calls, own time, cumulative time, {caller: (nc, cc, tt, ct)}]
+        table: Dict[Frame, list] = {}
+        for (_, stack), count in self.samples.items():
+            seconds = count * self.interval
+            seen = set()
+            for depth, frame in enumerate(stack):
+                entry = table.setdefault(frame, [0, 0, 0.0, 0.0, {}])
+                if frame not in seen:  # Recursion counts once towards cumulative time
+                    seen.add(frame)
+                    entry[0] += count
+                    entry[1] += count
+                    entry[3] += seconds
+                if depth:
+                    caller = stack[depth - 1]
+                    nc, cc, tt, ct = entry[4].get(caller, (0, 0, 0.0, 0.0))
+                    entry[4][caller] = (nc + count, cc + count, tt, ct + seconds)
+            if stack:
+                table[stack[-1]][2] += seconds
+        return marshal.dumps({frame: tuple(entry) for frame, entry in table.items()})
+
+class Profiler:
+    """Runs at most one sampling session at a time in this worker"""
+
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+        self._lock = threading.Lock()
+
+    async def profile(self, seconds: float, max_requests: Optional[int] = None,
+                      interval: float = 0.005) -> ProfileSession:
+        """Sample for `seconds`, or until `max_requests` requests have finished"""
+        with self._lock:
+            if self.session is not None:
+                raise ProfilerBusy("A profiling session is already running on this worker")
+            session = self.session = ProfileSession(interval, max_requests)
+        sampler = threading.Thread(target=session._sample_loop, name="sawa-profiler", daemon=True)
+        sampler.start()
+        try:
+            deadline = time.monotonic() + seconds
+            while not session.stop.is_set() and time.monotonic() < deadline:
+                await asyncio.sleep(min(0.05, max(0.0, deadline - time.monotonic())))
+        finally:
+            session.stop.set()
+            await asyncio.get_running_loop().run_in_executor(None, sampler.join)
+            self.session = None
+        return session
+
+profiler = Profiler()
+
+class ProfilerMiddleware:
+    """Count finished requests for a session bounded by request count
+
+    Only installed when PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = profiler.session
+            if session is not None and scope["type"] == "http" and not scope["path"].startswith("/api/admin/profile"):
+                session.request_finished()
@@ -0,0 +1,151 @@
+"""
+Per-request SQL query accounting and N+1 detection for SAWA application
+
+Enabled with QUERY_DEBUG (debug and test runs only). Each request counts its
+statements and total database time, reports them in `X-Query-Count` and
+`X-Query-Time-Ms` response headers, and logs any statement shape that runs
+QUERY_REPEAT_THRESHOLD or more times, which is the signature of an N+1 lazy
+load. Scripts and tests wrap calls in `count_queries()` or `query_budget(n)`
+to measure or cap the statements an operation issues.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class QueryBudgetExceeded(AssertionError):
+    """An operation issued more SQL statements than its budget allows"""
+
+class QueryStats:
+    """Statements, database time and statement shapes seen by one request or block"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[normalize(statement)] += 1
+
+    def repeated(self, threshold: int):
+        """Shapes run at least `threshold` times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+# Literals and IN-lists vary between otherwise identical statements
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)")
+
+def normalize(statement: str) -> str:
+    """Reduce a statement to its shape so repeats with different values match"""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("sawa_query_stats", default=None)
+
+# Blocks opened with count_queries(); process-wide so they also see statements
+# from worker threads (TestClient, the evaluation scheduler)
+_active_blocks: List[QueryStats] = []
+_blocks_lock = threading.Lock()
+_instrumented = set()
+
+def instrument(engine):
+    """Attach the statement counters to `engine` (idempotent)"""
+    if id(engine) in _instrumented:
+        return
+    _instrumented.add(id(engine))
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._sawa_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._sawa_query_start
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if _active_blocks:
+            with _blocks_lock:
+                for block in _active_blocks:
+                    block.record(statement, elapsed)
+
+@contextmanager
+def count_queries():
+    """Count every statement run while the block is open: `with count_queries() as stats:`"""
+    from app.database import engine
+    instrument(engine)
+    stats = QueryStats()
+    with _blocks_lock:
+        _active_blocks.append(stats)
+    try:
+        yield stats
+    finally:
+        with _blocks_lock:
+            _active_blocks.remove(stats)
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "block"):
+    """Raise QueryBudgetExceeded if the block runs more than `max_queries` statements"""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        shapes = "\n".join(f"  {count}x {shape}" for shape, count in stats.shapes.most_common(5))
+        raise QueryBudgetExceeded(f"{label} ran {stats.count} queries (budget {max_queries}):\n{shapes}")
+
+class QueryBudgetMiddleware:
+    """Count each request's statements, add them as headers and log N+1 patterns"""
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int = None, max_queries: int = None):
+        self.app = app
+        self.repeat_threshold = repeat_threshold or settings.QUERY_REPEAT_THRESHOLD
+        self.max_queries = max_queries or settings.QUERY_BUDGET_PER_REQUEST
+        from app.database import engine
+        instrument(engine)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+
+        async def send_with_counts(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-query-count", str(stats.count).encode()),
+                    (b"x-query-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_counts)
+        finally:
+            _request_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats):
+        request = f"{scope['method']} {scope['path']}"
+        for shape, count in stats.repeated(self.repeat_threshold):
+            logger.warning("Possible N+1 in %s: %d x %s", request, count, shape)
+        if stats.count > self.max_queries:
+            logger.warning("%s ran %d queries (budget %d) in %.1f ms",
+                           request, stats.count, self.max_queries, stats.seconds * 1000)
@@ -0,0 +1,254 @@
+"""
+Per-user and per-IP token-bucket rate limiting for SAWA application
+
+Login and registration carry no token, so their user bucket is keyed on the
+username in the submitted body: guessing one account's password from many
+addresses still runs out. The limiter fails open: if the shared backend is
+unreachable, requests are let through (and counted) rather than answered 500.
+"""
+
+import json
+import logging
+import math
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Budget names
+LOGIN = "login"
+TURN = "turn"
+READ = "read"
+
+# (bucket key, tokens per second, capacity)
+Bucket = Tuple[str, float, float]
+
+# Paths that start or advance a dialogue turn
+TURN_PATHS = ("/api/sawa/start", "/api/sawa/respond")
+LOGIN_PATHS = ("/api/auth/login", "/api/auth/register")
+MAX_LOGIN_BODY = 16 * 1024  # Larger bodies are not parsed for a username (the IP budget still applies)
+
+class InMemoryBackend:
+    """Token buckets held in this process (one set per worker)
+
+    The oldest idle buckets are evicted once `max_keys` is reached, so memory
+    stays bounded however many clients connect.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def hit(self, buckets: List[Bucket]) -> Tuple[int, float]:
+        """Take one token from every bucket, or from none
+
+        Returns (-1, 0) if allowed, else the index of the first empty bucket
+        and the seconds until it has a token.
+        """
+        now = time.monotonic()
+        refilled = []
+        for key, rate, capacity in buckets:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            refilled.append(min(capacity, tokens + (now - updated) * rate))
+        rejected, retry_after = -1, 0.0
+        for index, ((_, rate, _), tokens) in enumerate(zip(buckets, refilled)):
+            if tokens < 1:
+                rejected, retry_after = index, (1 - tokens) / rate
+                break
+        for (key, _, _), tokens in zip(buckets, refilled):
+            self._buckets[key] = (tokens - 1 if rejected < 0 else tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return rejected, retry_after
+
+class RedisBackend:
+    """Token buckets shared by every worker and pod through Redis"""
+
+    # Refill every bucket, then take from all of them only if none is empty,
+    # atomically; ARGV is now followed by rate, capacity per key. Returns
+    # {0-based index of the empty bucket or -1, retry delay in seconds}
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local refilled = {}
+    local rejected, retry = -1, 0
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[2 * i])
+        local capacity = tonumber(ARGV[2 * i + 1])
+        local state = redis.call('HMGET', key, 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or capacity
+        local ts = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+        refilled[i] = tokens
+        if rejected < 0 and tokens < 1 then rejected, retry = i - 1, (1 - tokens) / rate end
+    end
+    for i, key in ipairs(KEYS) do
+        local rate = tonumber(ARGV[2 * i])
+        local capacity = tonumber(ARGV[2 * i + 1])
+        local tokens = refilled[i]
+        if rejected < 0 then tokens = tokens - 1 end
+        redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+        redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    end
+    return {rejected, tostring(retry)}
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # Optional dependency, only needed for a shared backend
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def hit(self, buckets: List[Bucket]) -> Tuple[int, float]:
+        args: List[float] = [time.time()]
+        for _, rate, capacity in buckets:
+            args += [rate, capacity]
+        rejected, retry_after = await self._script(keys=[f"sawa:ratelimit:{key}" for key, _, _ in buckets], args=args)
+        return int(rejected), float(retry_after)
+
+class RateLimiter:
+    """Applies the login, turn and read budgets per user and per IP"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or self._default_backend()
+        # Requests per minute for one user; one IP gets RATE_LIMIT_IP_MULTIPLIER
+        # times as much because a classroom often shares a NAT address
+        self.budgets: Dict[str, int] = {
+            LOGIN: settings.RATE_LIMIT_LOGIN_PER_MINUTE,
+            TURN: settings.RATE_LIMIT_TURNS_PER_MINUTE,
+            READ: settings.RATE_LIMIT_READS_PER_MINUTE,
+        }
+        self.rejections: Counter = Counter()
+        self.backend_errors = 0
+
+    @staticmethod
+    def _default_backend():
+        if settings.RATE_LIMIT_BACKEND_URL:
+            return RedisBackend(settings.RATE_LIMIT_BACKEND_URL)
+        return InMemoryBackend()
+
+    async def check(self, budget: str, user: Optional[str], ip: Optional[str]) -> float:
+        """Return 0 if the request may proceed, else the Retry-After delay in seconds"""
+        per_minute = self.budgets[budget]
+        scopes: List[str] = []
+        buckets: List[Bucket] = []
+        if user is not None:
+            scopes.append("user")
+            buckets.append((f"{budget}:user:{user}", per_minute / 60.0, per_minute))
+        if ip is not None:
+            capacity = per_minute * settings.RATE_LIMIT_IP_MULTIPLIER
+            scopes.append("ip")
+            buckets.append((f"{budget}:ip:{ip}", capacity / 60.0, capacity))
+        if not buckets:
+            return 0.0
+
+        # All or nothing: a request refused by one bucket must not drain the others
+        try:
+            rejected, retry_after = await self.backend.hit(buckets)
+        except Exception as e:
+            # Fail open: an unreachable limiter must not take the API down with it
+            self.backend_errors += 1
+            logger.warning("Rate limit backend failed, allowing the request: %s", e)
+            return 0.0
+        if rejected >= 0:
+            self.rejections[(budget, scopes[rejected])] += 1
+            return retry_after
+        return 0.0
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Which budget a request draws from (None means unlimited)"""
+    if path.startswith(LOGIN_PATHS):
+        return LOGIN
+    if path.startswith(TURN_PATHS):
+        return TURN
+    if method in ("GET", "HEAD") and path.startswith("/api/"):
+        return READ
+    return None
+
+def user_from_authorization(authorization: Optional[str]) -> Optional[str]:
+    """Username from a valid bearer token, or None (the IP budget still applies)"""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+def username_from_body(headers: Headers, body: bytes) -> Optional[str]:
+    """The username in a login form or registration JSON body, normalized"""
+    content_type = headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            username = parse_qs(body.decode()).get("username", [None])[0]
+        elif content_type.startswith("application/json"):
+            data = json.loads(body)
+            username = data.get("username") if isinstance(data, dict) else None
+        else:
+            return None
+    except ValueError:  # Undecodable body; the endpoint rejects it anyway
+        return None
+    if not isinstance(username, str) or not username.strip():
+        return None
+    return username.strip().lower()
+
+async def read_body(receive: Receive, limit: int) -> Tuple[bytes, Receive]:
+    """Read up to `limit` bytes of the request body, and a receive that replays it"""
+    messages: List[Message] = []
+    body = b""
+    while len(body) <= limit:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    async def replay() -> Message:
+        return messages.pop(0) if messages else await receive()
+    return body, replay
+
+class RateLimitMiddleware:
+    """Reject over-budget requests with 429 and a Retry-After header"""
+
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = classify(scope["method"], scope["path"])
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        headers = Headers(scope=scope)
+        user = user_from_authorization(headers.get("authorization"))
+        if user is None and budget == LOGIN:
+            body, receive = await read_body(receive, MAX_LOGIN_BODY)
+            if len(body) <= MAX_LOGIN_BODY:
+                user = username_from_body(headers, body)
+        retry_after = await self.limiter.check(budget, user, client[0] if client else None)
+        if retry_after > 0:
+            response = JSONResponse(
+                {"detail": "Too many requests, please slow down"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,220 @@
+"""
+Liveness, readiness and start-up warm-up for SAWA application
+
+A fresh worker answers liveness (`/health/live`) as soon as it accepts
+connections, but reports ready (`/health/ready`) only after the warm-up has
+opened the database pool, loaded the rubric, run the evaluators once and
+built the precompressed reference data, so the first students routed to it
+do not pay those cold-path costs. Once warm, readiness also reports degraded
+states: a saturated connection pool or an evaluation scheduler that cannot
+take interactive turns.
+
+Each worker process warms up on its own; a probe reaches whichever worker
+accepts it.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _describe(error: Exception) -> str:
+    """First line of an error (SQLAlchemy appends the statement and a link)"""
+    lines = str(error).splitlines()
+    return f"{type(error).__name__}: {lines[0] if lines else ''}"
+
+WARMING_UP = "warming_up"
+READY = "ready"
+DEGRADED = "degraded"
+UNAVAILABLE = "unavailable"
+
+STAGES = ["claim", "evidence", "reasoning", "backing", "qualifier", "rebuttal"]
+
+class WarmupStep:
+    """One start-up task and its outcome"""
+
+    def __init__(self, name: str, fn: Callable[[], None], needs_database: bool):
+        self.name = name
+        self.fn = fn
+        self.needs_database = needs_database
+        self.done = False
+        self.seconds = 0.0
+        self.attempts = 0
+        self.error: Optional[str] = None
+
+    def run(self) -> bool:
+        self.attempts += 1
+        start = time.perf_counter()
+        try:
+            self.fn()
+        except Exception as e:
+            error = _describe(e)
+            if error != self.error:  # Log each new failure once, not every retry
+                logger.warning("Warm-up step %s failed (attempt %d): %s", self.name, self.attempts, error)
+            self.error = error
+            return False
+        self.seconds = time.perf_counter() - start
+        self.done, self.error = True, None
+        logger.info("Warm-up step %s done in %.1f ms", self.name, self.seconds * 1000)
+        return True
+
+    def status(self) -> Dict:
+        return {"done": self.done, "seconds": round(self.seconds, 4), "attempts": self.attempts, "error": self.error}
+
+class Readiness:
+    """Runs the warm-up steps once per worker and answers readiness probes"""
+
+    def __init__(self, check_database: bool = True, retry_seconds: float = 2.0):
+        self.check_database = check_database
+        self.retry_seconds = retry_seconds
+        self.steps: Dict[str, WarmupStep] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def step(self, name: str, needs_database: bool = False):
+        """Register a warm-up step; steps run in registration order"""
+        def decorator(fn: Callable[[], None]):
+            self.steps[name] = WarmupStep(name, fn, needs_database)
+            return fn
+        return decorator
+
+    def _active_steps(self) -> List[WarmupStep]:
+        return [step for step in self.steps.values() if self.check_database or not step.needs_database]
+
+    @property
+    def warmed_up(self) -> bool:
+        return all(step.done for step in self._active_steps())
+
+    def warm_up(self):
+        """Run pending steps, retrying failed ones until all are done"""
+        while not self._stop.is_set():
+            for step in self._active_steps():
+                if not step.done:
+                    step.run()
+            if self.warmed_up:
+                return
+            self._stop.wait(self.retry_seconds)
+
+    def start(self):
+        """Warm up on a background thread so liveness answers meanwhile"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.warm_up, name="sawa-warmup", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def degraded(self) -> List[str]:
+        """Reasons this worker should not get more traffic right now"""
+        reasons = []
+        if self.check_database:
+            from app.database import engine
+            pool = engine.pool
+            if hasattr(pool, "checkedout") and hasattr(pool, "size"):
+                max_overflow = getattr(pool, "_max_overflow", 0)
+                capacity = pool.size() + max_overflow
+                if max_overflow >= 0 and pool.checkedout() >= capacity:
+                    reasons.append(f"Database pool saturated ({pool.checkedout()}/{capacity} connections in use)")
+
+        from app.services.evaluation_scheduler import evaluation_scheduler, INTERACTIVE
+        if evaluation_scheduler.running_workers() == 0:
+            reasons.append("Evaluator backend unavailable (no scheduler workers running)")
+        lane = evaluation_scheduler.stats()[INTERACTIVE]
+        if lane["depth"] >= lane["max_depth"]:
+            reasons.append(f"Interactive evaluation queue full ({lane['depth']}/{lane['max_depth']})")
+        return reasons
+
+    def ping_database(self) -> Optional[str]:
+        """None when the database answers, otherwise the error"""
+        from sqlalchemy import text
+        from app.database import engine
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            return _describe(e)
+        return None
+
+    def check(self) -> Tuple[int, Dict]:
+        """HTTP status and body for a readiness probe"""
+        body = {"status": READY, "warmup": {step.name: step.status() for step in self._active_steps()}}
+        if not self.warmed_up:
+            body["status"] = WARMING_UP
+            return 503, body
+
+        reasons = self.degraded()
+        saturated = any(reason.startswith("Database pool saturated") for reason in reasons)
+        # A saturated pool would make the ping wait for a connection; it is already reported
+        if self.check_database and not saturated:
+            error = self.ping_database()
+            if error is not None:
+                body.update(status=UNAVAILABLE, reasons=[f"Database unreachable ({error})"] + reasons)
+                return 503, body
+
+        if reasons:
+            body.update(status=DEGRADED, reasons=reasons)
+            return (503 if settings.READINESS_FAIL_WHEN_DEGRADED else 200), body
+        return 200, body
+
+readiness = Readiness(
+    check_database=settings.READINESS_CHECK_DATABASE,
+    retry_seconds=settings.WARMUP_RETRY_SECONDS,
+)
+
+@readiness.step("database", needs_database=True)
+def open_database_pool():
+    """Open the pool's first connection"""
+    from sqlalchemy import text
+    from app.database import engine
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+@readiness.step("rubric", needs_database=True)
+def load_rubric():
+    """Configure the ORM mappers, load the rubric catalog and check every facet is in it"""
+    from sqlalchemy.orm import configure_mappers
+    from app.models import user, sawa_conversation, sawa_message, classroom, class_analytics  # noqa: F401 (register mappers)
+    from app.services.catalog import catalog_store
+
+    configure_mappers()
+    catalog = catalog_store.load()
+    missing = catalog.missing_stages()
+    if missing:
+        raise RuntimeError(f"Rubric not seeded for: {', '.join(missing)} in content pack "
+                           f"{catalog_store.pack!r} (run scripts/seed_sawa_rubric.py or scripts/load_content_pack.py)")
+    catalog_store.start_refresh()
+
+@readiness.step("question_bank", needs_database=True)
+def load_question_banks():
+    """Load every topic's question bank, so live turns never wait for one"""
+    from app.services.question_bank import question_bank
+    question_bank.load_all()
+
+@readiness.step("evaluator")
+def warm_evaluator():
+    """Start the scheduler workers and run every stage evaluator once through them"""
+    from app.services.evaluation_scheduler import evaluation_scheduler, BATCH
+
+    def evaluate_all():
+        # Without a database (the in-memory demo) the service and its driver are never loaded
+        if not readiness.check_database:
+            return
+        from app.models.sawa_conversation import SAWAStage
+        from app.services.sawa_service import SAWAService
+        service = SAWAService(db=None)
+        sample = "Studies generally suggest this holds under current conditions, though evidence has limits."
+        for stage in STAGES:
+            service._evaluate_response(SAWAStage(stage), sample)
+
+    evaluation_scheduler.submit(evaluate_all, lane=BATCH, key="warmup").result(timeout=30)
+
+@readiness.step("reference_data")
+def prime_reference_data():
+    """Build the precompressed reference payloads served by /api/sawa"""
+    from app.core.reference_data import precompressed
+    for name in ("REASONING_SCHEMES", "QUALIFIER_PATTERNS", "REBUTTAL_STRATEGIES"):
+        precompressed(name)
@@ -0,0 +1,147 @@
+"""
+Reference data for the SAWA framework: reasoning schemes, qualifier
+patterns and rebuttal strategies (the rubric is served by the catalog)
+
+These tables are only needed by the reference endpoints, so they are
+imported on first use rather than when the application starts.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from app.core.compression import PrecompressedPayload
+from app.core.config import settings
+
+REASONING_SCHEMES = [
+    {
+        "scheme_type": "causal",
+        "description": "Causal or mechanistic reasoning connects evidence to claims through cause–effect or mechanism explanations.",
+        "importance": [
+            "Establishes explanatory power beyond correlation",
+            "Connects empirical findings to underlying scientific models",
+            "Opens space for qualifiers (scope of mechanism)"
+        ],
+        "socratic_prompts": [
+            "What cause–effect relationship explains why your evidence supports your claim?",
+            "What mechanism connects this process to your claim?",
+            "Could another cause explain the same evidence?",
+            "What conditions are necessary for this cause–effect to hold?"
+        ],
+        "examples": [
+            "GMO: 'If long-term feeding studies show no adverse effects, what biological mechanism explains why GMOs are safe?'",
+            "Climate: 'If global temperatures rise, how does greenhouse gas trapping explain the warming mechanism?'"
+        ]
+    },
+    {
+        "scheme_type": "correlation",
+        "description": "Correlation reasoning links patterns in data without specifying cause.",
+        "importance": [
+            "Useful for pattern detection",
+            "Limited without causal justification",
+            "Needs qualifiers to avoid overclaiming"
+        ],
+        "socratic_prompts": [
+            "What pattern in the data supports your claim?",
+            "How strong is the association?",
+            "Could the pattern be explained by another factor?",
+            "Does correlation prove causation here? Why or why not?"
+        ],
+        "examples": [
+            "GMO: 'Feeding study animals showed no differences in weight—what pattern supports safety claims?'",
+            "Climate: 'Temperature rise and CO₂ levels correlate—how do you avoid overstating causation?'"
+        ]
+    }
+]
+
+QUALIFIER_PATTERNS = [
+    {
+        "pattern_type": "certainty_scale",
+        "description": "Certainty scale from absolute to conditional",
+        "sentence_stems": [
+            "In most cases, …",
+            "Generally, …",
+            "The evidence suggests that …",
+            "It is likely that …",
+            "This is true when …",
+            "Under [specific condition], …"
+        ],
+        "examples": [
+            "GMO: 'GMOs are generally safe for human health, though safety may vary depending on trait.'",
+            "Climate: 'Human greenhouse gas emissions are very likely the primary cause of global warming since 1950.'"
+        ]
+    },
+    {
+        "pattern_type": "probability_scale",
+        "description": "Probability scale from certain to unlikely",
+        "sentence_stems": [
+            "Certainly …",
+            "Very likely …",
+            "Likely …",
+            "Possible …",
+            "Unlikely …"
+        ],
+        "examples": [
+            "Vaccines: 'mRNA vaccines reduce hospitalization risk by 80–95%, though effectiveness wanes over time.'"
+        ]
+    }
+]
+
+REBUTTAL_STRATEGIES = [
+    {
+        "strategy_type": "concede_with_boundary",
+        "description": "Accept counter but limit its scope",
+        "examples": [
+            "Yes, some small studies found anomalies, but they are not generalizable.",
+            "Some studies show enzyme changes. → Concede with boundary: effects exist but are inconsistent and small-scale."
+        ],
+        "response_templates": [
+            "Although some evidence suggests __, these findings are limited because __.",
+            "While __ is a concern, it does not outweigh the broader evidence supporting __."
+        ]
+    },
+    {
+        "strategy_type": "limit_scope",
+        "description": "Restate claim with narrower conditions",
+        "examples": [
+            "Vaccines reduce hospitalizations within 6 months, though boosters are needed later.",
+            "Effectiveness wanes after 6 months; I would qualify my claim by time and note boosters restore effectiveness."
+        ],
+        "response_templates": [
+            "This claim may not hold in __ context, but in __ it remains valid.",
+            "While __ is a concern, it does not outweigh the broader evidence supporting __."
+        ]
+    },
+    {
+        "strategy_type": "competing_mechanism",
+        "description": "Propose alternative explanation for counter evidence",
+        "examples": [
+            "Temperature anomalies reflect natural variability, not the main warming trend.",
+            "Natural variability explains short-term patterns, but attribution studies confirm long-term anthropogenic forcing."
+        ],
+        "response_templates": [
+            "An alternative explanation is __, but current evidence more strongly supports __.",
+            "While __ is a concern, it does not outweigh the broader evidence supporting __."
+        ]
+    },
+    {
+        "strategy_type": "challenge_credibility",
+        "description": "Question reliability of counter evidence",
+        "examples": [
+            "This study had a small sample size and inconsistent methods.",
+            "Some studies show enzyme differences in GMO-fed animals; I would limit my claim by noting small samples and inconsistent protocols."
+        ],
+        "response_templates": [
+            "Some critics argue __, yet methodological weaknesses (e.g., __) reduce its credibility.",
+            "While __ is a concern, it does not outweigh the broader evidence supporting __."
+        ]
+    }
+]
+
+@lru_cache(maxsize=None)
+def precompressed(name: str, key: Optional[str] = None) -> PrecompressedPayload:
+    """Serialized and precompressed form of a table, built once per process"""
+    table = globals()[name]
+    return PrecompressedPayload.from_obj(
+        table if key is None else table[key],
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+    )
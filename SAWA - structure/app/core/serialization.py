@@ -0,0 +1,32 @@
+"""
+Fast JSON serialization helpers for SAWA application
+"""
+
+import enum
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+def _default(value: Any) -> Any:
+    """Encode types the standard json module does not know about"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(obj: Any) -> bytes:
+    """Serialize `obj` to JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        # orjson encodes enums and datetimes natively
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def rows_to_dicts(fields: Sequence[str], rows: Iterable[Sequence[Any]]) -> list:
+    """Zip row tuples with field names without building model instances"""
+    return [dict(zip(fields, row)) for row in rows]
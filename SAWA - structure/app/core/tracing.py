@@ -0,0 +1,327 @@
+"""
+Lightweight request tracing for SAWA application
+
+Sampled requests get a tree of spans (the request, auth, service methods,
+every SQL statement) written to a rotating local file, one per worker
+process, by a background thread so the event loop never waits on the disk.
+Each line is an OTLP JSON ExportTraceServiceRequest, so the file can be
+replayed into any OpenTelemetry collector (e.g. the otlpjsonfile receiver)
+or read with jq.
+
+Every response carries `X-Trace-Id` and a W3C `traceparent` header. An
+incoming `traceparent` continues the caller's trace; TRACE_SAMPLE_RATE
+decides whether it is recorded, unless TRACE_TRUST_INCOMING lets a trusted
+proxy force it with the sampled flag. Unsampled requests only pay for a
+context variable lookup at each instrumented point.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+SERVICE_NAME = "sawa"
+MAX_STATEMENT_LENGTH = 2000  # Characters of SQL kept on a span
+EXPORT_QUEUE_SIZE = 1000  # Finished traces waiting for the writer; more are dropped
+
+# OTLP span kinds and status codes
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+class Trace:
+    """Spans of one sampled request, exported together when the root ends"""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+
+class Span:
+    """One timed operation; use as a context manager"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes",
+                 "start_ns", "end_ns", "status", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None,
+                 kind: int = KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = STATUS_OK
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def start(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def end(self, error: Optional[BaseException] = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = STATUS_ERROR
+            self.attributes["exception.type"] = type(error).__name__
+        _current_span.reset(self._token)
+        self.trace.spans.append(self)
+        if self.kind == KIND_SERVER:  # The request's root span
+            exporter.export(self.trace)
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc)
+
+class _NoopSpan:
+    """Returned when the current request is not sampled"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("sawa_current_span", default=None)
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+def current_span() -> Optional[Span]:
+    """The active span of a sampled request, if any"""
+    return _current_span.get()
+
+def start_span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """Child span of the active one, or a no-op outside a sampled request"""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+def traced(name: str):
+    """Decorator that wraps a function in a span"""
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with start_span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}  # OTLP JSON encodes 64-bit ints as strings
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+class FileExporter:
+    """Append finished traces to a size-rotated file, one OTLP JSON request per line
+
+    Rotation is not safe across processes, so each worker writes its own
+    file, `path` with the PID before the extension. export() only queues the
+    trace; a writer thread serializes and writes it.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def process_path(self) -> str:
+        root, extension = os.path.splitext(self.path)
+        return f"{root}.{os.getpid()}{extension}"
+
+    def _start(self):
+        # Started on the first sampled trace in this process (after any fork),
+        # so an unsampled worker never creates a file or thread
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            handler = RotatingFileHandler(self.process_path(), maxBytes=self.max_bytes,
+                                          backupCount=self.backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger(f"sawa.traces.{os.getpid()}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            self._thread = threading.Thread(target=self._write, args=(logger,), name="sawa-traces", daemon=True)
+            self._thread.start()
+
+    def _write(self, logger: logging.Logger):
+        while True:
+            logger.info(self.serialize(self._queue.get()))
+
+    def export(self, trace: Trace):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def serialize(self, trace: Trace) -> str:
+        spans = [
+            {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [_attribute(key, value) for key, value in span.attributes.items()],
+                "status": {"code": span.status},
+            }
+            for span in trace.spans
+        ]
+        return json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+            }]
+        }, separators=(",", ":"))
+
+exporter = FileExporter(settings.TRACE_FILE, settings.TRACE_FILE_MAX_BYTES, settings.TRACE_FILE_BACKUPS)
+
+def _parse_traceparent(value: Optional[str]):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = int(parts[3], 16) & 1 == 1
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+class TracingMiddleware:
+    """Start the root span for sampled requests and add trace headers to every response"""
+
+    def __init__(self, app: ASGIApp, sample_rate: float = None, trust_incoming: bool = None):
+        self.app = app
+        self.sample_rate = settings.TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.trust_incoming = settings.TRACE_TRUST_INCOMING if trust_incoming is None else trust_incoming
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = _parse_traceparent(Headers(scope=scope).get("traceparent"))
+        if incoming is not None:
+            trace_id, parent_id, sampled = incoming
+            # Any client can send the sampled flag; only a trusted proxy may force a trace with it
+            if not (sampled and self.trust_incoming):
+                sampled = random.random() < self.sample_rate
+        else:
+            trace_id, parent_id, sampled = _new_id(128), None, random.random() < self.sample_rate
+
+        span = None
+        if sampled:
+            span = Span(Trace(trace_id), f"{scope['method']} {scope['path']}", parent_id, KIND_SERVER, {
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+            })
+        span_id = span.span_id if span is not None else (parent_id or _new_id(64))
+        trace_headers = [
+            (b"x-trace-id", trace_id.encode()),
+            (b"traceparent", f"00-{trace_id}-{span_id}-{'01' if sampled else '00'}".encode()),
+        ]
+
+        async def send_with_trace_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + trace_headers
+                if span is not None:
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = STATUS_ERROR
+            await send(message)
+
+        if span is None:
+            await self.app(scope, receive, send_with_trace_headers)
+            return
+
+        span.start()
+        error = None
+        try:
+            await self.app(scope, receive, send_with_trace_headers)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # Name the span after the route template once the router has matched it
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                span.name = f"{scope['method']} {route}"
+                span.set_attribute("http.route", route)
+            span.end(error)
+
+def instrument_sqlalchemy(engine):
+    """Record a client span for every SQL statement run on `engine`"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        span = start_span("db.query", KIND_CLIENT)
+        if span is NOOP_SPAN:
+            return
+        span.set_attribute("db.system", engine.dialect.name)
+        span.set_attribute("db.statement", statement[:MAX_STATEMENT_LENGTH])
+        context._sawa_span = span.start()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_sawa_span", None)
+        if span is not None:
+            context._sawa_span = None
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_sawa_span", None) if context is not None else None
+        if span is not None:
+            context._sawa_span = None
+            span.end(exception_context.original_exception)
@@ -6,9 +6,11 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.tracing import instrument_sqlalchemy
 
 # Create database engine
 engine = create_engine(settings.DATABASE_URL)
+instrument_sqlalchemy(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
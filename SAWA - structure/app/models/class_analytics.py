@@ -0,0 +1,46 @@
+"""
+Class analytics aggregates, maintained incrementally as turns are written
+
+One row per class, topic, stage and day holds running counters, so teacher
+dashboards read a handful of rows instead of scanning conversations and
+messages. Counters are only ever incremented, in the same transaction as
+the turn that produced them (see app/services/class_analytics.py).
+"""
+
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, UniqueConstraint
+from app.database import Base
+
+class ClassStageDaily(Base):
+    __tablename__ = "class_stage_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    classroom_id = Column(Integer, ForeignKey("classrooms.id"), nullable=False)
+    topic = Column(String, nullable=False)  # Normalized topic
+    stage = Column(String, nullable=False)  # claim, evidence, reasoning, backing, qualifier, rebuttal
+    day = Column(Date, nullable=False)  # UTC
+
+    # Evaluated student responses and their score distribution
+    responses = Column(Integer, nullable=False, default=0)
+    score_1 = Column(Integer, nullable=False, default=0)
+    score_2 = Column(Integer, nullable=False, default=0)
+    score_3 = Column(Integer, nullable=False, default=0)
+    score_4 = Column(Integer, nullable=False, default=0)
+
+    # Responses that passed the stage (level 3+) and those that triggered a feedback loop
+    passed = Column(Integer, nullable=False, default=0)
+    feedback_loops = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("classroom_id", "topic", "stage", "day"),)
+
+class ClassTopicDaily(Base):
+    __tablename__ = "class_topic_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    classroom_id = Column(Integer, ForeignKey("classrooms.id"), nullable=False)
+    topic = Column(String, nullable=False)  # Normalized topic
+    day = Column(Date, nullable=False)  # UTC
+
+    sessions_started = Column(Integer, nullable=False, default=0)
+    sessions_completed = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("classroom_id", "topic", "day"),)
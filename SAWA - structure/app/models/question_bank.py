@@ -0,0 +1,17 @@
+"""
+Topic question bank model: Socratic questions written for one topic
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+class TopicQuestionBank(Base):
+    __tablename__ = "topic_question_banks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    topic = Column(String, nullable=False, unique=True)  # Normalized topic
+    questions = Column(Text, nullable=False)  # JSON: stage -> questions by iteration
+    source = Column(String, nullable=False)  # "template" or the model that wrote them
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
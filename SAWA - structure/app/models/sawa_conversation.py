@@ -2,7 +2,7 @@
 SAWA Conversation model implementing the CER + Toulmin framework
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -23,10 +23,13 @@ class SAWAConversation(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     topic = Column(String, nullable=False)  # The scientific topic being discussed
+    classroom_id = Column(Integer, ForeignKey("classrooms.id"), nullable=True, index=True)  # Class the session counts towards
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=True, index=True)  # Set when launched by an assignment
     
     # Current state
     current_stage = Column(Enum(SAWAStage), default=SAWAStage.CLAIM)
     stage_iteration = Column(Integer, default=0)  # How many times we've looped in current stage
+    version = Column(Integer, nullable=False)  # Optimistic concurrency counter, bumped on every update
     
     # Student responses for each stage
     claim_response = Column(Text, nullable=True)
@@ -56,3 +59,10 @@ class SAWAConversation(Base):
     # Relationships
     user = relationship("User", back_populates="sawa_conversations")
     messages = relationship("SAWAMessage", back_populates="conversation", cascade="all, delete-orphan")
+    
+    # Every UPDATE is issued as "... WHERE id = :id AND version = :version" and
+    # bumps the version; a concurrent writer that loses the race gets StaleDataError
+    __mapper_args__ = {"version_id_col": version}
+    
+    # At most one session per student and assignment
+    __table_args__ = (UniqueConstraint("assignment_id", "user_id"),)
@@ -2,9 +2,10 @@
 SAWA Message model for tracking Socratic dialogue
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
 import enum
 from app.database import Base
 
@@ -30,7 +31,47 @@ class SAWAMessage(Base):
     rubric_score = Column(Integer, nullable=True)  # 1-4 score if this was evaluated
     feedback_triggered = Column(Boolean, default=False)  # Whether this triggered feedback
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Stamped by the app, not the database, so rows of one turn written later
+    # by a background task (feedback nudges) order against it on the same clock
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        server_default=func.now())
     
     # Relationships
     conversation = relationship("SAWAConversation", back_populates="messages")
+
+# Full-text index over student responses (see app/services/search.py), kept in
+# sync by the database itself: a generated tsvector column with a GIN index on
+# PostgreSQL, an external-content FTS5 table maintained by triggers on SQLite.
+# Other messages (questions, nudges, prep sheets) are not indexed.
+SEARCH_CONFIG = "english"
+SEARCHABLE_TYPE = MessageType.STUDENT_RESPONSE.name  # Enum columns store member names
+
+SEARCH_INDEX_DDL = {
+    "postgresql": [
+        f"""ALTER TABLE sawa_messages ADD COLUMN IF NOT EXISTS content_tsv tsvector
+            GENERATED ALWAYS AS (CASE WHEN message_type = '{SEARCHABLE_TYPE}'
+                                 THEN to_tsvector('{SEARCH_CONFIG}', content) END) STORED""",
+        "CREATE INDEX IF NOT EXISTS ix_sawa_messages_content_tsv ON sawa_messages USING GIN (content_tsv)",
+    ],
+    "sqlite": [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS sawa_messages_fts USING fts5(
+            content, content='sawa_messages', content_rowid='id', tokenize='porter unicode61')""",
+        f"""CREATE TRIGGER IF NOT EXISTS sawa_messages_fts_insert AFTER INSERT ON sawa_messages
+            WHEN new.message_type = '{SEARCHABLE_TYPE}' BEGIN
+                INSERT INTO sawa_messages_fts(rowid, content) VALUES (new.id, new.content);
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS sawa_messages_fts_delete AFTER DELETE ON sawa_messages
+            WHEN old.message_type = '{SEARCHABLE_TYPE}' BEGIN
+                INSERT INTO sawa_messages_fts(sawa_messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS sawa_messages_fts_update AFTER UPDATE OF content ON sawa_messages
+            WHEN old.message_type = '{SEARCHABLE_TYPE}' BEGIN
+                INSERT INTO sawa_messages_fts(sawa_messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO sawa_messages_fts(rowid, content) VALUES (new.id, new.content);
+            END""",
+    ],
+}
+
+for dialect, statements in SEARCH_INDEX_DDL.items():
+    for statement in statements:
+        event.listen(SAWAMessage.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
@@ -2,7 +2,7 @@
 SAWA Rubric model for storing evaluation criteria and examples
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, UniqueConstraint
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -11,6 +11,9 @@ class SAWARubric(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     
+    # Content pack (course or language) the row belongs to; packs live side by side
+    pack = Column(String, nullable=False, default="default", server_default="default")
+    
     # Rubric facet
     facet = Column(String, nullable=False)  # claim, evidence, reasoning, backing, qualifier, rebuttal
     
@@ -30,3 +33,29 @@ class SAWARubric(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (UniqueConstraint("pack", "facet", "level"),)
+
+class ContentPack(Base):
+    __tablename__ = "content_packs"
+    
+    # One row per loaded pack; its rubric rows are SAWARubric rows with the same pack name
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True)
+    language = Column(String, nullable=False, default="en")
+    title = Column(String, nullable=True)
+    
+    # The stage question sequences and per-level nudges of the pack
+    questions = Column(Text, nullable=True)  # JSON: {stage: [question, ...]}
+    feedback = Column(Text, nullable=True)  # JSON: {stage: {level: nudge}}
+    
+    loaded_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+    
+    # One row per published change to the rubric; workers reload when the latest id changes
+    id = Column(Integer, primary_key=True, index=True)
+    note = Column(String, nullable=True)
+    
+    published_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,56 @@
+"""
+Near-duplicate detection models: MinHash signatures, LSH buckets and matches
+
+Every student response in a class session gets a MinHash signature when it
+is saved. It is compared with the earlier cluster representatives from other
+students in the same class, assignment, topic and stage that share one of its LSH
+buckets; a match links it to that representative, otherwise it becomes a
+representative itself and gets one bucket row per band. Each response stores
+at most one link, so a cluster of k copies is k - 1 rows and the report
+never compares all pairs (see app/services/similarity.py).
+"""
+
+from sqlalchemy import Column, Integer, String, Float, BigInteger, LargeBinary, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class ResponseSignature(Base):
+    __tablename__ = "response_signatures"
+
+    message_id = Column(Integer, ForeignKey("sawa_messages.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    classroom_id = Column(Integer, ForeignKey("classrooms.id"), nullable=False)
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=True)  # None for sessions started in class
+    topic = Column(String, nullable=False)  # Normalized topic
+    stage = Column(String, nullable=False)
+    signature = Column(LargeBinary, nullable=False)  # MinHash values, packed unsigned 32-bit
+    representative_id = Column(Integer, nullable=False)  # Its cluster's first response; its own id if it matched none
+
+class ResponseBucket(Base):
+    __tablename__ = "response_buckets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    classroom_id = Column(Integer, nullable=False)
+    assignment_id = Column(Integer, nullable=True)
+    topic = Column(String, nullable=False)
+    stage = Column(String, nullable=False)
+    band_key = Column(BigInteger, nullable=False)  # Hash of one band of the signature, band number included
+    message_id = Column(Integer, ForeignKey("sawa_messages.id"), nullable=False)
+
+    __table_args__ = (Index("ix_response_buckets_lookup", "classroom_id", "assignment_id", "topic", "stage", "band_key"),)
+
+class SimilarResponsePair(Base):
+    __tablename__ = "similar_response_pairs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    classroom_id = Column(Integer, ForeignKey("classrooms.id"), nullable=False)
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=True)
+    topic = Column(String, nullable=False)
+    stage = Column(String, nullable=False)
+    message_id = Column(Integer, ForeignKey("sawa_messages.id"), nullable=False, unique=True)  # The later response
+    similar_message_id = Column(Integer, ForeignKey("sawa_messages.id"), nullable=False)  # Its representative
+    similarity = Column(Float, nullable=False)  # Estimated Jaccard similarity of word 3-grams
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_similar_response_pairs_scope", "classroom_id", "assignment_id", "topic", "stage"),)
@@ -0,0 +1,44 @@
+"""
+Administration API endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Optional
+
+from app.core.auth import get_current_admin
+from app.core.config import settings
+from app.core.profiling import profiler, ProfilerBusy, COLLAPSED, PSTATS
+from app.models.user import User
+
+router = APIRouter()
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(10, gt=0, description="Stop after this many seconds"),
+    requests: Optional[int] = Query(None, gt=0, description="Stop earlier once this many requests have finished"),
+    format: str = Query(COLLAPSED, pattern=f"^({COLLAPSED}|{PSTATS})$"),
+    interval_ms: float = Query(5, ge=1, le=100, description="Sampling interval"),
+    current_user: User = Depends(get_current_admin)
+):
+    """Sample every thread of the worker serving this request and return the profile"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    
+    try:
+        session = await profiler.profile(
+            seconds=min(seconds, settings.PROFILING_MAX_SECONDS),
+            max_requests=requests,
+            interval=interval_ms / 1000
+        )
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    headers = {
+        "X-Profile-Samples": str(session.sample_count),
+        "X-Profile-Requests": str(session.requests),
+        "X-Profile-Seconds": f"{session.duration:.2f}",
+    }
+    if format == PSTATS:
+        headers["Content-Disposition"] = 'attachment; filename="sawa.pstats"'
+        return Response(content=session.pstats(), media_type="application/octet-stream", headers=headers)
+    return Response(content=session.collapsed(), media_type="text/plain", headers=headers)
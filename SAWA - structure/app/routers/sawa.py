@@ -2,11 +2,14 @@
 SAWA API endpoints implementing the CER + Toulmin framework
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Hashable, List, Optional
+from collections import OrderedDict
+import asyncio
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.schemas.sawa import (
     SAWAStartRequest,
     StudentResponse,
@@ -19,47 +22,139 @@ from app.schemas.sawa import (
     QualifierPattern,
     RebuttalStrategy
 )
-from app.services.sawa_service import SAWAService
-from app.core.auth import get_current_user
+from app.services.sawa_service import SAWAService, ConversationConflict
+from app.services.evaluation_scheduler import evaluation_scheduler, fairness_key, SchedulerOverloaded, INTERACTIVE
+from app.core.auth import get_current_user, get_user_from_token
+from app.core.events import conversation_events, format_sse, RESPONSE, DONE
+from app.core.serialization import dumps
+from app.core.rate_limit import rate_limiter, TURN
+from app.core.idempotency import idempotency_store, IdempotencyKeyMismatch, IdempotencyKeyInProgress
+from app.core.metrics import PhaseTimer, SERIALIZE
 from app.models.user import User
 
 router = APIRouter()
 
+# Seconds between SSE comments that keep idle proxies from closing the stream
+SSE_HEARTBEAT_SECONDS = 15
+
+# Conversation id -> class id (None without a class), which never changes once
+# started; turns are scheduled by class without a query per turn
+_conversation_classes: "OrderedDict[int, Optional[int]]" = OrderedDict()
+CONVERSATION_CLASSES_MAX = 10_000
+
+def _remember_class(conversation_id: int, classroom_id: Optional[int]):
+    _conversation_classes[conversation_id] = classroom_id
+    _conversation_classes.move_to_end(conversation_id)
+    if len(_conversation_classes) > CONVERSATION_CLASSES_MAX:
+        _conversation_classes.popitem(last=False)
+
+def _turn_key(db: Session, conversation_id: int, user: User) -> Hashable:
+    """The scheduler fairness key of a turn: its conversation's class, or the user without one"""
+    if conversation_id in _conversation_classes:
+        classroom_id = _conversation_classes[conversation_id]
+    else:
+        from app.models.sawa_conversation import SAWAConversation
+        classroom_id = db.query(SAWAConversation.classroom_id).filter(
+            SAWAConversation.id == conversation_id
+        ).scalar()
+        _remember_class(conversation_id, classroom_id)
+    return fairness_key(user.id, classroom_id)
+
+async def _idempotent(key, fingerprint, compute):
+    """Run `compute` once per Idempotency-Key; retries get the stored response"""
+    try:
+        # A shared store hands responses back as dicts
+        return SAWAResponse.model_validate(await idempotency_store.run(key, fingerprint, compute))
+    except IdempotencyKeyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyKeyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @router.post("/start", response_model=SAWAResponse)
 async def start_sawa_conversation(
     request: SAWAStartRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Start a new SAWA conversation with a scientific topic"""
+    async def start():
+        try:
+            sawa_service = SAWAService(db)
+            response = sawa_service.start_conversation(
+                user_id=current_user.id,
+                topic=request.topic,
+                classroom_id=request.classroom_id
+            )
+            _remember_class(response.conversation_id, request.classroom_id)
+            return response
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error starting conversation: {str(e)}")
+    
+    if idempotency_key is None:
+        return await start()
+    return await _idempotent(("start", current_user.id, idempotency_key), (request.topic, request.classroom_id), start)
+
+@router.post("/assignments/{assignment_id}/resume", response_model=SAWAResponse)
+async def resume_sawa_assignment(
+    assignment_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Open the session a teacher launched for this assignment, where the student left off"""
     try:
         sawa_service = SAWAService(db)
-        response = sawa_service.start_conversation(
-            user_id=current_user.id,
-            topic=request.topic
-        )
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error starting conversation: {str(e)}")
+        return sawa_service.resume_assignment(current_user.id, assignment_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 @router.post("/respond", response_model=SAWAResponse)
 async def process_sawa_response(
     response: StudentResponse,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Process student response in SAWA conversation"""
-    try:
-        sawa_service = SAWAService(db)
-        sawa_response = sawa_service.process_response(
-            conversation_id=response.conversation_id,
-            response=response.content
+    async def respond():
+        try:
+            sawa_service = SAWAService(db)
+            # Run on the evaluation scheduler (off the event loop, so streamed
+            # events reach subscribers while the turn is still being committed)
+            sawa_response = await evaluation_scheduler.run(
+                sawa_service.process_response,
+                conversation_id=response.conversation_id,
+                response=response.content,
+                lane=INTERACTIVE,
+                key=_turn_key(db, response.conversation_id, current_user)
+            )
+            return sawa_response
+        except SchedulerOverloaded as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        except ConversationConflict as e:
+            # Another turn for this conversation won the race (double submit,
+            # second tab); the client should reload the conversation state
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing response: {str(e)}")
+    
+    if idempotency_key is None:
+        sawa_response = await respond()
+    else:
+        sawa_response = await _idempotent(
+            ("respond", current_user.id, idempotency_key),
+            (response.conversation_id, response.content),
+            respond
         )
-        return sawa_response
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing response: {str(e)}")
+    
+    # Encoded here rather than by FastAPI so the phase is measured; response_model only documents the shape
+    with PhaseTimer(SERIALIZE):
+        body = dumps(sawa_response.model_dump())
+    return Response(content=body, media_type="application/json")
 
 @router.get("/history/{conversation_id}", response_model=SAWAHistoryResponse)
 async def get_sawa_conversation_history(
@@ -70,13 +165,130 @@ async def get_sawa_conversation_history(
     """Get complete SAWA conversation history"""
     try:
         sawa_service = SAWAService(db)
-        history = sawa_service.get_conversation_history(conversation_id)
-        return history
+        # Built from row tuples; response_model only documents the shape
+        history = sawa_service.get_conversation_history_json(conversation_id)
+        return Response(content=history, media_type="application/json")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving history: {str(e)}")
 
+def _check_conversation_access(db: Session, conversation_id: int, user: User):
+    """Raise 404 unless the conversation exists and belongs to the user; returns its class id"""
+    from app.models.sawa_conversation import SAWAConversation
+    
+    conversation = db.query(SAWAConversation.user_id, SAWAConversation.classroom_id).filter(
+        SAWAConversation.id == conversation_id
+    ).first()
+    if conversation is None or conversation.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    _remember_class(conversation_id, conversation.classroom_id)
+    return conversation.classroom_id
+
+@router.get("/stream/{conversation_id}")
+async def stream_sawa_conversation(
+    conversation_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream conversation events as Server-Sent Events
+
+    Events: feedback (the nudge, once the turn is saved), token (LLM text chunks),
+    message (each committed message), state (changed conversation fields),
+    response (a full turn reply) and done (the prep sheet; the stream ends).
+    """
+    _check_conversation_access(db, conversation_id, current_user)
+    # Release the pooled connection before holding a long-lived stream open
+    db.close()
+    
+    async def event_source():
+        async with conversation_events.subscribe(conversation_id) as queue:
+            yield b": connected\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield format_sse(payload)
+                if payload["event"] == DONE:
+                    break
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _process_turn(conversation_id: int, content: str) -> SAWAResponse:
+    """Process one turn with its own session (runs on the evaluation scheduler)"""
+    db = SessionLocal()
+    try:
+        return SAWAService(db).process_response(conversation_id=conversation_id, response=content)
+    finally:
+        db.close()
+
+@router.websocket("/ws/{conversation_id}")
+async def sawa_conversation_socket(
+    websocket: WebSocket,
+    conversation_id: int,
+    token: str = Query(...)
+):
+    """WebSocket channel for a conversation
+
+    Send {"content": "..."} to submit a turn. Receives the same events as
+    /stream, each as a JSON frame {"event": ..., "data": ...}.
+    """
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+        key = fairness_key(user.id, _check_conversation_access(db, conversation_id, user))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        db.close()
+    
+    await websocket.accept()
+    client_ip = websocket.client.host if websocket.client else None
+    
+    async def forward_events(queue: asyncio.Queue):
+        while True:
+            payload = await queue.get()
+            await websocket.send_text(dumps(payload).decode())
+    
+    async with conversation_events.subscribe(conversation_id) as queue:
+        forwarder = asyncio.create_task(forward_events(queue))
+        try:
+            while True:
+                incoming = await websocket.receive_json()
+                content = incoming.get("content") if isinstance(incoming, dict) else None
+                if not content:
+                    queue.put_nowait({"event": "error", "data": {"detail": "content is required"}})
+                    continue
+                retry_after = await rate_limiter.check(TURN, user.username, client_ip)
+                if retry_after > 0:
+                    queue.put_nowait({"event": "error", "data": {"detail": "Too many requests", "retry_after": retry_after}})
+                    continue
+                try:
+                    sawa_response = await evaluation_scheduler.run(
+                        _process_turn, conversation_id, content, lane=INTERACTIVE, key=key
+                    )
+                except SchedulerOverloaded as e:
+                    queue.put_nowait({"event": "error", "data": {"detail": str(e), "retry_after": e.retry_after}})
+                    continue
+                except ConversationConflict as e:
+                    queue.put_nowait({"event": "error", "data": {"detail": str(e), "status": 409}})
+                    continue
+                except ValueError as e:
+                    queue.put_nowait({"event": "error", "data": {"detail": str(e)}})
+                    continue
+                conversation_events.publish(conversation_id, RESPONSE, sawa_response.model_dump())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            forwarder.cancel()
+
 @router.get("/conversations", response_model=List[SAWAConversationResponse])
 async def get_user_sawa_conversations(
     current_user: User = Depends(get_current_user),
@@ -92,166 +304,32 @@ async def get_user_sawa_conversations(
     return conversations
 
 @router.get("/rubric/{facet}", response_model=SAWARubricResponse)
-async def get_sawa_rubric(
-    facet: str,
-    db: Session = Depends(get_db)
-):
+async def get_sawa_rubric(facet: str, request: Request):
     """Get SAWA rubric for a specific facet"""
-    from app.models.sawa_rubric import SAWARubric
-    
-    rubric_entries = db.query(SAWARubric).filter(
-        SAWARubric.facet == facet
-    ).order_by(SAWARubric.level).all()
-    
-    if not rubric_entries:
+    from app.services.catalog import catalog_store
+    payload = catalog_store.current.rubric_payload(facet)
+    if payload is None:
         raise HTTPException(status_code=404, detail=f"Rubric not found for facet: {facet}")
-    
-    levels = []
-    for entry in rubric_entries:
-        levels.append({
-            "level": entry.level,
-            "level_name": entry.level_name,
-            "description": entry.description,
-            "example_responses": entry.example_responses.split('\n') if entry.example_responses else [],
-            "socratic_prompts": entry.socratic_prompts.split('\n') if entry.socratic_prompts else [],
-            "feedback_templates": entry.feedback_templates.split('\n') if entry.feedback_templates else []
-        })
-    
-    return SAWARubricResponse(facet=facet, levels=levels)
+    # Built and precompressed when the catalog version was loaded; response_model only documents the shape
+    return payload.response(request)
 
 @router.get("/reasoning-schemes", response_model=List[ReasoningScheme])
-async def get_reasoning_schemes():
+async def get_reasoning_schemes(request: Request):
     """Get available reasoning schemes"""
-    schemes = [
-        ReasoningScheme(
-            scheme_type="causal",
-            description="Causal or mechanistic reasoning connects evidence to claims through cause–effect or mechanism explanations.",
-            importance=[
-                "Establishes explanatory power beyond correlation",
-                "Connects empirical findings to underlying scientific models",
-                "Opens space for qualifiers (scope of mechanism)"
-            ],
-            socratic_prompts=[
-                "What cause–effect relationship explains why your evidence supports your claim?",
-                "What mechanism connects this process to your claim?",
-                "Could another cause explain the same evidence?",
-                "What conditions are necessary for this cause–effect to hold?"
-            ],
-            examples=[
-                "GMO: 'If long-term feeding studies show no adverse effects, what biological mechanism explains why GMOs are safe?'",
-                "Climate: 'If global temperatures rise, how does greenhouse gas trapping explain the warming mechanism?'"
-            ]
-        ),
-        ReasoningScheme(
-            scheme_type="correlation",
-            description="Correlation reasoning links patterns in data without specifying cause.",
-            importance=[
-                "Useful for pattern detection",
-                "Limited without causal justification",
-                "Needs qualifiers to avoid overclaiming"
-            ],
-            socratic_prompts=[
-                "What pattern in the data supports your claim?",
-                "How strong is the association?",
-                "Could the pattern be explained by another factor?",
-                "Does correlation prove causation here? Why or why not?"
-            ],
-            examples=[
-                "GMO: 'Feeding study animals showed no differences in weight—what pattern supports safety claims?'",
-                "Climate: 'Temperature rise and CO₂ levels correlate—how do you avoid overstating causation?'"
-            ]
-        )
-    ]
-    return schemes
+    from app.core.reference_data import precompressed
+    # Served precompressed; response_model only documents the shape
+    return precompressed("REASONING_SCHEMES").response(request)
 
 @router.get("/qualifier-patterns", response_model=List[QualifierPattern])
-async def get_qualifier_patterns():
+async def get_qualifier_patterns(request: Request):
     """Get qualifier patterns and sentence stems"""
-    patterns = [
-        QualifierPattern(
-            pattern_type="certainty_scale",
-            description="Certainty scale from absolute to conditional",
-            sentence_stems=[
-                "In most cases, …",
-                "Generally, …",
-                "The evidence suggests that …",
-                "It is likely that …",
-                "This is true when …",
-                "Under [specific condition], …"
-            ],
-            examples=[
-                "GMO: 'GMOs are generally safe for human health, though safety may vary depending on trait.'",
-                "Climate: 'Human greenhouse gas emissions are very likely the primary cause of global warming since 1950.'"
-            ]
-        ),
-        QualifierPattern(
-            pattern_type="probability_scale",
-            description="Probability scale from certain to unlikely",
-            sentence_stems=[
-                "Certainly …",
-                "Very likely …",
-                "Likely …",
-                "Possible …",
-                "Unlikely …"
-            ],
-            examples=[
-                "Vaccines: 'mRNA vaccines reduce hospitalization risk by 80–95%, though effectiveness wanes over time.'"
-            ]
-        )
-    ]
-    return patterns
+    from app.core.reference_data import precompressed
+    # Served precompressed; response_model only documents the shape
+    return precompressed("QUALIFIER_PATTERNS").response(request)
 
 @router.get("/rebuttal-strategies", response_model=List[RebuttalStrategy])
-async def get_rebuttal_strategies():
+async def get_rebuttal_strategies(request: Request):
     """Get rebuttal strategies and response templates"""
-    strategies = [
-        RebuttalStrategy(
-            strategy_type="concede_with_boundary",
-            description="Accept counter but limit its scope",
-            examples=[
-                "Yes, some small studies found anomalies, but they are not generalizable.",
-                "Some studies show enzyme changes. → Concede with boundary: effects exist but are inconsistent and small-scale."
-            ],
-            response_templates=[
-                "Although some evidence suggests __, these findings are limited because __.",
-                "While __ is a concern, it does not outweigh the broader evidence supporting __."
-            ]
-        ),
-        RebuttalStrategy(
-            strategy_type="limit_scope",
-            description="Restate claim with narrower conditions",
-            examples=[
-                "Vaccines reduce hospitalizations within 6 months, though boosters are needed later.",
-                "Effectiveness wanes after 6 months; I would qualify my claim by time and note boosters restore effectiveness."
-            ],
-            response_templates=[
-                "This claim may not hold in __ context, but in __ it remains valid.",
-                "While __ is a concern, it does not outweigh the broader evidence supporting __."
-            ]
-        ),
-        RebuttalStrategy(
-            strategy_type="competing_mechanism",
-            description="Propose alternative explanation for counter evidence",
-            examples=[
-                "Temperature anomalies reflect natural variability, not the main warming trend.",
-                "Natural variability explains short-term patterns, but attribution studies confirm long-term anthropogenic forcing."
-            ],
-            response_templates=[
-                "An alternative explanation is __, but current evidence more strongly supports __.",
-                "While __ is a concern, it does not outweigh the broader evidence supporting __."
-            ]
-        ),
-        RebuttalStrategy(
-            strategy_type="challenge_credibility",
-            description="Question reliability of counter evidence",
-            examples=[
-                "This study had a small sample size and inconsistent methods.",
-                "Some studies show enzyme differences in GMO-fed animals; I would limit my claim by noting small samples and inconsistent protocols."
-            ],
-            response_templates=[
-                "Some critics argue __, yet methodological weaknesses (e.g., __) reduce its credibility.",
-                "While __ is a concern, it does not outweigh the broader evidence supporting __."
-            ]
-        )
-    ]
-    return strategies
+    from app.core.reference_data import precompressed
+    # Served precompressed; response_model only documents the shape
+    return precompressed("REBUTTAL_STRATEGIES").response(request)
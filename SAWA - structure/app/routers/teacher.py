@@ -0,0 +1,223 @@
+"""
+Teacher API endpoints: classes, rosters, assignments and class analytics
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import List, Optional
+
+from app.database import get_db
+from app.schemas.classroom import (
+    ClassroomCreate,
+    ClassroomResponse,
+    RosterUpdate,
+    RosterUpdateResponse,
+    AssignmentCreate,
+    AssignmentResponse,
+    AssignmentLaunchResponse,
+    ClassAnalyticsResponse,
+    SearchResponse,
+    SimilarityReport
+)
+from app.models.classroom import Classroom, ClassroomMember, Assignment
+from app.models.user import User
+from app.core.auth import get_current_teacher
+from app.core.config import settings
+from app.services.class_analytics import class_summary, STAGES
+from app.services.search import search_responses, SearchUnavailable
+from app.services.similarity import similarity_report
+from app.services.sawa_service import SAWAService, ConversationConflict, retry_on_conflict
+from app.services.question_bank import question_bank
+from app.services.evaluation_scheduler import evaluation_scheduler, fairness_key, SchedulerOverloaded, BATCH
+
+router = APIRouter()
+
+# Only matches at or above the threshold are stored, so a lower floor could find nothing more
+SIMILARITY_FLOOR = "Defaults to SIMILARITY_THRESHOLD, the lowest similarity stored"
+
+def _get_own_classroom(db: Session, classroom_id: int, teacher: User) -> Classroom:
+    """Raise 404 unless the class exists and belongs to the teacher"""
+    classroom = db.query(Classroom).filter(
+        Classroom.id == classroom_id,
+        Classroom.teacher_id == teacher.id
+    ).first()
+    if classroom is None:
+        raise HTTPException(status_code=404, detail="Class not found")
+    return classroom
+
+@router.post("/classes", response_model=ClassroomResponse)
+async def create_classroom(
+    request: ClassroomCreate,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Create a class owned by the current teacher"""
+    classroom = Classroom(name=request.name, teacher_id=current_user.id)
+    db.add(classroom)
+    db.commit()
+    db.refresh(classroom)
+    return classroom
+
+@router.get("/classes", response_model=List[ClassroomResponse])
+async def list_classrooms(
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """List the current teacher's classes"""
+    return db.query(Classroom).filter(
+        Classroom.teacher_id == current_user.id
+    ).order_by(Classroom.created_at.desc()).all()
+
+@router.post("/classes/{classroom_id}/students", response_model=RosterUpdateResponse)
+async def add_students(
+    classroom_id: int,
+    request: RosterUpdate,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Enroll students in a class by username"""
+    _get_own_classroom(db, classroom_id, current_user)
+
+    usernames = set(request.usernames)
+    users = db.query(User.id, User.username).filter(User.username.in_(usernames)).all()
+    enrolled = {user_id for (user_id,) in db.query(ClassroomMember.user_id).filter(
+        ClassroomMember.classroom_id == classroom_id,
+        ClassroomMember.user_id.in_([user.id for user in users])
+    )}
+    new_members = [user.id for user in users if user.id not in enrolled]
+    db.add_all([ClassroomMember(classroom_id=classroom_id, user_id=user_id) for user_id in new_members])
+    db.commit()
+
+    return RosterUpdateResponse(
+        added=len(new_members),
+        already_enrolled=len(enrolled),
+        unknown_usernames=sorted(usernames - {user.username for user in users})
+    )
+
+def _get_own_assignment(db: Session, assignment_id: int, teacher: User) -> Assignment:
+    """Raise 404 unless the assignment exists and belongs to one of the teacher's classes"""
+    assignment = db.query(Assignment).join(Classroom, Classroom.id == Assignment.classroom_id).filter(
+        Assignment.id == assignment_id,
+        Classroom.teacher_id == teacher.id
+    ).first()
+    if assignment is None:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    return assignment
+
+async def _run_batch(classroom_id: int, fn, *args):
+    """Run bulk work in the scheduler's batch lane, behind every waiting student turn"""
+    try:
+        return await evaluation_scheduler.run(fn, *args, lane=BATCH, key=fairness_key(classroom_id=classroom_id))
+    except SchedulerOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def _launch(db: Session, assignment: Assignment) -> AssignmentLaunchResponse:
+    service = SAWAService(db)
+    try:
+        # Safe to repeat: each attempt re-reads who is still without a session, so losing
+        # a race with a resume only means fewer to create (a brand-new assignment cannot
+        # race one: nobody can resume it before this commit)
+        launched = await _run_batch(assignment.classroom_id, retry_on_conflict,
+                                    lambda: service.launch_assignment(assignment), db)
+    except ConversationConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return AssignmentLaunchResponse(assignment_id=assignment.id, topic=assignment.topic, launched=launched)
+
+@router.post("/classes/{classroom_id}/assignments", response_model=AssignmentLaunchResponse)
+async def create_assignment(
+    classroom_id: int,
+    request: AssignmentCreate,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Create an assignment and launch a session for everyone on the roster in one transaction"""
+    _get_own_classroom(db, classroom_id, current_user)
+    if not question_bank.has(request.topic):
+        # A new topic's questions are written once, here, so the launched sessions open with them
+        await _run_batch(classroom_id, question_bank.ensure, request.topic)
+    assignment = Assignment(classroom_id=classroom_id, topic=request.topic)
+    db.add(assignment)
+    db.flush()
+    return await _launch(db, assignment)
+
+@router.get("/classes/{classroom_id}/assignments", response_model=List[AssignmentResponse])
+async def list_assignments(
+    classroom_id: int,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """List a class's assignments, newest first"""
+    _get_own_classroom(db, classroom_id, current_user)
+    return db.query(Assignment).filter(
+        Assignment.classroom_id == classroom_id
+    ).order_by(Assignment.created_at.desc(), Assignment.id.desc()).all()
+
+@router.post("/assignments/{assignment_id}/launch", response_model=AssignmentLaunchResponse)
+async def launch_assignment(
+    assignment_id: int,
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Launch sessions for students enrolled since the assignment was created"""
+    return await _launch(db, _get_own_assignment(db, assignment_id, current_user))
+
+@router.get("/assignments/{assignment_id}/similarity", response_model=SimilarityReport)
+async def get_assignment_similarity(
+    assignment_id: int,
+    stage: Optional[str] = Query(None, pattern=f"^({'|'.join(STAGES)})$"),
+    min_similarity: Optional[float] = Query(None, ge=settings.SIMILARITY_THRESHOLD, le=1,
+                                            description=SIMILARITY_FLOOR),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Clusters of near-duplicate responses to one assignment"""
+    assignment = _get_own_assignment(db, assignment_id, current_user)
+    return similarity_report(db, assignment.classroom_id, assignment_id=assignment.id, stage=stage,
+                             min_similarity=min_similarity)
+
+@router.get("/classes/{classroom_id}/analytics", response_model=ClassAnalyticsResponse)
+async def get_class_analytics(
+    classroom_id: int,
+    since: Optional[date] = Query(None, description="First day (UTC) to include"),
+    until: Optional[date] = Query(None, description="Last day (UTC) to include"),
+    topic: Optional[str] = Query(None, description="Only this topic"),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Score distributions, pass rates and feedback loops per stage, read from the class aggregates"""
+    _get_own_classroom(db, classroom_id, current_user)
+    return class_summary(db, classroom_id, since=since, until=until, topic=topic)
+
+@router.get("/classes/{classroom_id}/similarity", response_model=SimilarityReport)
+async def get_class_similarity(
+    classroom_id: int,
+    topic: Optional[str] = Query(None, description="Only this topic"),
+    stage: Optional[str] = Query(None, pattern=f"^({'|'.join(STAGES)})$"),
+    min_similarity: Optional[float] = Query(None, ge=settings.SIMILARITY_THRESHOLD, le=1,
+                                            description=SIMILARITY_FLOOR),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Clusters of near-duplicate responses from different students, found as they were saved"""
+    _get_own_classroom(db, classroom_id, current_user)
+    return similarity_report(db, classroom_id, topic=topic, stage=stage, min_similarity=min_similarity)
+
+@router.get("/search", response_model=SearchResponse)
+async def search_student_responses(
+    q: str = Query(..., min_length=1, description="Words or \"quoted phrases\" to find"),
+    stage: Optional[str] = Query(None, pattern=f"^({'|'.join(STAGES)})$"),
+    classroom_id: Optional[int] = Query(None, description="Only this class"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_teacher),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over student responses in the teacher's classes, best matches first"""
+    if classroom_id is not None:
+        _get_own_classroom(db, classroom_id, current_user)
+    try:
+        return search_responses(db, current_user.id, q, stage=stage, classroom_id=classroom_id,
+                                page=page, page_size=page_size)
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
@@ -0,0 +1,105 @@
+"""
+Classroom, assignment, class analytics, search and similarity schemas for SAWA application
+"""
+
+from pydantic import BaseModel
+from typing import Optional, Dict, List
+from datetime import datetime
+
+class ClassroomCreate(BaseModel):
+    name: str
+
+class ClassroomResponse(BaseModel):
+    id: int
+    name: str
+    teacher_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class RosterUpdate(BaseModel):
+    usernames: List[str]
+
+class RosterUpdateResponse(BaseModel):
+    added: int
+    already_enrolled: int
+    unknown_usernames: List[str]
+
+class AssignmentCreate(BaseModel):
+    topic: str
+
+class AssignmentResponse(BaseModel):
+    id: int
+    classroom_id: int
+    topic: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AssignmentLaunchResponse(BaseModel):
+    assignment_id: int
+    topic: str
+    launched: int  # Sessions created by this call; students who already had one are skipped
+
+class StageAnalytics(BaseModel):
+    responses: int
+    score_distribution: Dict[str, int]  # "1".."4" -> responses at that level
+    pass_rate: float  # Share of responses at level 3+
+    avg_feedback_loops: float  # Feedback loops per passed stage
+
+class SessionCounts(BaseModel):
+    started: int
+    completed: int
+
+class ClassAnalyticsResponse(BaseModel):
+    classroom_id: int
+    sessions_started: int
+    sessions_completed: int
+    completion_rate: float
+    stages: Dict[str, StageAnalytics]
+    topics: Dict[str, SessionCounts]
+    days: Dict[str, SessionCounts]  # ISO date (UTC) -> sessions
+
+class SearchResult(BaseModel):
+    message_id: int
+    conversation_id: int
+    user_id: int
+    username: str
+    classroom_id: int
+    topic: str
+    stage: Optional[str] = None
+    iteration: Optional[int] = None
+    rubric_score: Optional[int] = None
+    created_at: datetime
+    rank: float  # Higher is a better match
+    snippet: str  # Matching excerpt, matches in [brackets]
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    page: int
+    page_size: int
+    results: List[SearchResult]
+
+class SimilarResponse(BaseModel):
+    message_id: int
+    conversation_id: int
+    user_id: int
+    username: str
+    excerpt: str
+
+class SimilarityCluster(BaseModel):
+    assignment_id: Optional[int] = None  # None for sessions started in class
+    topic: str
+    stage: str
+    size: int  # Responses in the cluster
+    students: int
+    max_similarity: float
+    members: List[SimilarResponse]
+
+class SimilarityReport(BaseModel):
+    classroom_id: int
+    min_similarity: float
+    clusters: List[SimilarityCluster]
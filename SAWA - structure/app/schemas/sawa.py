@@ -9,6 +9,7 @@ from app.models.sawa_conversation import SAWAStage
 
 class SAWAStartRequest(BaseModel):
     topic: str
+    classroom_id: Optional[int] = None  # Count the session towards this class's analytics
 
 class StudentResponse(BaseModel):
     conversation_id: int
@@ -35,6 +36,8 @@ class SAWAConversationResponse(BaseModel):
     id: int
     user_id: int
     topic: str
+    classroom_id: Optional[int] = None
+    assignment_id: Optional[int] = None
     current_stage: str
     stage_iteration: int
     claim_response: Optional[str] = None
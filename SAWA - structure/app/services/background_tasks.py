@@ -0,0 +1,201 @@
+"""
+Durable background task runner for SAWA application
+
+Side effects of a turn that the student does not need in the reply
+(analytics rows, events, notifications) are written to a local SQLite queue
+and run by worker threads after the response is sent. Tasks survive a
+restart, are retried with exponential backoff and are parked as "dead" after
+BACKGROUND_TASK_MAX_ATTEMPTS failures. Several worker processes may share the
+same queue file; a claimed task is leased, so one whose worker died is picked
+up again once the lease runs out.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DEAD = "dead"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,        -- Due time while pending, lease expiry while running
+    enqueued_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_tasks_status_run_at ON tasks (status, run_at);
+"""
+
+class BackgroundTaskRunner:
+    """SQLite-backed task queue processed by worker threads"""
+
+    def __init__(self, path: str, workers: int, max_attempts: int,
+                 lease_seconds: float = 60.0, poll_interval: float = 1.0):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._schema_ready = False
+        # Counters for this process
+        self.completed = 0
+        self.failed = 0
+        self.last_lag = 0.0
+
+    def task(self, name: str):
+        """Register a handler; it is called with the enqueued payload as keyword arguments
+
+        Delivery is at-least-once, so handlers should tolerate running twice.
+        """
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self._handlers[name] = fn
+            return fn
+        return decorator
+
+    def enqueue(self, name: str, payload: Optional[Dict[str, Any]] = None, delay: float = 0.0) -> int:
+        """Persist a task and wake a worker; returns the task id"""
+        now = time.time()
+        task_id = self._connection().execute(
+            "INSERT INTO tasks (name, payload, status, run_at, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+            (name, json.dumps(payload or {}), PENDING, now + delay, now)
+        ).lastrowid
+        self.start()
+        self._wakeup.set()
+        return task_id
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        # Threads start lazily so importing the module (and forking workers) stays cheap
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"sawa-tasks-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def run_pending(self) -> int:
+        """Run every due task in the calling thread; returns how many ran"""
+        count = 0
+        while self._run_one():
+            count += 1
+        return count
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                conn.executescript(SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _claim(self) -> Optional[Tuple]:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, name, payload, attempts, run_at FROM tasks "
+                "WHERE status IN (?, ?) AND run_at <= ? ORDER BY run_at, id LIMIT 1",
+                (PENDING, RUNNING, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE tasks SET status = ?, attempts = attempts + 1, run_at = ? WHERE id = ?",
+                    (RUNNING, now + self.lease_seconds, row[0])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is not None:
+            self.last_lag = now - row[4]
+        return row
+
+    def _run_one(self) -> bool:
+        row = self._claim()
+        if row is None:
+            return False
+        task_id, name, payload, attempts, _ = row
+        attempts += 1
+        conn = self._connection()
+        try:
+            handler = self._handlers.get(name)
+            if handler is None:
+                raise LookupError(f"No handler registered for task '{name}'")
+            handler(**json.loads(payload))
+        except Exception as e:
+            self.failed += 1
+            if attempts >= self.max_attempts:
+                logger.error("Background task %s (%s) failed %d times, giving up: %s", task_id, name, attempts, e)
+                conn.execute("UPDATE tasks SET status = ?, last_error = ? WHERE id = ?", (DEAD, repr(e), task_id))
+            else:
+                backoff = min(2 ** attempts, 300)
+                logger.warning("Background task %s (%s) failed, retrying in %ss: %s", task_id, name, backoff, e)
+                conn.execute(
+                    "UPDATE tasks SET status = ?, run_at = ?, last_error = ? WHERE id = ?",
+                    (PENDING, time.time() + backoff, repr(e), task_id)
+                )
+        else:
+            self.completed += 1
+            conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return True
+
+    def _work(self):
+        while True:
+            try:
+                if self._run_one():
+                    continue
+            except sqlite3.Error:
+                logger.exception("Background task queue error")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth and lag; lag is how long the oldest due task has been waiting"""
+        now = time.time()
+        conn = self._connection()
+        pending, oldest_due = conn.execute(
+            "SELECT COUNT(*), MIN(CASE WHEN run_at <= ? THEN run_at END) FROM tasks WHERE status = ?",
+            (now, PENDING)
+        ).fetchone()
+        dead = conn.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (DEAD,)).fetchone()[0]
+        return {
+            "pending": pending,
+            "dead": dead,
+            "lag_seconds": now - oldest_due if oldest_due is not None else 0.0,
+            "last_lag_seconds": self.last_lag,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+background_tasks = BackgroundTaskRunner(
+    path=settings.BACKGROUND_TASKS_PATH,
+    workers=settings.BACKGROUND_TASK_WORKERS,
+    max_attempts=settings.BACKGROUND_TASK_MAX_ATTEMPTS
+)
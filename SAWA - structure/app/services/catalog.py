@@ -0,0 +1,238 @@
+"""
+Versioned rubric and prompt catalog for SAWA application
+
+One content pack (CONTENT_PACK picks it) is the single source of the rubric
+levels and of every question and nudge the service asks: its rubric rows
+(levels, example responses, Socratic prompts and feedback templates per
+facet) plus the ordered question sequence and the per-level nudge of each
+stage, stored with the pack. Each worker loads them once into an immutable Catalog: tuples
+and read-only dicts, parsed once, with the /rubric payloads serialized and
+precompressed up front. Every lookup is a dict access.
+
+Publishing content adds a row to catalog_versions in the same transaction
+as the rubric changes. Workers poll the latest version every
+CATALOG_REFRESH_SECONDS, build the new Catalog off to the side and swap the
+reference; a request holding the old one finishes with it unchanged.
+"""
+
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.compression import PrecompressedPayload
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["claim", "evidence", "reasoning", "backing", "qualifier", "rebuttal"]
+PASS_SCORE = 3
+LIST_FIELDS = ("example_responses", "socratic_prompts", "feedback_templates")
+FALLBACK_QUESTION = "Please elaborate on your response."
+FALLBACK_FEEDBACK = "Please provide more detail."
+BUILTIN_CONTENT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "content", "default.json")
+
+def _lines(value) -> Tuple[str, ...]:
+    """A stored newline-joined field (or a list, from content files) as a tuple"""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = value.split("\n")
+    return tuple(line for line in (line.strip() for line in value) if line)
+
+def _field(entry, name: str):
+    return entry[name] if isinstance(entry, Mapping) else getattr(entry, name)
+
+def builtin_pack() -> Dict[str, Any]:
+    """The pack shipped with the application (app/content/default.json)"""
+    with open(BUILTIN_CONTENT, encoding="utf-8") as f:
+        return json.load(f)
+
+def builtin_entries() -> List[Dict[str, Any]]:
+    """The rubric of the built-in pack"""
+    return builtin_pack()["rubric"]
+
+def builtin_catalog() -> "Catalog":
+    """The built-in pack as an unversioned catalog, for the in-memory demo"""
+    pack = builtin_pack()
+    return Catalog(0, pack["rubric"], pack.get("questions"), pack.get("feedback"))
+
+class Catalog:
+    """One immutable version of the rubric, questions and nudges"""
+
+    __slots__ = ("version", "levels", "_questions", "_feedback", "_rubric_payloads", "_summary_payloads")
+
+    def __init__(self, version: int, entries: Iterable, questions: Optional[Mapping[str, Iterable[str]]] = None,
+                 feedback: Optional[Mapping[str, Mapping[str, str]]] = None):
+        levels: Dict[str, List[Mapping[str, Any]]] = {}
+        for entry in entries:
+            level = {
+                "level": _field(entry, "level"),
+                "level_name": _field(entry, "level_name"),
+                "description": _field(entry, "description"),
+                **{name: _lines(_field(entry, name)) for name in LIST_FIELDS}
+            }
+            levels.setdefault(_field(entry, "facet"), []).append(MappingProxyType(level))
+
+        self.version = version
+        self.levels: Mapping[str, Tuple[Mapping[str, Any], ...]] = MappingProxyType({
+            facet: tuple(sorted(facet_levels, key=lambda level: level["level"]))
+            for facet, facet_levels in levels.items()
+        })
+        # The pack's question sequence per stage, asked in order while a student loops in it
+        self._questions = MappingProxyType({
+            stage: tuple(stage_questions) for stage, stage_questions in (questions or {}).items() if stage_questions
+        })
+        # Nudges for the levels below PASS_SCORE, keyed by (stage, level)
+        self._feedback = MappingProxyType({
+            (stage, int(level)): nudge
+            for stage, nudges in (feedback or {}).items() for level, nudge in nudges.items()
+        })
+        self._rubric_payloads = MappingProxyType({
+            facet: PrecompressedPayload.from_obj(
+                {"facet": facet, "levels": [{**level} for level in facet_levels]},
+                minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+            )
+            for facet, facet_levels in self.levels.items()
+        })
+        # The in-memory demo's compact shape: level, name and description only
+        self._summary_payloads = MappingProxyType({
+            facet: PrecompressedPayload.from_obj(
+                {"levels": [{"level": level["level"], "name": level["level_name"], "description": level["description"]}
+                            for level in facet_levels]},
+                minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+            )
+            for facet, facet_levels in self.levels.items()
+        })
+
+    def questions(self, stage: str) -> Tuple[str, ...]:
+        return self._questions.get(stage, (FALLBACK_QUESTION,))
+
+    def question(self, stage: str, iteration: int) -> str:
+        """The question asked at this loop iteration of a stage"""
+        questions = self.questions(stage)
+        return questions[min(iteration, len(questions) - 1)]
+
+    def feedback(self, stage: str, score: int) -> str:
+        """The nudge for a response at this rubric level"""
+        return self._feedback.get((stage, score), FALLBACK_FEEDBACK)
+
+    def rubric_payload(self, facet: str) -> Optional[PrecompressedPayload]:
+        """The /rubric/{facet} response body, or None for an unknown facet"""
+        return self._rubric_payloads.get(facet)
+
+    def summary_payload(self, facet: str) -> Optional[PrecompressedPayload]:
+        """The demo's /rubric/{facet} response body, or None for an unknown facet"""
+        return self._summary_payloads.get(facet)
+
+    def missing_stages(self) -> List[str]:
+        """Stages without rubric levels or questions"""
+        return [stage for stage in STAGES if stage not in self.levels or stage not in self._questions]
+
+# The models (and so the database driver) are imported on use: the in-memory
+# demo builds its Catalog from the built-in content and never touches them
+
+def feedback_reply(feedback: str, question: str) -> str:
+    """The nudge followed by the next question, said once when a pack words them the same"""
+    return question if feedback == question else f"{feedback}\n\n{question}"
+
+def latest_version(db: Session) -> int:
+    from app.models.sawa_rubric import CatalogVersion
+    return db.query(func.max(CatalogVersion.id)).scalar() or 0
+
+def publish(db: Session, note: str = "") -> int:
+    """Record new content as a version; commit it with the content changes"""
+    from app.models.sawa_rubric import CatalogVersion
+    version = CatalogVersion(note=note)
+    db.add(version)
+    db.flush()
+    return version.id
+
+class CatalogStore:
+    """The current Catalog of this worker, replaced whole when a new version is published"""
+
+    def __init__(self, pack: str = "default", refresh_seconds: float = 30.0):
+        self.pack = pack
+        self.refresh_seconds = refresh_seconds
+        self._catalog: Optional[Catalog] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def loaded(self) -> bool:
+        return self._catalog is not None
+
+    @property
+    def current(self) -> Catalog:
+        """The loaded catalog; loads it on first use in processes that skip warm-up (scripts)"""
+        catalog = self._catalog
+        if catalog is None:
+            catalog = self.load()
+        return catalog
+
+    def use(self, catalog: Catalog):
+        """Swap in a catalog (a single reference assignment, so readers never see a mix)"""
+        self._catalog = catalog
+
+    def load(self) -> Catalog:
+        """Read the latest published content from the database and swap it in"""
+        from app.database import SessionLocal
+        from app.models.sawa_rubric import SAWARubric, ContentPack
+        with self._lock:
+            db = SessionLocal()
+            try:
+                # Version first: content published in between shows up as a newer version on the next refresh
+                version = latest_version(db)
+                pack = db.query(ContentPack.questions, ContentPack.feedback).filter(
+                    ContentPack.name == self.pack
+                ).first()
+                catalog = Catalog(
+                    version,
+                    db.query(SAWARubric).filter(
+                        SAWARubric.pack == self.pack
+                    ).order_by(SAWARubric.facet, SAWARubric.level).all(),
+                    json.loads(pack.questions) if pack and pack.questions else None,
+                    json.loads(pack.feedback) if pack and pack.feedback else None
+                )
+            finally:
+                db.close()
+            self.use(catalog)
+        logger.info("Catalog version %s loaded (content pack %s)", version, self.pack)
+        return catalog
+
+    def refresh(self) -> bool:
+        """Load a newer published version if there is one; returns whether it changed"""
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            version = latest_version(db)
+        finally:
+            db.close()
+        if self._catalog is not None and version == self._catalog.version:
+            return False
+        self.load()
+        return True
+
+    def _poll(self):
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:  # Keep serving the current version; try again next interval
+                logger.warning("Catalog refresh failed: %s", e)
+
+    def start_refresh(self):
+        """Poll for published versions on a background thread (idempotent)"""
+        if self._thread is None and self.refresh_seconds > 0:
+            self._thread = threading.Thread(target=self._poll, name="sawa-catalog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+catalog_store = CatalogStore(pack=settings.CONTENT_PACK, refresh_seconds=settings.CATALOG_REFRESH_SECONDS)
@@ -0,0 +1,127 @@
+"""
+Incremental class analytics for SAWA application
+
+SAWAService calls record_turn() and record_session() while it writes a turn,
+inside the same transaction, so the aggregates commit (or roll back on a
+version conflict) together with the turn. Each call is a single
+INSERT ... ON CONFLICT DO UPDATE that adds to the counters, which stays
+correct under concurrent turns without locking. class_summary() answers the
+teacher dashboard from the aggregate rows alone: its cost depends on the
+number of topics, stages and days in the range, never on message volume.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.classroom import Classroom, ClassroomMember  # noqa: F401 (register tables)
+from app.models.class_analytics import ClassStageDaily, ClassTopicDaily
+
+STAGES = ["claim", "evidence", "reasoning", "backing", "qualifier", "rebuttal"]
+SCORE_COLUMNS = ["score_1", "score_2", "score_3", "score_4"]
+PASS_SCORE = 3
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def normalize_topic(topic: str) -> str:
+    """Case- and whitespace-insensitive topic key"""
+    return " ".join(topic.lower().split())
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def _increment(db: Session, model, keys: Dict[str, Any], deltas: Dict[str, int]):
+    """Add `deltas` to the row identified by `keys`, creating it if needed"""
+    insert = UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(model).values(**keys, **deltas)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: getattr(model, column) + statement.excluded[column] for column in deltas}
+        )
+        db.execute(statement)
+        return
+
+    # Other dialects: update, then insert when there was nothing to update
+    updated = db.query(model).filter_by(**keys).update(
+        {getattr(model, column): getattr(model, column) + delta for column, delta in deltas.items()},
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(model(**keys, **deltas))
+        db.flush()
+
+def record_turn(db: Session, classroom_id: int, topic: str, stage: str, score: int):
+    """Count one evaluated response"""
+    deltas = {
+        "responses": 1,
+        f"score_{score}": 1,
+        "passed": int(score >= PASS_SCORE),
+        "feedback_loops": int(score < PASS_SCORE),
+    }
+    keys = {"classroom_id": classroom_id, "topic": normalize_topic(topic), "stage": stage, "day": _today()}
+    _increment(db, ClassStageDaily, keys, deltas)
+
+def record_session(db: Session, classroom_id: int, topic: str, started: int = 0, completed: int = 0):
+    """Count sessions started or completed"""
+    keys = {"classroom_id": classroom_id, "topic": normalize_topic(topic), "day": _today()}
+    _increment(db, ClassTopicDaily, keys, {"sessions_started": started, "sessions_completed": completed})
+
+def _stage_summary(row) -> Dict[str, Any]:
+    responses = row.responses or 0
+    passed = row.passed or 0
+    return {
+        "responses": responses,
+        "score_distribution": {str(level): getattr(row, f"score_{level}") or 0 for level in range(1, 5)},
+        "pass_rate": round(passed / responses, 4) if responses else 0.0,
+        # Feedback loops a student needed on average before passing the stage
+        "avg_feedback_loops": round((row.feedback_loops or 0) / passed, 2) if passed else 0.0,
+    }
+
+def class_summary(db: Session, classroom_id: int, since: Optional[date] = None,
+                  until: Optional[date] = None, topic: Optional[str] = None) -> Dict[str, Any]:
+    """Stage, topic and daily analytics for one class, read from the aggregates only"""
+    def scoped(query, model):
+        query = query.filter(model.classroom_id == classroom_id)
+        if since is not None:
+            query = query.filter(model.day >= since)
+        if until is not None:
+            query = query.filter(model.day <= until)
+        if topic is not None:
+            query = query.filter(model.topic == normalize_topic(topic))
+        return query
+
+    counters = [func.sum(getattr(ClassStageDaily, column)).label(column)
+                for column in ["responses", *SCORE_COLUMNS, "passed", "feedback_loops"]]
+    stage_rows = scoped(db.query(ClassStageDaily.stage, *counters), ClassStageDaily) \
+        .group_by(ClassStageDaily.stage).all()
+    session_rows = scoped(db.query(
+        ClassTopicDaily.topic,
+        ClassTopicDaily.day,
+        ClassTopicDaily.sessions_started,
+        ClassTopicDaily.sessions_completed
+    ), ClassTopicDaily).order_by(ClassTopicDaily.day).all()
+
+    by_stage = {row.stage: row for row in stage_rows}
+    topics: Dict[str, Dict[str, int]] = {}
+    days: Dict[str, Dict[str, int]] = {}
+    for row in session_rows:
+        for bucket in (topics.setdefault(row.topic, {"started": 0, "completed": 0}),
+                       days.setdefault(row.day.isoformat(), {"started": 0, "completed": 0})):
+            bucket["started"] += row.sessions_started
+            bucket["completed"] += row.sessions_completed
+
+    started = sum(bucket["started"] for bucket in topics.values())
+    completed = sum(bucket["completed"] for bucket in topics.values())
+    return {
+        "classroom_id": classroom_id,
+        "sessions_started": started,
+        "sessions_completed": completed,
+        "completion_rate": round(completed / started, 4) if started else 0.0,
+        "stages": {stage: _stage_summary(by_stage[stage]) for stage in STAGES if stage in by_stage},
+        "topics": topics,
+        "days": days,
+    }
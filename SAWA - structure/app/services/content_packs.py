@@ -0,0 +1,212 @@
+"""
+Content pack loader for SAWA application
+
+A content pack is one JSON file holding a complete rubric (every facet and
+level, with example responses, Socratic prompts and feedback templates),
+the question sequence asked in each stage and the nudge for each level below
+proficient, for a course or language:
+
+    {"pack": "biology-101", "language": "en", "title": "...",
+     "questions": {"claim": [...], ...}, "feedback": {"claim": {"1": "...", "2": "..."}, ...},
+     "rubric": [...]}
+
+Packs live side by side in sawa_rubric, keyed by (pack, facet, level); each
+deployment serves the one named by CONTENT_PACK. Loading reads the stored
+rows of every given pack in one query, diffs them against the files and
+writes only the difference: changed and new rows as one batched
+INSERT ... ON CONFLICT DO UPDATE, rows the pack no longer has as one DELETE.
+Everything, including the new catalog version, commits in one transaction,
+so the served rubric is never partly loaded or empty. Loading the same
+files again writes nothing and publishes no version.
+"""
+
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.sawa_rubric import SAWARubric, ContentPack
+from app.services.catalog import STAGES, LIST_FIELDS, PASS_SCORE, publish
+
+LEVELS = range(1, 5)
+TEXT_FIELDS = ("level_name", "description")
+CONTENT_FIELDS = TEXT_FIELDS + LIST_FIELDS
+PACK_FIELDS = ("language", "title", "questions", "feedback")
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+class ContentPackError(ValueError):
+    """A pack file that cannot be loaded as it is"""
+
+def _stored(value) -> Optional[str]:
+    """A list field as the newline-joined text sawa_rubric stores"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split("\n")
+    lines = [line.strip() for line in value if line and line.strip()]
+    return "\n".join(lines) or None
+
+def validate_pack(pack: Dict[str, Any], source: str = "pack") -> Dict[str, Any]:
+    """Check a parsed pack and return it with its rubric rows in stored form"""
+    name = pack.get("pack")
+    if not isinstance(name, str) or not name.strip():
+        raise ContentPackError(f"{source}: \"pack\" must name the pack")
+    rows: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for index, entry in enumerate(pack.get("rubric") or []):
+        where = f"{source}: rubric[{index}]"
+        facet, level = entry.get("facet"), entry.get("level")
+        if facet not in STAGES:
+            raise ContentPackError(f"{where}: unknown facet {facet!r}")
+        if level not in LEVELS:
+            raise ContentPackError(f"{where}: level must be 1-4, not {level!r}")
+        if (facet, level) in rows:
+            raise ContentPackError(f"{where}: {facet} level {level} appears twice")
+        for field in TEXT_FIELDS:
+            if not isinstance(entry.get(field), str) or not entry[field].strip():
+                raise ContentPackError(f"{where}: {field} is required")
+        rows[(facet, level)] = {
+            "pack": name,
+            "facet": facet,
+            "level": level,
+            **{field: entry[field].strip() for field in TEXT_FIELDS},
+            **{field: _stored(entry.get(field)) for field in LIST_FIELDS},
+        }
+    missing = [stage for stage in STAGES if not any(facet == stage for facet, _ in rows)]
+    if missing:
+        raise ContentPackError(f"{source}: no rubric for {', '.join(missing)}")
+
+    questions = pack.get("questions") or {}
+    feedback = pack.get("feedback") or {}
+    for stage in STAGES:
+        stage_questions = questions.get(stage)
+        if not stage_questions or not all(isinstance(q, str) and q.strip() for q in stage_questions):
+            raise ContentPackError(f"{source}: questions.{stage} must list at least one question")
+        nudges = feedback.get(stage) or {}
+        for level in range(1, PASS_SCORE):
+            if not isinstance(nudges.get(str(level)), str) or not nudges[str(level)].strip():
+                raise ContentPackError(f"{source}: feedback.{stage}.{level} is required")
+    return {
+        "pack": name,
+        "language": pack.get("language") or "en",
+        "title": pack.get("title"),
+        # Stored as JSON on the pack row; the key order is fixed so unchanged packs compare equal
+        "questions": json.dumps({stage: [q.strip() for q in questions[stage]] for stage in STAGES},
+                                ensure_ascii=False),
+        "feedback": json.dumps({stage: {str(level): feedback[stage][str(level)].strip()
+                                        for level in range(1, PASS_SCORE)} for stage in STAGES},
+                               ensure_ascii=False),
+        "rows": rows,
+    }
+
+def read_pack(path: str) -> Dict[str, Any]:
+    """Parse and validate a pack file"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            pack = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ContentPackError(f"{path}: {e}")
+    return validate_pack(pack, source=path)
+
+def _upsert(db: Session, model, rows: List[Dict[str, Any]], keys: List[str], columns: Iterable[str]):
+    """Insert rows, updating `columns` of the ones whose `keys` already exist, in one executemany"""
+    upsert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    statement = upsert(model)
+    set_ = {column: statement.excluded[column] for column in columns}
+    if "updated_at" in model.__table__.c:
+        set_["updated_at"] = func.now()
+    db.execute(statement.on_conflict_do_update(index_elements=keys, set_=set_), rows)
+
+def load_packs(db: Session, packs: List[Dict[str, Any]], dry_run: bool = False) -> Dict[str, Any]:
+    """Bring the stored rubric of every pack in line with its file; returns what changed per pack"""
+    started = time.perf_counter()
+    names = [pack["pack"] for pack in packs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ContentPackError(f"Pack loaded twice: {', '.join(duplicates)}")
+
+    stored = {
+        (row.pack, row.facet, row.level): row
+        for row in db.query(SAWARubric.id, SAWARubric.pack, SAWARubric.facet, SAWARubric.level,
+                            *[getattr(SAWARubric, field) for field in CONTENT_FIELDS])
+        .filter(SAWARubric.pack.in_(names))
+    }
+    stored_packs = {
+        row.name: row for row in db.query(ContentPack.id, ContentPack.name,
+                                          *[getattr(ContentPack, field) for field in PACK_FIELDS])
+        .filter(ContentPack.name.in_(names))
+    }
+
+    changed: List[Dict[str, Any]] = []
+    removed: List[int] = []
+    pack_rows: List[Dict[str, Any]] = []
+    summary: Dict[str, Dict[str, int]] = {}
+    for pack in packs:
+        name = pack["pack"]
+        counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        for (facet, level), row in pack["rows"].items():
+            current = stored.get((name, facet, level))
+            if current is None:
+                counts["inserted"] += 1
+                changed.append(row)
+            elif any(getattr(current, field) != row[field] for field in CONTENT_FIELDS):
+                counts["updated"] += 1
+                changed.append({**row, "id": current.id})
+            else:
+                counts["unchanged"] += 1
+        for (stored_pack, facet, level), current in stored.items():
+            if stored_pack == name and (facet, level) not in pack["rows"]:
+                counts["deleted"] += 1
+                removed.append(current.id)
+        existing = stored_packs.get(name)
+        if existing is None or any(getattr(existing, field) != pack[field] for field in PACK_FIELDS):
+            pack_rows.append({"name": name, **{field: pack[field] for field in PACK_FIELDS}})
+            # New questions or nudges change what is served just like rubric rows do
+            if existing is not None and (existing.questions, existing.feedback) != (pack["questions"], pack["feedback"]):
+                counts["updated"] += 1
+        summary[name] = counts
+
+    version = None
+    if dry_run or not (changed or removed or pack_rows):
+        db.rollback()
+    else:
+        if db.get_bind().dialect.name in UPSERT_DIALECTS:
+            # The diff tells what to write; the upsert keeps a concurrent loader from failing it
+            rows = [{key: value for key, value in row.items() if key != "id"} for row in changed]
+            if rows:
+                _upsert(db, SAWARubric, rows, ["pack", "facet", "level"], CONTENT_FIELDS)
+            if pack_rows:
+                _upsert(db, ContentPack, pack_rows, ["name"], PACK_FIELDS)
+        else:
+            # Other dialects: bulk insert the new rows and bulk update the changed ones by primary key
+            new_rows = [row for row in changed if "id" not in row]
+            if new_rows:
+                db.execute(insert(SAWARubric), new_rows)
+            updated_rows = [{"id": row["id"], **{field: row[field] for field in CONTENT_FIELDS}}
+                            for row in changed if "id" in row]
+            if updated_rows:
+                db.execute(update(SAWARubric), updated_rows)
+            new_packs = [row for row in pack_rows if row["name"] not in stored_packs]
+            if new_packs:
+                db.execute(insert(ContentPack), new_packs)
+            moved_packs = [{"id": stored_packs[row["name"]].id, **{field: row[field] for field in PACK_FIELDS}}
+                           for row in pack_rows if row["name"] in stored_packs]
+            if moved_packs:
+                db.execute(update(ContentPack), moved_packs)
+        if removed:
+            db.execute(delete(SAWARubric).where(SAWARubric.id.in_(removed)))
+        published = [name for name, counts in summary.items()
+                     if counts["inserted"] or counts["updated"] or counts["deleted"]]
+        if published:
+            version = publish(db, "content packs: " + ", ".join(published))
+        db.commit()
+
+    return {
+        "packs": summary,
+        "version": version,
+        "dry_run": dry_run,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
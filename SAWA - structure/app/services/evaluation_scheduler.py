@@ -0,0 +1,174 @@
+"""
+Prioritized evaluation work queue with backpressure
+
+Interactive student turns are always served before batch work (teacher
+regrades, exports). Within a lane, jobs are taken round-robin across
+fairness keys (a class, or a user when there is no class) so one busy
+class cannot starve the others. Lanes are bounded: when one is full,
+submit() fails fast with SchedulerOverloaded instead of queueing forever.
+
+Priority only decides which job a free worker takes next, so a lane can also
+cap how many of its jobs run at once. The batch lane is capped below the pool
+size: long regrades and exports never hold every worker, and a turn that
+arrives behind them always finds one free.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+from app.core.config import settings
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)  # In priority order
+
+def fairness_key(user_id: Optional[int] = None, classroom_id: Optional[int] = None) -> Hashable:
+    """Share a lane per class; a user without a class is their own share"""
+    return ("class", classroom_id) if classroom_id is not None else ("user", user_id)
+
+class SchedulerOverloaded(Exception):
+    """Raised when a lane's queue is full; callers should answer 503"""
+
+    def __init__(self, lane: str, retry_after: int = 1):
+        super().__init__(f"Evaluation queue '{lane}' is full")
+        self.lane = lane
+        self.retry_after = retry_after
+
+class _Lane:
+    """Per-key FIFO queues served round-robin"""
+
+    def __init__(self, max_depth: int, max_running: Optional[int] = None):
+        self.max_depth = max_depth
+        self.max_running = max_running  # None: as many as there are workers
+        self.depth = 0
+        self.running = 0
+        self.queues: "OrderedDict[Hashable, Deque]" = OrderedDict()
+        # Wait-time statistics (seconds)
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def push(self, key: Hashable, job):
+        self.queues.setdefault(key, deque()).append(job)
+        self.depth += 1
+
+    def ready(self) -> bool:
+        """A job is queued and the lane may start another"""
+        return self.depth > 0 and (self.max_running is None or self.running < self.max_running)
+
+    def pop(self):
+        # Take from the first key, then move that key to the back
+        key, queue = next(iter(self.queues.items()))
+        job = queue.popleft()
+        if queue:
+            self.queues.move_to_end(key)
+        else:
+            del self.queues[key]
+        self.depth -= 1
+        self.running += 1
+        return job
+
+class EvaluationScheduler:
+    """Thread pool that runs evaluation jobs by lane priority and fair share"""
+
+    def __init__(self, workers: int, max_depth: Dict[str, int], max_running: Optional[Dict[str, int]] = None):
+        self.workers = workers
+        max_running = max_running or {}
+        self._lanes = {lane: _Lane(max_depth[lane], max_running.get(lane)) for lane in LANES}
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_started(self):
+        # Threads start lazily so importing the module (and forking workers) stays cheap
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"sawa-eval-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn: Callable, *args, lane: str = INTERACTIVE, key: Hashable = None, **kwargs) -> Future:
+        """Queue `fn(*args, **kwargs)`; raises SchedulerOverloaded when the lane is full"""
+        future: Future = Future()
+        with self._condition:
+            self._ensure_started()
+            queue = self._lanes[lane]
+            if queue.depth >= queue.max_depth:
+                queue.rejected += 1
+                raise SchedulerOverloaded(lane)
+            # The job runs in the submitter's context so tracing spans nest under its request
+            job = (future, contextvars.copy_context(), fn, args, kwargs, time.monotonic(), lane)
+            queue.push(key, job)
+            self._condition.notify()
+        return future
+
+    async def run(self, fn: Callable, *args, lane: str = INTERACTIVE, key: Hashable = None, **kwargs) -> Any:
+        """Submit and await the result from async code"""
+        return await asyncio.wrap_future(self.submit(fn, *args, lane=lane, key=key, **kwargs))
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                for lane_name in LANES:
+                    lane = self._lanes[lane_name]
+                    if lane.ready():
+                        job = lane.pop()
+                        waited = time.monotonic() - job[5]
+                        lane.completed += 1
+                        lane.wait_total += waited
+                        lane.wait_max = max(lane.wait_max, waited)
+                        return job
+                self._condition.wait()
+
+    def _work(self):
+        while True:
+            future, context, fn, args, kwargs, _, lane = self._next_job()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(context.run(fn, *args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._lanes[lane].running -= 1
+                    # A capped lane may have jobs waiting for this slot
+                    self._condition.notify()
+
+    def running_workers(self) -> int:
+        """Worker threads currently alive (0 before the first submit)"""
+        return sum(thread.is_alive() for thread in self._threads)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue depth and wait-time metrics per lane"""
+        with self._condition:
+            return {
+                name: {
+                    "depth": lane.depth,
+                    "max_depth": lane.max_depth,
+                    "running": lane.running,
+                    "completed": lane.completed,
+                    "rejected": lane.rejected,
+                    "wait_seconds_avg": lane.wait_total / lane.completed if lane.completed else 0.0,
+                    "wait_seconds_max": lane.wait_max,
+                }
+                for name, lane in self._lanes.items()
+            }
+
+evaluation_scheduler = EvaluationScheduler(
+    workers=settings.EVALUATION_WORKERS,
+    max_depth={
+        INTERACTIVE: settings.EVALUATION_QUEUE_DEPTH_INTERACTIVE,
+        BATCH: settings.EVALUATION_QUEUE_DEPTH_BATCH,
+    },
+    max_running={
+        # A single worker cannot be split; it serves both lanes by priority
+        BATCH: settings.EVALUATION_BATCH_WORKERS or max(settings.EVALUATION_WORKERS - 1, 1),
+    }
+)
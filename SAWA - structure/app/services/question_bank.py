@@ -0,0 +1,243 @@
+"""
+Topic-specific Socratic question banks for SAWA application
+
+Each normalized topic can have its own bank of questions, stored in the
+database and held in memory by every worker. Live turns read only the
+in-memory dict: a topic without a bank yet gets the catalog's questions while
+this worker loads the stored bank in the batch lane, or, when there is none,
+schedules its generation as a background task, so no turn ever waits for it.
+The task may run in another worker (they share one queue); this one loads the
+stored bank on a turn after QUESTION_BANK_RETRY_SECONDS. Generation uses the OpenAI API when OPENAI_API_KEY is set (and the
+openai package is installed), and topic templates otherwise or when the
+model's answer is unusable. Worker warm-up loads every stored bank.
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.question_bank import TopicQuestionBank
+from app.services.background_tasks import background_tasks
+from app.services.catalog import catalog_store
+from app.services.evaluation_scheduler import evaluation_scheduler, BATCH
+from app.services.class_analytics import normalize_topic, STAGES
+
+logger = logging.getLogger(__name__)
+
+# Background task names
+GENERATE_QUESTION_BANK = "generate_question_bank"
+
+TEMPLATE = "template"
+QUESTIONS_PER_STAGE = 3  # Asked in order as the student loops in a stage
+MAX_QUESTION_CHARS = 300
+
+TOPIC_TEMPLATES: Dict[str, Tuple[str, ...]] = {
+    "claim": (
+        "What one-sentence position do you want to defend on {topic}?",
+        "Could you add a condition that makes your position on {topic} more precise?",
+        "Make it contestable—something a critic of your view on {topic} might disagree with."
+    ),
+    "evidence": (
+        "What specific information about {topic} will you use to support your claim?",
+        "Where does this evidence on {topic} come from, and why should your audience trust it?",
+        "Name at least one credible source on {topic}—a study, agency or dataset—and why you trust it."
+    ),
+    "reasoning": (
+        "How does this evidence about {topic} support your claim?",
+        "What general rule or mechanism in {topic} makes the evidence count?",
+        "Don't just repeat evidence—what rule about {topic} makes it count for your claim?"
+    ),
+    "backing": (
+        "What broader scientific principle behind {topic} supports your reasoning?",
+        "Which established theory or model relevant to {topic} justifies this link?",
+        "Name a theory, model, or scientific consensus on {topic} that makes your reasoning trustworthy."
+    ),
+    "qualifier": (
+        "Is your claim about {topic} always true, or only under certain conditions?",
+        "How confident are you in your claim, based on current evidence on {topic}?",
+        "Science rarely deals in absolutes—restate your claim about {topic} with 'likely,' 'generally,' or specific conditions."
+    ),
+    "rebuttal": (
+        "What is the strongest counterargument to your claim about {topic}?",
+        "What would a knowledgeable opponent in the debate on {topic} say?",
+        "Strengthen this by naming the strongest real counter a critic of your view on {topic} might raise."
+    )
+}
+
+MODEL_PROMPT = """You write Socratic questions for students building a scientific argument about: {topic}
+
+The argument has six stages: claim, evidence, reasoning, backing, qualifier, rebuttal.
+For each stage write {count} questions, asked in order while the student's answer is still weak:
+the first opens the stage, the later ones push harder on what is usually missing.
+Never state a position, evidence or counterargument yourself; only ask.
+Keep each question to one sentence a high-school student understands.
+
+Generic questions, to match in tone and purpose:
+{examples}
+
+Answer with a JSON object mapping each stage name to a list of {count} strings."""
+
+def template_questions(topic: str) -> Dict[str, Tuple[str, ...]]:
+    """Topic-specific questions from the templates"""
+    topic = " ".join(topic.split())
+    return {stage: tuple(question.format(topic=topic) for question in questions)
+            for stage, questions in TOPIC_TEMPLATES.items()}
+
+def _validated(questions) -> Optional[Dict[str, Tuple[str, ...]]]:
+    """The questions if they have the expected shape, else None"""
+    if not isinstance(questions, dict):
+        return None
+    bank = {}
+    for stage in STAGES:
+        stage_questions = questions.get(stage)
+        if not isinstance(stage_questions, list) or len(stage_questions) < QUESTIONS_PER_STAGE:
+            return None
+        stage_questions = [question.strip() for question in stage_questions[:QUESTIONS_PER_STAGE]
+                           if isinstance(question, str)]
+        if len(stage_questions) < QUESTIONS_PER_STAGE or not all(0 < len(q) <= MAX_QUESTION_CHARS for q in stage_questions):
+            return None
+        bank[stage] = tuple(stage_questions)
+    return bank
+
+def model_questions(topic: str) -> Optional[Dict[str, Tuple[str, ...]]]:
+    """Questions written by the model, or None when it is not configured or fails"""
+    if not settings.OPENAI_API_KEY:
+        return None
+    try:
+        from openai import OpenAI
+    except ImportError:  # Optional: the templates cover every topic
+        logger.warning("OPENAI_API_KEY is set but the openai package is not installed; using templates")
+        return None
+
+    catalog = catalog_store.current
+    prompt = MODEL_PROMPT.format(
+        topic=topic, count=QUESTIONS_PER_STAGE,
+        examples=json.dumps({stage: list(catalog.questions(stage)) for stage in STAGES}, indent=2)
+    )
+    try:
+        client = OpenAI(api_key=settings.OPENAI_API_KEY, timeout=settings.QUESTION_BANK_TIMEOUT_SECONDS)
+        completion = client.chat.completions.create(
+            model=settings.QUESTION_BANK_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"}
+        )
+        questions = _validated(json.loads(completion.choices[0].message.content))
+    except Exception as e:
+        logger.warning("Question generation for %r failed: %s", topic, e)
+        return None
+    if questions is None:
+        logger.warning("Question generation for %r returned an unusable answer", topic)
+    return questions
+
+class QuestionBank:
+    """In-memory question banks by normalized topic, filled off the request path"""
+
+    def __init__(self, retry_seconds: float = 60.0):
+        self.retry_seconds = retry_seconds
+        self._banks: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self._requested: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def question(self, stage: str, iteration: int, topic: Optional[str] = None) -> str:
+        """The question for a stage and loop iteration; never touches the database"""
+        if topic:
+            bank = self._banks.get(normalize_topic(topic))
+            if bank is None:
+                self.request(topic)
+            elif stage in bank:
+                return bank[stage][min(iteration, len(bank[stage]) - 1)]
+        return catalog_store.current.question(stage, iteration)
+
+    def has(self, topic: str) -> bool:
+        return normalize_topic(topic) in self._banks
+
+    def request(self, topic: str):
+        """Schedule loading or generating a topic's bank, at most once per retry interval"""
+        key = normalize_topic(topic)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._banks or now - self._requested.get(key, -self.retry_seconds) < self.retry_seconds:
+                return
+            self._requested[key] = now
+        try:
+            # Load in this worker: the background task below may run in any of them. Submitted
+            # from an empty context, so its query is not counted or traced as the turn's
+            contextvars.Context().run(evaluation_scheduler.submit, self._load_or_schedule, topic,
+                                      lane=BATCH, key=("topic", key))
+        except Exception as e:  # The generic questions still work; the next request after the interval retries
+            logger.warning("Could not schedule loading the question bank for %r: %s", topic, e)
+
+    def _load_or_schedule(self, topic: str):
+        """Load the topic's stored bank into this worker, or schedule its generation"""
+        key = normalize_topic(topic)
+        try:
+            db = SessionLocal()
+            try:
+                row = db.query(TopicQuestionBank.questions).filter(TopicQuestionBank.topic == key).first()
+            finally:
+                db.close()
+            if row is not None:
+                self.put(key, json.loads(row.questions))
+            else:
+                background_tasks.enqueue(GENERATE_QUESTION_BANK, {"topic": topic})
+        except Exception as e:
+            logger.warning("Could not load or schedule the question bank for %r: %s", topic, e)
+
+    def put(self, topic: str, questions: Dict[str, Tuple[str, ...]]):
+        self._banks[normalize_topic(topic)] = {stage: tuple(stage_questions)
+                                               for stage, stage_questions in questions.items()}
+
+    def load_all(self) -> int:
+        """Load every stored bank into memory; returns how many"""
+        db = SessionLocal()
+        try:
+            rows = db.query(TopicQuestionBank.topic, TopicQuestionBank.questions).all()
+        finally:
+            db.close()
+        for topic, questions in rows:
+            self.put(topic, json.loads(questions))
+        return len(rows)
+
+    def ensure(self, topic: str) -> Dict[str, Tuple[str, ...]]:
+        """Load the topic's bank, generating and storing it first if there is none (slow; not for live turns)"""
+        key = normalize_topic(topic)
+        db = SessionLocal()
+        try:
+            row = db.query(TopicQuestionBank.questions).filter(TopicQuestionBank.topic == key).first()
+            if row is not None:
+                questions = json.loads(row.questions)
+            else:
+                questions = model_questions(topic)
+                source = settings.QUESTION_BANK_MODEL
+                if questions is None:
+                    questions, source = template_questions(topic), TEMPLATE
+                db.add(TopicQuestionBank(topic=key, questions=json.dumps(questions), source=source))
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another worker stored one first; use theirs so every worker asks the same questions
+                    db.rollback()
+                    row = db.query(TopicQuestionBank.questions).filter(TopicQuestionBank.topic == key).one()
+                    questions = json.loads(row.questions)
+        finally:
+            db.close()
+        self.put(key, questions)
+        return self._banks[key]
+
+question_bank = QuestionBank(retry_seconds=settings.QUESTION_BANK_RETRY_SECONDS)
+
+@background_tasks.task(GENERATE_QUESTION_BANK)
+def generate_question_bank(topic: str):
+    """Generate and store a topic's bank in whichever worker runs the task
+
+    The other workers load the stored bank on their next request for it.
+    """
+    # Generation is batch work: it waits behind student turns, and a full lane retries the task later
+    evaluation_scheduler.submit(question_bank.ensure, topic, lane=BATCH, key=("topic", topic)).result()
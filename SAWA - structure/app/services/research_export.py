@@ -0,0 +1,266 @@
+"""
+Streaming research export for SAWA application
+
+Writes conversations, per-stage scores and messages as Hive-partitioned
+Parquet (or Arrow IPC) files that pandas, polars and DuckDB read directly:
+
+    <output>/conversations/created_date=2025-09-14/part-<run>.parquet
+    <output>/stage_scores/created_date=2025-09-14/part-<run>.parquet
+    <output>/messages/created_date=2025-09-14/part-<run>.parquet
+
+Rows are streamed from the database in batches (yield_per) and written one
+record batch at a time, so memory stays bounded by the batch size however
+large the term is. With anonymize, user_id is replaced by a keyed hash that
+is stable across runs with the same salt.
+
+Incremental runs read the watermark left in <output>/_watermark.json and only
+export conversations updated and messages added since the previous run.
+Conversations are re-read from slightly before the watermark, since a
+transaction can commit after a run with an earlier timestamp. Repeated rows
+are harmless: readers keep the row with the highest `version` per id.
+
+Messages have no version, so each must be exported exactly once. Neither ids
+nor timestamps commit in order, so a run only exports messages created
+before a cutoff one overlap window behind the clock, by which time every
+transaction that wrote one has committed; the next run starts at that
+cutoff. Messages thus reach the export a few minutes late, never twice and
+never skipped. Their created_at is stamped by the app clock (see
+SAWAMessage), so the cutoff is taken from the same clock, not the
+database's. The overlap covers the longest turn transaction, a feedback
+nudge written late by a retried background task (about 30s of backoff plus
+a 60s lease), and clock skew between app hosts, which must stay well under
+a minute (NTP).
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import user, classroom  # noqa: F401 (register mappers)
+from app.models.sawa_conversation import SAWAConversation
+from app.models.sawa_message import SAWAMessage
+
+PARQUET = "parquet"
+ARROW = "arrow"
+FORMATS = (PARQUET, ARROW)
+
+STAGES = ["claim", "evidence", "reasoning", "backing", "qualifier", "rebuttal"]
+PASS_SCORE = 3
+WATERMARK_FILE = "_watermark.json"
+PARTITION = "created_date"
+WATERMARK_OVERLAP = timedelta(minutes=5)  # Longer than any turn, deferred nudge write and host clock skew together
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:  # Only the export needs it; the API never imports this module
+        raise RuntimeError("The research export needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+def _schemas(pa, anonymize: bool) -> Dict[str, Any]:
+    user_type = pa.string() if anonymize else pa.int64()
+    timestamp = pa.timestamp("us", tz="UTC")
+    conversation_fields = [
+        ("id", pa.int64()), ("user_id", user_type), ("classroom_id", pa.int64()), ("assignment_id", pa.int64()),
+        ("topic", pa.string()), ("current_stage", pa.string()), ("stage_iteration", pa.int32()), ("version", pa.int64()),
+        ("prep_sheet_generated", pa.bool_()),
+    ]
+    for stage in STAGES:
+        conversation_fields += [(f"{stage}_response", pa.string()), (f"{stage}_score", pa.int8())]
+    conversation_fields += [("created_at", timestamp), ("updated_at", timestamp), ("completed_at", timestamp)]
+    return {
+        "conversations": pa.schema(conversation_fields),
+        "stage_scores": pa.schema([
+            ("conversation_id", pa.int64()), ("user_id", user_type), ("classroom_id", pa.int64()),
+            ("topic", pa.string()), ("stage", pa.string()), ("score", pa.int8()), ("passed", pa.bool_()),
+            ("version", pa.int64()),
+        ]),
+        "messages": pa.schema([
+            ("id", pa.int64()), ("conversation_id", pa.int64()), ("user_id", user_type),
+            ("message_type", pa.string()), ("stage", pa.string()), ("iteration", pa.int32()),
+            ("rubric_score", pa.int8()), ("feedback_triggered", pa.bool_()), ("content", pa.string()),
+            ("created_at", timestamp),
+        ]),
+    }
+
+class _PartitionedWriter:
+    """One open file per partition value, appended to batch by batch"""
+
+    def __init__(self, pa, root: str, table: str, schema, fmt: str, run_id: str):
+        self.pa = pa
+        self.directory = os.path.join(root, table)
+        self.schema = schema
+        self.fmt = fmt
+        self.run_id = run_id
+        self.writers: Dict[str, Any] = {}
+        self.rows = 0
+
+    def _writer(self, partition: str):
+        writer = self.writers.get(partition)
+        if writer is None:
+            directory = os.path.join(self.directory, f"{PARTITION}={partition}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{self.run_id}.{self.fmt}")
+            if self.fmt == PARQUET:
+                writer = self.pa.parquet.ParquetWriter(path, self.schema, compression="zstd")
+            else:
+                writer = self.pa.ipc.new_file(path, self.schema)
+            self.writers[partition] = writer
+        return writer
+
+    def write(self, rows: List[Dict[str, Any]], partitions: List[str]):
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for row, partition in zip(rows, partitions):
+            grouped.setdefault(partition, []).append(row)
+        for partition, group in grouped.items():
+            batch = self.pa.RecordBatch.from_pylist(group, schema=self.schema)
+            self._writer(partition).write_batch(batch)
+        self.rows += len(rows)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    @property
+    def files(self) -> int:
+        return len(self.writers)
+
+def _batches(query, batch_size: int) -> Iterable[list]:
+    """Stream query rows in lists of at most `batch_size`"""
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _day(value: Optional[datetime]) -> str:
+    return value.date().isoformat() if value is not None else "unknown"
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+def read_watermark(output: str) -> Dict[str, Any]:
+    path = os.path.join(output, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_watermark(output: str, watermark: Dict[str, Any]):
+    """Replace the watermark atomically, so a failed run leaves the old one"""
+    path = os.path.join(output, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def user_hasher(salt: str) -> Callable[[int], str]:
+    """Keyed, stable pseudonym for a user id"""
+    key = salt.encode()
+    return lambda user_id: hmac.new(key, str(user_id).encode(), hashlib.sha256).hexdigest()[:16]
+
+def export_research_data(db: Session, output: str, fmt: str = PARQUET, anonymize: bool = False,
+                         salt: Optional[str] = None, incremental: bool = False,
+                         batch_size: int = 5000) -> Dict[str, Any]:
+    """Export conversations, stage scores and messages; returns row and file counts"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if anonymize and not salt:
+        raise ValueError("Anonymization needs a secret salt (RESEARCH_EXPORT_SALT); "
+                         "without one small integer ids can be recovered by hashing them all")
+    pa = _require_pyarrow()
+    if fmt == ARROW:
+        import pyarrow.ipc  # noqa: F401
+
+    os.makedirs(output, exist_ok=True)
+    previous = read_watermark(output) if incremental else {}
+    if previous and previous.get("anonymized") != anonymize:
+        raise ValueError("Incremental export must keep the previous run's anonymization setting")
+    pseudonym = user_hasher(salt) if anonymize else (lambda user_id: user_id)
+    schemas = _schemas(pa, anonymize)
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    writers = {table: _PartitionedWriter(pa, output, table, schema, fmt, run_id) for table, schema in schemas.items()}
+    started = time.perf_counter()
+
+    # Conversations changed since the last run, with some overlap
+    changed_at = func.coalesce(SAWAConversation.updated_at, SAWAConversation.created_at)
+    conversation_columns = [getattr(SAWAConversation, name) for name in schemas["conversations"].names]
+    conversations = db.query(*conversation_columns, changed_at.label("changed_at")).order_by(SAWAConversation.id)
+    if previous.get("conversations_changed_at"):
+        since = datetime.fromisoformat(previous["conversations_changed_at"]) - WATERMARK_OVERLAP
+        conversations = conversations.filter(changed_at >= since)
+
+    last_changed = previous.get("conversations_changed_at")
+    try:
+        for batch in _batches(conversations, batch_size):
+            rows, scores, partitions, score_partitions = [], [], [], []
+            for row in batch:
+                record = row._asdict()
+                changed = record.pop("changed_at")
+                record["user_id"] = pseudonym(record["user_id"])
+                record["current_stage"] = record["current_stage"].value if record["current_stage"] else None
+                partition = _day(record["created_at"])
+                rows.append(record)
+                partitions.append(partition)
+                for stage in STAGES:
+                    score = record[f"{stage}_score"]
+                    if score is not None:
+                        scores.append({
+                            "conversation_id": record["id"], "user_id": record["user_id"],
+                            "classroom_id": record["classroom_id"], "topic": record["topic"], "stage": stage,
+                            "score": score, "passed": score >= PASS_SCORE, "version": record["version"],
+                        })
+                        score_partitions.append(partition)
+                if changed is not None and (last_changed is None or _iso(changed) > last_changed):
+                    last_changed = _iso(changed)
+            writers["conversations"].write(rows, partitions)
+            writers["stage_scores"].write(scores, score_partitions)
+
+        # Messages created in [previous cutoff, this cutoff): all committed, none seen before
+        # The app clock, which stamps created_at; the database's may differ
+        messages_before = datetime.now(timezone.utc) - WATERMARK_OVERLAP
+        message_columns = [getattr(SAWAMessage, name) for name in schemas["messages"].names if name != "user_id"]
+        messages = db.query(*message_columns, SAWAConversation.user_id).join(
+            SAWAConversation, SAWAMessage.conversation_id == SAWAConversation.id
+        ).filter(SAWAMessage.created_at < messages_before).order_by(SAWAMessage.id)
+        if previous.get("messages_before"):
+            messages = messages.filter(SAWAMessage.created_at >= datetime.fromisoformat(previous["messages_before"]))
+        elif previous.get("last_message_id"):
+            # Watermark from before the cutoff was kept
+            messages = messages.filter(SAWAMessage.id > previous["last_message_id"])
+
+        for batch in _batches(messages, batch_size):
+            rows, partitions = [], []
+            for row in batch:
+                record = row._asdict()
+                record["user_id"] = pseudonym(record["user_id"])
+                record["message_type"] = record["message_type"].value
+                rows.append(record)
+                partitions.append(_day(record["created_at"]))
+            writers["messages"].write(rows, partitions)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    watermark = {
+        "run_id": run_id,
+        "conversations_changed_at": last_changed,
+        "messages_before": _iso(messages_before),
+        "anonymized": anonymize,
+    }
+    write_watermark(output, watermark)
+    return {
+        "tables": {table: {"rows": writer.rows, "files": writer.files} for table, writer in writers.items()},
+        "watermark": watermark,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
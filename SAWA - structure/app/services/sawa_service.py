@@ -2,15 +2,88 @@
 SAWA Service implementing the CER + Toulmin framework with Socratic questioning
 """
 
+from sqlalchemy import insert, exists
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Dict, Any, Optional, List, Callable, TypeVar
+from datetime import datetime, timedelta, timezone
 import json
+import logging
+import random
+import time
 
+from app.database import SessionLocal
 from app.models.sawa_conversation import SAWAConversation, SAWAStage
 from app.models.sawa_message import SAWAMessage, MessageType
 from app.models.sawa_rubric import SAWARubric
-from app.schemas.sawa import SAWAResponse, StudentResponse, PrepSheet
+from app.schemas.sawa import (
+    SAWAResponse,
+    StudentResponse,
+    PrepSheet,
+    SAWAConversationResponse,
+    SAWAMessageResponse
+)
+from app.core.serialization import dumps, rows_to_dicts
+from app.core.events import conversation_events, FEEDBACK, MESSAGE, STATE, DONE
+from app.core.tracing import traced
+from app.core.metrics import PhaseTimer, LOAD, EVALUATE, COMMIT, FEEDBACK_LOOPS, COMPLETIONS, record_score
+from app.services.background_tasks import background_tasks
+from app.services import class_analytics, similarity
+from app.services.question_bank import question_bank
+from app.services.catalog import catalog_store, feedback_reply
+from app.models.classroom import ClassroomMember, Assignment
+
+# Columns selected by the row-tuple history path, in response schema order
+CONVERSATION_FIELDS = tuple(SAWAConversationResponse.model_fields)
+MESSAGE_FIELDS = tuple(SAWAMessageResponse.model_fields)
+CONVERSATION_COLUMNS = [getattr(SAWAConversation, field) for field in CONVERSATION_FIELDS]
+MESSAGE_COLUMNS = [getattr(SAWAMessage, field) for field in MESSAGE_FIELDS]
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Background task names
+RECORD_MESSAGE = "record_message"
+
+class ConversationConflict(Exception):
+    """Another request updated the conversation first (optimistic concurrency)"""
+
+def retry_on_conflict(operation: Callable[[], T], db: Session, attempts: int = 3) -> T:
+    """Re-run `operation` when it loses a version race
+
+    Only for operations that re-read the conversation and are safe to repeat
+    against the newer state. A student turn is not: answering a question the
+    student has not seen yet would be wrong, so /respond returns 409 instead.
+    """
+    for attempt in range(attempts):
+        try:
+            return operation()
+        except ConversationConflict:
+            if attempt == attempts - 1:
+                raise
+            db.expire_all()
+            # Small jittered backoff so retrying writers do not collide again
+            time.sleep(random.uniform(0, 0.01 * (2 ** attempt)))
+
+@background_tasks.task(RECORD_MESSAGE)
+def record_message(message_type: str, created_at: str, **fields):
+    """Insert a history row that was deferred off the turn's hot path"""
+    db = SessionLocal()
+    try:
+        message_type = MessageType(message_type)
+        exists = db.query(SAWAMessage.id).filter(
+            SAWAMessage.conversation_id == fields["conversation_id"],
+            SAWAMessage.message_type == message_type,
+            SAWAMessage.stage == fields["stage"],
+            SAWAMessage.iteration == fields["iteration"]
+        ).first()
+        if exists is None:  # Already written by an earlier attempt
+            db.add(SAWAMessage(message_type=message_type, created_at=datetime.fromisoformat(created_at), **fields))
+            db.commit()
+    finally:
+        db.close()
 
 class SAWAService:
     def __init__(self, db: Session):
@@ -23,21 +96,37 @@ class SAWAService:
             SAWAStage.QUALIFIER,
             SAWAStage.REBUTTAL
         ]
+        # Messages added during the current turn, published after commit
+        self._turn_messages: List[SAWAMessage] = []
 
-    def start_conversation(self, user_id: int, topic: str) -> SAWAResponse:
+    @traced("SAWAService.start_conversation")
+    def start_conversation(self, user_id: int, topic: str, classroom_id: Optional[int] = None,
+                           assignment_id: Optional[int] = None) -> SAWAResponse:
         """Start a new SAWA conversation"""
+        if classroom_id is not None:
+            member = self.db.query(ClassroomMember.id).filter(
+                ClassroomMember.classroom_id == classroom_id,
+                ClassroomMember.user_id == user_id
+            ).first()
+            if member is None:
+                raise ValueError("Class not found")
+        
         conversation = SAWAConversation(
             user_id=user_id,
             topic=topic,
+            classroom_id=classroom_id,
+            assignment_id=assignment_id,
             current_stage=SAWAStage.CLAIM,
             stage_iteration=0
         )
         self.db.add(conversation)
-        self.db.commit()
+        if classroom_id is not None:
+            class_analytics.record_session(self.db, classroom_id, topic, started=1)
+        self._commit()
         self.db.refresh(conversation)
         
         # Get the first Socratic question
-        question = self._get_socratic_question(SAWAStage.CLAIM, 0)
+        question = self._get_socratic_question(SAWAStage.CLAIM, 0, topic)
         
         # Create message
         message = SAWAMessage(
@@ -47,8 +136,9 @@ class SAWAService:
             stage=SAWAStage.CLAIM.value,
             iteration=0
         )
-        self.db.add(message)
-        self.db.commit()
+        self._add_message(message)
+        self._commit()
+        self._publish_turn(conversation, {"current_stage": SAWAStage.CLAIM.value, "stage_iteration": 0})
         
         return SAWAResponse(
             message=question,
@@ -59,11 +149,110 @@ class SAWAService:
             prep_sheet_ready=False
         )
 
-    def process_response(self, conversation_id: int, response: str) -> SAWAResponse:
-        """Process student response and determine next action"""
+    @traced("SAWAService.launch_assignment")
+    def launch_assignment(self, assignment: Assignment) -> int:
+        """Create a session and its opening question for every student on the roster without one
+
+        A fixed number of multi-row statements in one transaction, however large
+        the class, instead of a /start per student at the bell. Returns the
+        number of sessions created.
+        """
+        pending = [user_id for (user_id,) in self.db.query(ClassroomMember.user_id).filter(
+            ClassroomMember.classroom_id == assignment.classroom_id,
+            ~exists().where(
+                SAWAConversation.assignment_id == assignment.id,
+                SAWAConversation.user_id == ClassroomMember.user_id
+            )
+        )]
+        if not pending:
+            # Still commit: a new assignment is only flushed, and would otherwise be rolled back
+            self._commit()
+            return 0
+        
+        # Every session gets the same opening question, so the ids are needed but not their order
+        # (asking for it would make SQLite fall back to one INSERT per row)
+        conversation_ids = self.db.scalars(
+            insert(SAWAConversation).returning(SAWAConversation.id),
+            [{
+                "user_id": user_id,
+                "topic": assignment.topic,
+                "classroom_id": assignment.classroom_id,
+                "assignment_id": assignment.id,
+                "current_stage": SAWAStage.CLAIM,
+                "stage_iteration": 0,
+                "version": 1
+            } for user_id in pending]
+        ).all()
+        question = self._get_socratic_question(SAWAStage.CLAIM, 0, assignment.topic)
+        self.db.execute(insert(SAWAMessage), [{
+            "conversation_id": conversation_id,
+            "message_type": MessageType.SOCRATIC_QUESTION,
+            "content": question,
+            "stage": SAWAStage.CLAIM.value,
+            "iteration": 0
+        } for conversation_id in conversation_ids])
+        class_analytics.record_session(self.db, assignment.classroom_id, assignment.topic, started=len(pending))
+        try:
+            self._commit()
+        except IntegrityError:
+            # A concurrent launch or resume created some of these sessions first
+            self.db.rollback()
+            raise ConversationConflict("Assignment sessions were created by another request; launch again")
+        return len(pending)
+
+    @traced("SAWAService.resume_assignment")
+    def resume_assignment(self, user_id: int, assignment_id: int) -> SAWAResponse:
+        """Return the student's session for an assignment where they left off
+
+        Sessions are normally created by the launch; a student enrolled after it
+        gets theirs on first resume.
+        """
+        assignment = self.db.query(Assignment).join(
+            ClassroomMember, ClassroomMember.classroom_id == Assignment.classroom_id
+        ).filter(
+            Assignment.id == assignment_id,
+            ClassroomMember.user_id == user_id
+        ).first()
+        if assignment is None:
+            raise ValueError("Assignment not found")
+        
         conversation = self.db.query(SAWAConversation).filter(
-            SAWAConversation.id == conversation_id
+            SAWAConversation.assignment_id == assignment_id,
+            SAWAConversation.user_id == user_id
         ).first()
+        if conversation is None:
+            try:
+                return self.start_conversation(user_id, assignment.topic, assignment.classroom_id, assignment_id)
+            except IntegrityError:
+                # The launch created it in the meantime
+                self.db.rollback()
+                return self.resume_assignment(user_id, assignment_id)
+        
+        if conversation.current_stage == SAWAStage.COMPLETED:
+            return self._prep_sheet_response(conversation, PrepSheet.model_validate_json(conversation.prep_sheet_content))
+        
+        # The open question. Only questions are written in the turn's own transaction; a
+        # nudge is saved later by a background task, so it can have a higher id
+        message = self.db.query(SAWAMessage.content).filter(
+            SAWAMessage.conversation_id == conversation.id,
+            SAWAMessage.message_type == MessageType.SOCRATIC_QUESTION
+        ).order_by(SAWAMessage.id.desc()).first()
+        return SAWAResponse(
+            message=message.content if message else self._get_socratic_question(SAWAStage.CLAIM, 0, assignment.topic),
+            conversation_id=conversation.id,
+            current_stage=conversation.current_stage.value,
+            stage_iteration=conversation.stage_iteration,
+            should_continue=True,
+            prep_sheet_ready=False
+        )
+
+    @traced("SAWAService.process_response")
+    def process_response(self, conversation_id: int, response: str) -> SAWAResponse:
+        """Process student response and determine next action"""
+        with PhaseTimer(LOAD):
+            conversation = self.db.query(SAWAConversation).filter(
+                SAWAConversation.id == conversation_id
+            ).first()
         
         if not conversation:
             raise ValueError("Conversation not found")
@@ -76,11 +265,18 @@ class SAWAService:
             stage=conversation.current_stage.value,
             iteration=conversation.stage_iteration
         )
-        self.db.add(message)
+        self._add_message(message)
         
         # Evaluate response using rubric
-        score = self._evaluate_response(conversation.current_stage, response)
+        stage = conversation.current_stage.value
+        with PhaseTimer(EVALUATE, stage):
+            score = self._evaluate_response(conversation.current_stage, response)
+        record_score(stage, score)
         message.rubric_score = score
+        message.feedback_triggered = score < 3
+        if conversation.classroom_id is not None:
+            class_analytics.record_turn(self.db, conversation.classroom_id, conversation.topic, stage, score)
+            similarity.index_response(self.db, message, conversation)
         
         # Check if response meets threshold (Level 2.5+)
         if score >= 3:  # Proficient or Advanced
@@ -89,10 +285,13 @@ class SAWAService:
             return self._advance_to_next_stage(conversation)
         else:
             # Provide feedback and re-ask question
-            message.feedback_triggered = True
-            self.db.commit()
+            FEEDBACK_LOOPS.labels(stage).inc()
+            # Flush, not commit: the whole turn must be one transaction so the
+            # version check covers the state this turn was evaluated against
+            self.db.flush()
             return self._provide_feedback_and_reask(conversation, score)
 
+    @traced("SAWAService.evaluate_response")
     def _evaluate_response(self, stage: SAWAStage, response: str) -> int:
         """Evaluate student response using SAWA rubric (1-4 scale)"""
         # This is a simplified evaluation - in production, you'd use AI or more sophisticated NLP
@@ -249,76 +448,15 @@ class SAWAService:
         
         return 3
 
-    def _get_socratic_question(self, stage: SAWAStage, iteration: int) -> str:
-        """Get Socratic question for the current stage"""
-        questions = {
-            SAWAStage.CLAIM: [
-                "What one-sentence position do you want to defend on this issue?",
-                "Could you add a condition that makes it more precise?",
-                "Make it contestable—something a critic might disagree with."
-            ],
-            SAWAStage.EVIDENCE: [
-                "What specific information will you use to support your claim?",
-                "Where does this evidence come from, and why should your audience trust it?",
-                "Name at least one credible source type and why you trust it."
-            ],
-            SAWAStage.REASONING: [
-                "How does this evidence support your claim?",
-                "What general rule or mechanism makes the evidence count?",
-                "Don't just repeat evidence—what rule makes it count for your claim?"
-            ],
-            SAWAStage.BACKING: [
-                "What broader scientific principle supports your reasoning?",
-                "Which established theory or model justifies this link?",
-                "Name a theory, model, or consensus that makes your reasoning trustworthy."
-            ],
-            SAWAStage.QUALIFIER: [
-                "Is your claim always true, or under certain conditions?",
-                "How confident are you in your claim, based on current evidence?",
-                "Science rarely deals in absolutes—restate with 'likely,' 'generally,' or under specific conditions."
-            ],
-            SAWAStage.REBUTTAL: [
-                "What is the strongest counterargument to your claim?",
-                "What would a knowledgeable opponent say?",
-                "Strengthen this by naming the strongest real counter a critic might raise."
-            ]
-        }
-        
-        stage_questions = questions.get(stage, ["Please elaborate on your response."])
-        return stage_questions[min(iteration, len(stage_questions) - 1)]
+    def _get_socratic_question(self, stage: SAWAStage, iteration: int, topic: Optional[str] = None) -> str:
+        """Get Socratic question for the current stage, from the topic's bank when it has one"""
+        return question_bank.question(stage.value, iteration, topic)
 
     def _get_feedback_nudge(self, stage: SAWAStage, score: int) -> str:
         """Get feedback nudge based on stage and score"""
-        feedback_templates = {
-            SAWAStage.CLAIM: {
-                1: "Make it contestable by stating a position someone could reasonably doubt.",
-                2: "Could you add a condition that makes it more precise?"
-            },
-            SAWAStage.EVIDENCE: {
-                1: "Name at least one source type and one criterion (e.g., peer review, sample size).",
-                2: "Where does this evidence come from, and why should your audience trust it?"
-            },
-            SAWAStage.REASONING: {
-                1: "State a general rule or mechanism linking the two.",
-                2: "Don't just repeat evidence—what rule makes it count for your claim?"
-            },
-            SAWAStage.BACKING: {
-                1: "Name a theory, model, or prior finding that justifies your rule.",
-                2: "What broader scientific principle supports your reasoning?"
-            },
-            SAWAStage.QUALIFIER: {
-                1: "Calibrate scope using a condition or likelihood.",
-                2: "Science rarely deals in absolutes—restate with 'likely,' 'generally,' or under specific conditions."
-            },
-            SAWAStage.REBUTTAL: {
-                1: "Strengthen the counter by using the best opposing case.",
-                2: "What would a knowledgeable opponent say?"
-            }
-        }
-        
-        stage_feedback = feedback_templates.get(stage, {})
-        return stage_feedback.get(score, "Please provide more detail.")
+        return catalog_store.current.feedback(stage.value, score)
 
+    @traced("SAWAService.save_stage_response")
     def _save_stage_response(self, conversation: SAWAConversation, response: str, score: int):
         """Save student response for the current stage"""
         if conversation.current_stage == SAWAStage.CLAIM:
@@ -340,6 +478,42 @@ class SAWAService:
             conversation.rebuttal_response = response
             conversation.rebuttal_score = score
 
+    @traced("SAWAService.commit")
+    def _commit(self):
+        """Commit, turning a lost version race into ConversationConflict"""
+        try:
+            with PhaseTimer(COMMIT):
+                self.db.commit()
+        except StaleDataError:
+            self.db.rollback()
+            raise ConversationConflict("Conversation was updated by another request; reload it and try again")
+
+    def _add_message(self, message: SAWAMessage):
+        """Add a message to the session and remember it for streaming"""
+        self.db.add(message)
+        self._turn_messages.append(message)
+
+    def _stage_score_state(self, conversation: SAWAConversation) -> Dict[str, Any]:
+        """State delta for the stage that was just passed"""
+        stage = conversation.current_stage.value
+        return {
+            f"{stage}_response": getattr(conversation, f"{stage}_response"),
+            f"{stage}_score": getattr(conversation, f"{stage}_score")
+        }
+
+    def _publish_turn(self, conversation: SAWAConversation, state: Dict[str, Any]):
+        """Send committed messages and the changed state to streaming clients"""
+        messages, self._turn_messages = self._turn_messages, []
+        if not conversation_events.has_subscribers(conversation.id):
+            return
+        
+        for message in messages:
+            conversation_events.publish(conversation.id, MESSAGE, {
+                field: getattr(message, field) for field in MESSAGE_FIELDS
+            })
+        conversation_events.publish(conversation.id, STATE, state)
+
+    @traced("SAWAService.advance_to_next_stage")
     def _advance_to_next_stage(self, conversation: SAWAConversation) -> SAWAResponse:
         """Advance to the next stage in the sequence"""
         current_index = self.stage_sequence.index(conversation.current_stage)
@@ -347,11 +521,12 @@ class SAWAService:
         if current_index < len(self.stage_sequence) - 1:
             # Move to next stage
             next_stage = self.stage_sequence[current_index + 1]
+            state = self._stage_score_state(conversation)
             conversation.current_stage = next_stage
             conversation.stage_iteration = 0
             
             # Get Socratic question for next stage
-            question = self._get_socratic_question(next_stage, 0)
+            question = self._get_socratic_question(next_stage, 0, conversation.topic)
             
             # Create message
             message = SAWAMessage(
@@ -361,8 +536,10 @@ class SAWAService:
                 stage=next_stage.value,
                 iteration=0
             )
-            self.db.add(message)
-            self.db.commit()
+            self._add_message(message)
+            self._commit()
+            state.update(current_stage=next_stage.value, stage_iteration=0)
+            self._publish_turn(conversation, state)
             
             return SAWAResponse(
                 message=question,
@@ -376,24 +553,37 @@ class SAWAService:
             # All stages complete - generate prep sheet
             return self._generate_prep_sheet(conversation)
 
+    @traced("SAWAService.provide_feedback_and_reask")
     def _provide_feedback_and_reask(self, conversation: SAWAConversation, score: int) -> SAWAResponse:
         """Provide feedback and re-ask the same question"""
         feedback = self._get_feedback_nudge(conversation.current_stage, score)
+        feedback_event = {
+            "stage": conversation.current_stage.value,
+            "iteration": conversation.stage_iteration,
+            "score": score,
+            "content": feedback
+        }
         
-        # Create feedback message
-        feedback_message = SAWAMessage(
-            conversation_id=conversation.id,
-            message_type=MessageType.FEEDBACK_NUDGE,
-            content=feedback,
-            stage=conversation.current_stage.value,
-            iteration=conversation.stage_iteration,
-            feedback_triggered=True
-        )
-        self.db.add(feedback_message)
+        # The nudge already reaches the student in the reply and the FEEDBACK
+        # event, so its history row is written by a background task after the
+        # turn commits. Messages are stamped by the app clock (see SAWAMessage):
+        # the nudge after the student response flushed above and the question
+        # just after the nudge, so history order is unchanged.
+        nudge_at = datetime.now(timezone.utc)
+        feedback_message = {
+            "conversation_id": conversation.id,
+            "message_type": MessageType.FEEDBACK_NUDGE.value,
+            "content": feedback,
+            "stage": conversation.current_stage.value,
+            "iteration": conversation.stage_iteration,
+            "feedback_triggered": True,
+            "created_at": nudge_at.isoformat()
+        }
         
         # Increment iteration and get next question
         conversation.stage_iteration += 1
-        question = self._get_socratic_question(conversation.current_stage, conversation.stage_iteration)
+        question = self._get_socratic_question(conversation.current_stage, conversation.stage_iteration,
+                                               conversation.topic)
         
         # Create next question message
         question_message = SAWAMessage(
@@ -401,13 +591,30 @@ class SAWAService:
             message_type=MessageType.SOCRATIC_QUESTION,
             content=question,
             stage=conversation.current_stage.value,
-            iteration=conversation.stage_iteration
+            iteration=conversation.stage_iteration,
+            created_at=nudge_at + timedelta(microseconds=1)
         )
-        self.db.add(question_message)
-        self.db.commit()
+        self._add_message(question_message)
+        self._commit()
+        try:
+            background_tasks.enqueue(RECORD_MESSAGE, feedback_message)
+        except Exception:
+            # The turn is saved; failing it now would make a retry answer the next question
+            logger.exception("Could not enqueue the feedback nudge of conversation %s; writing it now",
+                             conversation.id)
+            try:
+                record_message(**feedback_message)
+            except Exception:
+                logger.exception("Feedback nudge of conversation %s not recorded", conversation.id)
+        # Only now: a turn that lost a version race must not have streamed its feedback
+        conversation_events.publish(conversation.id, FEEDBACK, feedback_event)
+        self._publish_turn(conversation, {
+            "current_stage": conversation.current_stage.value,
+            "stage_iteration": conversation.stage_iteration
+        })
         
         return SAWAResponse(
-            message=f"{feedback}\n\n{question}",
+            message=feedback_reply(feedback, question),
             conversation_id=conversation.id,
             current_stage=conversation.current_stage.value,
             stage_iteration=conversation.stage_iteration,
@@ -415,6 +622,7 @@ class SAWAService:
             prep_sheet_ready=False
         )
 
+    @traced("SAWAService.generate_prep_sheet")
     def _generate_prep_sheet(self, conversation: SAWAConversation) -> SAWAResponse:
         """Generate the final prep sheet"""
         prep_sheet = PrepSheet(
@@ -427,10 +635,13 @@ class SAWAService:
         )
         
         # Save prep sheet
+        state = self._stage_score_state(conversation)
         conversation.prep_sheet_generated = True
         conversation.prep_sheet_content = prep_sheet.json()
         conversation.current_stage = SAWAStage.COMPLETED
         conversation.completed_at = datetime.utcnow()
+        if conversation.classroom_id is not None:
+            class_analytics.record_session(self.db, conversation.classroom_id, conversation.topic, completed=1)
         
         # Create prep sheet message
         message = SAWAMessage(
@@ -439,9 +650,16 @@ class SAWAService:
             content=prep_sheet.json(),
             stage=SAWAStage.COMPLETED.value
         )
-        self.db.add(message)
-        self.db.commit()
-        
+        self._add_message(message)
+        self._commit()
+        state.update(current_stage=SAWAStage.COMPLETED.value, stage_iteration=0, prep_sheet_generated=True)
+        self._publish_turn(conversation, state)
+        conversation_events.publish(conversation.id, DONE, {"prep_sheet": prep_sheet.model_dump()})
+        COMPLETIONS.inc()
+        return self._prep_sheet_response(conversation, prep_sheet)
+
+    def _prep_sheet_response(self, conversation: SAWAConversation, prep_sheet: PrepSheet) -> SAWAResponse:
+        """The reply that hands the student their completed prep sheet"""
         prep_sheet_text = f"""
 🎉 **SAWA Prep Sheet Complete!**
 
@@ -481,9 +699,32 @@ You're now ready to draft your scientific argumentative essay! Use this prep she
         
         messages = self.db.query(SAWAMessage).filter(
             SAWAMessage.conversation_id == conversation_id
-        ).order_by(SAWAMessage.created_at).all()
+        ).order_by(SAWAMessage.created_at, SAWAMessage.id).all()
         
         return {
             "conversation": conversation,
             "messages": messages
         }
+
+    @traced("SAWAService.get_conversation_history_json")
+    def get_conversation_history_json(self, conversation_id: int) -> bytes:
+        """Get conversation history serialized straight from row tuples
+
+        Skips ORM object construction and per-message model validation,
+        which dominate the cost of long conversations.
+        """
+        conversation = self.db.query(*CONVERSATION_COLUMNS).filter(
+            SAWAConversation.id == conversation_id
+        ).first()
+        
+        if not conversation:
+            raise ValueError("Conversation not found")
+        
+        messages = self.db.query(*MESSAGE_COLUMNS).filter(
+            SAWAMessage.conversation_id == conversation_id
+        ).order_by(SAWAMessage.created_at, SAWAMessage.id).all()
+        
+        return dumps({
+            "conversation": dict(zip(CONVERSATION_FIELDS, conversation)),
+            "messages": rows_to_dicts(MESSAGE_FIELDS, messages)
+        })
@@ -0,0 +1,135 @@
+"""
+Full-text search over student responses for SAWA application
+
+Backed by the index defined next to the sawa_messages table: a GIN-indexed
+tsvector column on PostgreSQL (ranked with ts_rank_cd) or an FTS5 table on
+SQLite (ranked with bm25). Both are maintained by the database on every
+write. Any other database raises SearchUnavailable; search never falls back
+to LIKE scans.
+
+Results are limited to classes the requesting teacher owns, optionally
+narrowed to one class and one stage, and paginated.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import column, func, literal, literal_column, table, text
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.models.classroom import Classroom
+from app.models.sawa_conversation import SAWAConversation
+from app.models.sawa_message import SAWAMessage, MessageType, SEARCH_CONFIG, SEARCH_INDEX_DDL
+
+SNIPPET_WORDS = 16
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+class SearchUnavailable(Exception):
+    """The database has no full-text index this module can use"""
+
+def fts5_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, quotes keep phrases
+
+    Quoting every token means user input can never inject FTS5 operators.
+    """
+    terms = []
+    for phrase, words in re.findall(r'"([^"]*)"|(\S+)', query):
+        tokens = _WORD.findall(phrase or words)
+        if tokens:
+            terms.append('"' + " ".join(tokens) + '"')
+    return " ".join(terms)
+
+def create_search_index(db: Session) -> str:
+    """Create the index on an existing database and index current responses; returns the dialect"""
+    dialect = db.get_bind().dialect.name
+    if dialect not in SEARCH_INDEX_DDL:
+        raise SearchUnavailable(f"Full-text search is not supported on {dialect}")
+    for statement in SEARCH_INDEX_DDL[dialect]:
+        db.execute(text(statement))
+    if dialect == "sqlite":
+        # External-content FTS5 has no per-row existence check, so re-index from scratch
+        db.execute(text("INSERT INTO sawa_messages_fts(sawa_messages_fts) VALUES ('delete-all')"))
+        db.execute(text(
+            "INSERT INTO sawa_messages_fts(rowid, content) SELECT id, content FROM sawa_messages "
+            "WHERE message_type = :message_type"
+        ), {"message_type": MessageType.STUDENT_RESPONSE.name})
+    db.commit()
+    return dialect
+
+def search_responses(db: Session, teacher_id: int, query: str, stage: Optional[str] = None,
+                     classroom_id: Optional[int] = None, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+    """Ranked student responses matching `query` in the teacher's classes"""
+    dialect = db.get_bind().dialect.name
+    columns = [
+        SAWAMessage.id.label("message_id"),
+        SAWAMessage.conversation_id,
+        SAWAConversation.user_id,
+        User.username,
+        SAWAConversation.classroom_id,
+        SAWAConversation.topic,
+        SAWAMessage.stage,
+        SAWAMessage.iteration,
+        SAWAMessage.rubric_score,
+        SAWAMessage.created_at,
+    ]
+
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery(literal(SEARCH_CONFIG), query)
+        tsv = literal_column("sawa_messages.content_tsv")
+        search = db.query(
+            *columns,
+            func.ts_rank_cd(tsv, tsquery).label("rank"),
+            func.ts_headline(
+                literal(SEARCH_CONFIG), SAWAMessage.content, tsquery,
+                literal(f"MaxWords={SNIPPET_WORDS}, MinWords=5, StartSel=[, StopSel=]")
+            ).label("snippet"),
+        ).select_from(SAWAMessage).filter(tsv.op("@@")(tsquery))
+    elif dialect == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return {"query": query, "total": 0, "page": page, "page_size": page_size, "results": []}
+        # bm25() and snippet() only work in a query that MATCHes the FTS table directly,
+        # so rank in a subquery and join the matches to the messages
+        fts = table("sawa_messages_fts", column("rowid"))
+        fts_table = literal_column("sawa_messages_fts")
+        matches = db.query(
+            fts.c.rowid.label("message_id"),
+            # bm25 is lower for better matches; negate so higher ranks first on both backends
+            (-func.bm25(fts_table)).label("rank"),
+            func.snippet(fts_table, 0, "[", "]", "…", SNIPPET_WORDS).label("snippet"),
+        ).select_from(fts).filter(fts_table.op("MATCH")(match)).subquery()
+        search = db.query(*columns, matches.c.rank, matches.c.snippet) \
+            .select_from(SAWAMessage).join(matches, matches.c.message_id == SAWAMessage.id)
+    else:
+        raise SearchUnavailable(f"Full-text search is not supported on {dialect}")
+
+    search = search.join(SAWAConversation, SAWAConversation.id == SAWAMessage.conversation_id) \
+        .join(Classroom, Classroom.id == SAWAConversation.classroom_id) \
+        .join(User, User.id == SAWAConversation.user_id) \
+        .filter(
+            Classroom.teacher_id == teacher_id,
+            SAWAMessage.message_type == MessageType.STUDENT_RESPONSE
+        )
+    if classroom_id is not None:
+        search = search.filter(SAWAConversation.classroom_id == classroom_id)
+    if stage is not None:
+        search = search.filter(SAWAMessage.stage == stage)
+
+    rows = search.add_columns(func.count().over().label("total")) \
+        .order_by(literal_column("rank").desc(), SAWAMessage.id.desc()) \
+        .limit(page_size).offset((page - 1) * page_size).all()
+
+    results: List[Dict[str, Any]] = []
+    for row in rows:
+        result = row._asdict()
+        result.pop("total")
+        result["rank"] = round(float(result["rank"]), 6)
+        results.append(result)
+    return {
+        "query": query,
+        "total": rows[0].total if rows else 0,
+        "page": page,
+        "page_size": page_size,
+        "results": results,
+    }
@@ -0,0 +1,201 @@
+"""
+Cross-student similarity detection for SAWA application
+
+Each student response in a class session is reduced to its set of word
+3-grams and summarized by a MinHash signature when it is saved. The
+signature is cut into LSH bands; each band is hashed to a bucket key. Two
+responses are compared only if they share a bucket in the same class,
+assignment, topic and stage, which with NUM_BANDS x ROWS_PER_BAND = 16 x 8 makes pairs above
+about 0.8 Jaccard similarity near-certain candidates and pairs below 0.5
+rare ones.
+
+A cluster is its first response (the representative) and the later ones
+linked to it. A new response is compared only with representatives from
+other students: the closest one reaching the threshold gets one link row,
+and with no match the response becomes a representative and is bucketed.
+A copy-paste cluster of k students is thus k - 1 comparisons and k - 1
+rows, not k(k-1)/2. Checking a new response costs one indexed bucket
+lookup, however many responses the class has, and the report reads the
+links and groups them by representative.
+"""
+
+import hashlib
+import random
+import re
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.sawa_conversation import SAWAConversation
+from app.models.sawa_message import SAWAMessage, MessageType
+from app.models.similarity import ResponseSignature, ResponseBucket, SimilarResponsePair
+from app.services.class_analytics import normalize_topic
+
+NUM_BANDS = 16
+ROWS_PER_BAND = 8
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+SHINGLE_WORDS = 3
+EXCERPT_CHARS = 160
+
+_MERSENNE = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Fixed seed: signatures stored by one process must compare with any other's
+_rng = random.Random(20250914)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+def shingles(text: str) -> set:
+    """Word 3-grams of the lowercased text, hashed to 64 bits"""
+    words = _WORD.findall(text.lower())
+    grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(len(words) - SHINGLE_WORDS + 1, 1))}
+    return {int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "little") for gram in grams}
+
+def minhash(hashed_shingles: set) -> List[int]:
+    """MinHash signature: the minimum of each of NUM_PERM universal hash functions"""
+    values = list(hashed_shingles)
+    return [min((a * value + b) % _MERSENNE for value in values) & _MASK for a, b in _PERMUTATIONS]
+
+def band_keys(signature: Sequence[int]) -> List[int]:
+    """One signed 64-bit bucket key per band"""
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = array("I", signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]).tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+def estimate_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimated Jaccard similarity: the share of equal signature positions"""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERM
+
+def _unpack(blob: bytes) -> array:
+    signature = array("I")
+    signature.frombytes(blob)
+    return signature
+
+def index_response(db: Session, message: SAWAMessage, conversation: SAWAConversation) -> List[Dict[str, Any]]:
+    """Sign a new class response and link it to its closest earlier cluster; returns the link, if any
+
+    Runs inside the turn's transaction; flushes the message to get its id.
+    """
+    if len(_WORD.findall(message.content)) < settings.SIMILARITY_MIN_WORDS:
+        return []  # Short answers ("GMOs are safe") coincide without being copied
+    db.flush()
+    signature = minhash(shingles(message.content))
+    keys = band_keys(signature)
+    # Two assignments on one topic are separate pools (None == None filters as IS NULL)
+    scope = {"classroom_id": conversation.classroom_id, "assignment_id": conversation.assignment_id,
+             "topic": normalize_topic(conversation.topic), "stage": message.stage}
+
+    # Only representatives are bucketed, so these are other students' clusters
+    candidates = db.query(ResponseSignature.message_id, ResponseSignature.signature).filter(
+        ResponseSignature.message_id.in_(
+            db.query(ResponseBucket.message_id).filter_by(**scope).filter(ResponseBucket.band_key.in_(keys))
+        ),
+        ResponseSignature.user_id != conversation.user_id
+    ).order_by(ResponseSignature.message_id).all()
+
+    best_id, best_similarity = None, settings.SIMILARITY_THRESHOLD
+    for candidate_id, blob in candidates:
+        similarity = estimate_similarity(signature, _unpack(blob))
+        if similarity >= best_similarity and (best_id is None or similarity > best_similarity):
+            best_id, best_similarity = candidate_id, similarity
+
+    db.execute(insert(ResponseSignature).values(
+        message_id=message.id, user_id=conversation.user_id, signature=array("I", signature).tobytes(),
+        representative_id=best_id if best_id is not None else message.id, **scope
+    ))
+    if best_id is None:
+        db.execute(insert(ResponseBucket), [{"band_key": key, "message_id": message.id, **scope} for key in keys])
+        return []
+    match = {"message_id": message.id, "similar_message_id": best_id, "similarity": round(best_similarity, 4), **scope}
+    db.execute(insert(SimilarResponsePair).values(**match))
+    return [match]
+
+def _clusters(pairs) -> List[Dict[str, Any]]:
+    """Group links by the representative they point to"""
+    clusters: Dict[int, Dict[str, Any]] = {}
+    for pair in pairs:
+        cluster = clusters.setdefault(pair.similar_message_id, {
+            "assignment_id": pair.assignment_id, "topic": pair.topic, "stage": pair.stage,
+            "message_ids": set(), "max_similarity": 0.0
+        })
+        cluster["message_ids"].update((pair.message_id, pair.similar_message_id))
+        cluster["max_similarity"] = max(cluster["max_similarity"], pair.similarity)
+    return list(clusters.values())
+
+def similarity_report(db: Session, classroom_id: int, topic: Optional[str] = None,
+                      stage: Optional[str] = None, min_similarity: Optional[float] = None,
+                      assignment_id: Optional[int] = None) -> Dict[str, Any]:
+    """Clusters of near-duplicate responses in a class, largest first
+
+    Only links at or above SIMILARITY_THRESHOLD are stored, so a lower
+    min_similarity is raised to it.
+    """
+    threshold = max(settings.SIMILARITY_THRESHOLD, min_similarity or 0.0)
+    pairs = db.query(SimilarResponsePair).filter(
+        SimilarResponsePair.classroom_id == classroom_id,
+        SimilarResponsePair.similarity >= threshold
+    )
+    if assignment_id is not None:
+        pairs = pairs.filter(SimilarResponsePair.assignment_id == assignment_id)
+    if topic is not None:
+        pairs = pairs.filter(SimilarResponsePair.topic == normalize_topic(topic))
+    if stage is not None:
+        pairs = pairs.filter(SimilarResponsePair.stage == stage)
+    clusters = _clusters(pairs.all())
+
+    message_ids = set().union(*(cluster["message_ids"] for cluster in clusters))
+    members = {row.message_id: row for row in db.query(
+        SAWAMessage.id.label("message_id"), SAWAMessage.conversation_id, SAWAMessage.content,
+        SAWAConversation.user_id, User.username
+    ).join(SAWAConversation, SAWAConversation.id == SAWAMessage.conversation_id).join(
+        User, User.id == SAWAConversation.user_id
+    ).filter(SAWAMessage.id.in_(message_ids))} if message_ids else {}
+
+    report = []
+    for cluster in clusters:
+        rows = [members[message_id] for message_id in sorted(cluster["message_ids"]) if message_id in members]
+        report.append({
+            "assignment_id": cluster["assignment_id"],
+            "topic": cluster["topic"],
+            "stage": cluster["stage"],
+            "size": len(rows),
+            "students": len({row.user_id for row in rows}),
+            "max_similarity": cluster["max_similarity"],
+            "members": [{
+                "message_id": row.message_id,
+                "conversation_id": row.conversation_id,
+                "user_id": row.user_id,
+                "username": row.username,
+                "excerpt": row.content[:EXCERPT_CHARS],
+            } for row in rows],
+        })
+    report.sort(key=lambda cluster: (-cluster["students"], -cluster["max_similarity"]))
+    return {"classroom_id": classroom_id, "min_similarity": threshold, "clusters": report}
+
+def index_existing_responses(db: Session, batch_size: int = 500) -> int:
+    """Index class responses saved before similarity detection existed, oldest first; returns responses checked"""
+    checked = 0
+    last_id = 0
+    while True:
+        rows = db.query(SAWAMessage, SAWAConversation).join(
+            SAWAConversation, SAWAConversation.id == SAWAMessage.conversation_id
+        ).outerjoin(ResponseSignature, ResponseSignature.message_id == SAWAMessage.id).filter(
+            SAWAConversation.classroom_id.isnot(None),
+            SAWAMessage.message_type == MessageType.STUDENT_RESPONSE,
+            ResponseSignature.message_id.is_(None),
+            SAWAMessage.id > last_id
+        ).order_by(SAWAMessage.id).limit(batch_size).all()
+        if not rows:
+            return checked
+        for message, conversation in rows:
+            index_response(db, message, conversation)
+            last_id = message.id
+        db.commit()
+        checked += len(rows)
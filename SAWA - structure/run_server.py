@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 """
 Simple script to run the SAWA server with error handling
+
+Usage:
+    python run_server.py                # development server with auto-reload
+    python run_server.py --production   # the in-memory demo, one worker, no reload
+    python run_server.py --production --api   # database-backed API, one worker per CPU
+    python run_server.py --import-report  # per-module import timings
 """
 
 import sys
 import os
+import argparse
+import importlib.util
+import subprocess
 import uvicorn
 from pathlib import Path
 
@@ -13,38 +22,126 @@ current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
 def check_imports():
-    """Check if all required imports work"""
-    try:
-        print("Checking imports...")
-        
-        # Test basic imports
-        import fastapi
-        print("✓ FastAPI imported successfully")
-        
-        import uvicorn
-        print("✓ Uvicorn imported successfully")
-        
-        import sqlalchemy
-        print("✓ SQLAlchemy imported successfully")
-        
-        import pydantic
-        print("✓ Pydantic imported successfully")
-        
-        # Test app imports
-        from app.main import app
-        print("✓ SAWA app imported successfully")
-        
-        return True
-        
-    except ImportError as e:
-        print(f"✗ Import error: {e}")
-        return False
-    except Exception as e:
-        print(f"✗ Error: {e}")
-        return False
+    """Check if all required packages are installed without importing them
+
+    uvicorn imports the application itself (in a fresh subprocess when
+    reloading), so importing it here as well would only add to start-up time.
+    """
+    print("Checking imports...")
+    
+    for module, name in [
+        ("fastapi", "FastAPI"),
+        ("uvicorn", "Uvicorn"),
+        ("sqlalchemy", "SQLAlchemy"),
+        ("pydantic", "Pydantic"),
+        ("app.main", "SAWA app"),
+    ]:
+        if importlib.util.find_spec(module) is None:
+            print(f"✗ Import error: No module named '{module}'")
+            return False
+        print(f"✓ {name} found")
+    
+    return True
+
+def import_report(module: str = "app.main", top: int = 25):
+    """Print per-module import timings for a cold import of `module`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(current_dir), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(result.returncode)
+    
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((int(self_us), int(cumulative_us), name.strip()))
+    
+    total_us = sum(self_us for self_us, _, _ in timings)
+    print(f"Import of {module}: {len(timings)} modules, {total_us / 1000:.1f} ms total")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(timings, reverse=True)[:top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on (respects container CPU sets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# The demo keeps conversations in process memory: a second worker would hand
+# out its own conversation ids and answer 404 for the other's conversations
+DEMO_APP = "app.main:app"
+API_APP = "app.api:app"
+
+def production_options(workers=None, api: bool = False) -> dict:
+    """Build uvicorn options for a production launch"""
+    from app.core.config import settings
+
+    # uvloop and httptools are only used when installed (uvicorn[standard])
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    return {
+        "host": settings.HOST,
+        "port": settings.PORT,
+        "workers": (workers or settings.WORKERS or available_cpus()) if api else 1,
+        "reload": False,
+        "loop": loop,
+        "http": http,
+        "timeout_keep_alive": settings.KEEP_ALIVE_TIMEOUT,
+        "backlog": settings.BACKLOG,
+        "limit_concurrency": settings.LIMIT_CONCURRENCY,
+        # On SIGTERM uvicorn stops accepting connections and waits this long
+        # for in-flight dialogue turns to finish before closing them
+        "timeout_graceful_shutdown": settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+        "access_log": False,
+        "log_level": "info",
+    }
+
+def run_production(workers=None, api: bool = False):
+    """Run the server in production mode"""
+    options = production_options(workers, api)
+    print("SAWA - Scientific Argumentative Writing Assistant (production)")
+    if not api and (workers or 1) > 1:
+        print("⚠️  The in-memory demo runs as one worker; use --api to serve the database-backed API on several")
+    print(f"Workers: {options['workers']}  loop: {options['loop']}  http: {options['http']}")
+    print(f"Keep-alive: {options['timeout_keep_alive']}s  backlog: {options['backlog']}  "
+          f"graceful shutdown: {options['timeout_graceful_shutdown']}s")
+    from app.core.config import settings
+    if options["workers"] > 1 and not settings.IDEMPOTENCY_BACKEND_URL:
+        print("⚠️  Idempotency-Key retries only hold within one worker; "
+              "set IDEMPOTENCY_BACKEND_URL to share them across workers")
+    if options["workers"] > 1 and not settings.EVENTS_BACKEND_URL:
+        print("⚠️  Event streams only see turns served by their own worker; "
+              "set EVENTS_BACKEND_URL to share them across workers")
+    uvicorn.run(API_APP if api else DEMO_APP, **options)
 
 def main():
     """Main function to run the server"""
+    parser = argparse.ArgumentParser(description="Run the SAWA server")
+    parser.add_argument("--production", action="store_true",
+                        help="Run without auto-reload")
+    parser.add_argument("--api", action="store_true",
+                        help="Serve the database-backed API (app/api.py) instead of the in-memory demo")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --production --api (default: CPU count); the demo always runs one")
+    parser.add_argument("--import-report", action="store_true",
+                        help="Print per-module import timings for app.main and exit")
+    args = parser.parse_args()
+
+    if args.import_report:
+        import_report()
+        return
+
+    if args.production:
+        run_production(args.workers, args.api)
+        return
+
     print("SAWA - Scientific Argumentative Writing Assistant")
     print("=" * 50)
     
@@ -54,7 +151,7 @@ def main():
         print("pip install -r requirements.txt")
         sys.exit(1)
     
-    print("\n✅ All imports successful!")
+    print("\n✅ All dependencies found!")
     print("\nStarting SAWA server...")
     print("📖 Documentation will be available at: http://localhost:8000/docs")
     print("🔗 API root: http://localhost:8000")
@@ -64,7 +161,7 @@ def main():
     try:
         # Run the server
         uvicorn.run(
-            "app.main:app",
+            API_APP if args.api else DEMO_APP,
             host="0.0.0.0",
             port=8000,
             reload=True,
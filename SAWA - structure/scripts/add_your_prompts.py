@@ -1,75 +1,49 @@
 """
 Script to add your original SAWA prompt concepts and processes
+
+Writes a new content pack, a copy of the built-in rubric under your pack
+name, for you to edit: the questions asked in each stage, the nudges per
+level, and the level descriptions, example responses, Socratic prompts and
+feedback templates per facet. Load it with
+scripts/load_content_pack.py and serve it by setting CONTENT_PACK.
+
+Usage:
+    python scripts/add_your_prompts.py --pack biology-101 --output content/biology-101.json
+    python scripts/add_your_prompts.py --pack biologia-101 --language es --title "Biología 101" --output content/biologia-101.json
 """
 
 import sys
 import os
+import json
+import argparse
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models.prompt import Prompt
-from app.models.user import User
-from app.core.auth import get_password_hash
+from app.services.catalog import builtin_pack
+
+def main():
+    parser = argparse.ArgumentParser(description="Start a SAWA content pack from the built-in rubric")
+    parser.add_argument("--pack", required=True, help="Pack name, e.g. a course or course-language")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--title", default=None)
+    parser.add_argument("--output", required=True, help="Where to write the pack JSON")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        print(f"❌ {args.output} already exists; edit it and load it with scripts/load_content_pack.py")
+        sys.exit(1)
+
+    pack = {**builtin_pack(), "pack": args.pack, "language": args.language, "title": args.title}
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(pack, f, indent=2, ensure_ascii=False)
+        f.write("\n")
 
-def add_your_prompts():
-    """Add your original prompt concepts and processes"""
-    db = SessionLocal()
-    
-    try:
-        # Get or create a teacher user
-        teacher = db.query(User).filter(User.username == "teacher").first()
-        if not teacher:
-            teacher = User(
-                email="teacher@sawa.edu",
-                username="teacher",
-                full_name="Dr. Science Teacher",
-                hashed_password=get_password_hash("teacher123"),
-                is_teacher=True
-            )
-            db.add(teacher)
-            db.commit()
-            db.refresh(teacher)
-        
-        # ADD YOUR ORIGINAL PROMPT CONCEPTS HERE
-        your_prompts = [
-            {
-                "title": "YOUR_PROMPT_TITLE_1",
-                "content": "YOUR_PROMPT_CONTENT_1 - Replace this with your actual prompt content",
-                "category": "YOUR_CATEGORY_1",  # e.g., "scientific_method", "argumentation", "evidence_evaluation"
-                "difficulty_level": "YOUR_LEVEL_1",  # "beginner", "intermediate", "advanced"
-                "subject_area": "YOUR_SUBJECT_1",  # e.g., "biology", "chemistry", "physics"
-                "expected_elements": '["element1", "element2", "element3"]'  # JSON string of expected elements
-            },
-            {
-                "title": "YOUR_PROMPT_TITLE_2",
-                "content": "YOUR_PROMPT_CONTENT_2 - Replace this with your actual prompt content",
-                "category": "YOUR_CATEGORY_2",
-                "difficulty_level": "YOUR_LEVEL_2",
-                "subject_area": "YOUR_SUBJECT_2",
-                "expected_elements": '["element1", "element2", "element3"]'
-            },
-            # Add more prompts as needed
-        ]
-        
-        for prompt_data in your_prompts:
-            prompt = Prompt(
-                **prompt_data,
-                created_by=teacher.id
-            )
-            db.add(prompt)
-        
-        db.commit()
-        print("✅ Your original prompts added successfully!")
-        print(f"Added {len(your_prompts)} prompts")
-        
-    except Exception as e:
-        print(f"❌ Error adding prompts: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    print(f"✅ Wrote content pack {args.pack!r} to {args.output}")
+    print("⚠️  Edit it to include your actual prompt content, then run:")
+    print(f"   python scripts/load_content_pack.py {args.output}")
+    print(f"   CONTENT_PACK={args.pack} python run_server.py")
 
 if __name__ == "__main__":
-    print("📝 Adding your original SAWA prompt concepts and processes...")
-    print("⚠️  Please edit this script to include your actual prompt content")
-    add_your_prompts()
+    main()
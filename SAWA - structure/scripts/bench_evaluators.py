@@ -0,0 +1,200 @@
+"""
+Micro-benchmark the six rubric evaluators and gate on regressions
+
+Builds a corpus per stage from the seeded rubric examples, synthetic long
+answers and adversarial inputs. Measures scoring latency and peak allocation
+per stage for SAWAService._evaluate_*. The results are compared with the
+baseline stored in scripts/bench_evaluators_baseline.json, and the script
+exits with status 1 when a stage got slower or allocates more by more than
+--threshold percent.
+
+Timings are compared relative to a reference scorer run over the same
+corpus: lowercasing, substring scans that never match (so they read the
+whole answer, like an evaluator that falls through every level) and word
+splitting. The reference is timed in the same rounds as each stage and the
+median per-round ratio is compared, so a baseline recorded on other hardware,
+or a machine that speeds up or slows down during the run, does not show up
+as a regression. --absolute compares raw nanoseconds per call instead, for a
+baseline recorded on the same machine.
+
+Usage:
+    python scripts/bench_evaluators.py                     # compare with the baseline (CI)
+    python scripts/bench_evaluators.py --threshold 15
+    python scripts/bench_evaluators.py --update-baseline   # after an intended change
+"""
+
+import sys
+import os
+import gc
+import json
+import argparse
+import statistics
+import time
+import platform
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Evaluators need no database; keep the engine off any configured server
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.services.sawa_service import SAWAService
+from scripts.seed_sawa_rubric import rubric_entries
+
+STAGES = ["claim", "evidence", "reasoning", "backing", "qualifier", "rebuttal"]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_evaluators_baseline.json")
+
+# Inputs that have tripped up keyword scorers: empty, whitespace, no spaces,
+# keyword stuffing, non-ASCII, markup and very long single words
+ADVERSARIAL = [
+    "",
+    " ",
+    "\n\t\n",
+    "a" * 5000,
+    "is " * 2000,
+    "however though limit scope concede " * 200,
+    "Ünïcödé — «клaim» 主张 🧪 " * 50,
+    "<script>alert('x')</script> " * 100,
+    "because the study the data shows " * 300,
+    "1.2°C 80–95% p<0.05 " * 250,
+]
+
+def build_corpus() -> dict:
+    """Answers to score for each stage"""
+    examples = {stage: [] for stage in STAGES}
+    for entry in rubric_entries():
+        examples[entry["facet"]].extend(entry["example_responses"].split("\n"))
+
+    corpus = {}
+    for stage in STAGES:
+        joined = " ".join(examples[stage])
+        synthetic = [
+            # Long essays: the examples repeated to roughly 500 and 5,000 words
+            " ".join([joined] * max(1, 500 // len(joined.split()))),
+            " ".join([joined] * max(1, 5000 // len(joined.split()))),
+        ]
+        corpus[stage] = examples[stage] + synthetic + ADVERSARIAL
+    return corpus
+
+# Never in the corpus, so every check scans the whole answer
+REFERENCE_WORDS = ["qzxv", "jqwk", "vxzq", "kqjz", "zvqx", "wqjx"]
+
+def reference_scorer(response: str) -> int:
+    """The work an evaluator does, without its keywords: what stage timings are divided by"""
+    response_lower = response.lower()
+    if any(word in response_lower for word in REFERENCE_WORDS):
+        return 1
+    if any(word in response_lower for word in REFERENCE_WORDS[::-1]):
+        return 2
+    return 3 if len(response.split()) < 10 else 4
+
+def time_pass(evaluate, answers: list, number: int) -> float:
+    """Nanoseconds per evaluation for `number` passes over the answers"""
+    start = time.perf_counter_ns()
+    for _ in range(number):
+        for answer in answers:
+            evaluate(answer)
+    return (time.perf_counter_ns() - start) / (number * len(answers))
+
+def time_stage(evaluate, answers: list, repeat: int, number: int) -> tuple:
+    """Best-of-`repeat` ns per evaluation, and the median ratio to the reference timed in the same rounds"""
+    best = float("inf")
+    ratios = []
+    for _ in range(repeat):
+        reference = time_pass(reference_scorer, answers, number)
+        ns = time_pass(evaluate, answers, number)
+        best = min(best, ns)
+        ratios.append(ns / reference)
+    return best, statistics.median(ratios)
+
+def peak_allocation(evaluate, answers: list) -> int:
+    """Largest peak of traced memory while scoring one answer"""
+    peak = 0
+    tracemalloc.start()
+    try:
+        for answer in answers:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            evaluate(answer)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def run(repeat: int, number: int) -> dict:
+    """Measure every stage"""
+    service = SAWAService(db=None)
+    corpus = build_corpus()
+    stages = {}
+    gc.disable()
+    try:
+        for stage in STAGES:
+            evaluate = getattr(service, f"_evaluate_{stage}")
+            evaluate(corpus[stage][0])  # Warm up
+            ns, relative = time_stage(evaluate, corpus[stage], repeat, number)
+            stages[stage] = {
+                "inputs": len(corpus[stage]),
+                "ns_per_call": round(ns, 1),
+                "relative": round(relative, 4),  # Time per call / reference scorer's on the same corpus
+                "peak_alloc_bytes": peak_allocation(evaluate, corpus[stage]),
+            }
+    finally:
+        gc.enable()
+    return {
+        "python": platform.python_version(),
+        "stages": stages,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float, absolute: bool) -> list:
+    """Regression messages for stages beyond the threshold"""
+    failures = []
+    print(f"{'stage':<10} {'ns/call':>10} {'baseline':>10} {'change':>8} {'peak B':>8} {'baseline':>9}")
+    for stage in STAGES:
+        now, before = current["stages"][stage], baseline["stages"].get(stage)
+        if before is None:
+            print(f"{stage:<10} {now['ns_per_call']:>10.0f} {'(new)':>10}")
+            continue
+        metric = "ns_per_call" if absolute else "relative"
+        time_change = (now[metric] / before[metric] - 1) * 100
+        alloc_change = (now["peak_alloc_bytes"] / max(before["peak_alloc_bytes"], 1) - 1) * 100
+        mark = "❌" if time_change > threshold or alloc_change > threshold else "✅"
+        print(f"{stage:<10} {now['ns_per_call']:>10.0f} {before['ns_per_call']:>10.0f} {time_change:>+7.1f}% "
+              f"{now['peak_alloc_bytes']:>8} {before['peak_alloc_bytes']:>9} {mark}")
+        if time_change > threshold:
+            failures.append(f"{stage}: {time_change:+.1f}% time (threshold {threshold}%)")
+        if alloc_change > threshold:
+            failures.append(f"{stage}: {alloc_change:+.1f}% peak allocation (threshold {threshold}%)")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rubric evaluators")
+    parser.add_argument("--threshold", type=float, default=25.0, help="Allowed slowdown per stage in percent")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed runs per stage; the fastest counts")
+    parser.add_argument("--number", type=int, default=5, help="Passes over the corpus per run")
+    parser.add_argument("--absolute", action="store_true",
+                        help="Compare raw ns per call (only for a baseline recorded on this machine)")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Write results to {os.path.basename(BASELINE_PATH)}")
+    args = parser.parse_args()
+
+    current = run(args.repeat, args.number)
+
+    if args.update_baseline or not os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        for stage, stats in current["stages"].items():
+            print(f"{stage:<10} {stats['ns_per_call']:>10.0f} ns/call {stats['peak_alloc_bytes']:>8} B peak")
+        print(f"📝 Baseline written to {BASELINE_PATH}")
+        return
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    failures = compare(current, baseline, args.threshold, args.absolute)
+    if failures:
+        print("\n❌ Evaluator performance regressed:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("\n✅ All stages within threshold of the baseline")
+
+if __name__ == "__main__":
+    main()
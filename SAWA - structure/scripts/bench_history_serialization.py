@@ -0,0 +1,103 @@
+"""
+Benchmark conversation history serialization: ORM + model validation
+versus the row-tuple fast path
+
+Seeds an in-memory SQLite database with conversations of 10, 100 and 1,000
+messages and times both paths end to end (query + serialization).
+
+Usage:
+    python scripts/bench_history_serialization.py [--repeat 50]
+"""
+
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Benchmark against a throwaway in-memory database
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from app.database import Base, engine, SessionLocal
+from app.models.user import User
+from app.models.sawa_conversation import SAWAConversation, SAWAStage
+from app.models.sawa_message import SAWAMessage, MessageType
+from app.schemas.sawa import SAWAHistoryResponse
+from app.services.sawa_service import SAWAService
+from app.core import serialization
+
+MESSAGE_COUNTS = [10, 100, 1000]
+
+def seed_conversation(db, message_count: int) -> int:
+    """Create a conversation with `message_count` messages"""
+    conversation = SAWAConversation(
+        user_id=1,
+        topic="GMO safety",
+        current_stage=SAWAStage.EVIDENCE,
+        stage_iteration=2,
+        claim_response="GMO crops are generally safe for human health under most conditions.",
+        claim_score=4
+    )
+    db.add(conversation)
+    db.flush()
+
+    message_types = [MessageType.SOCRATIC_QUESTION, MessageType.STUDENT_RESPONSE, MessageType.FEEDBACK_NUDGE]
+    db.add_all([
+        SAWAMessage(
+            conversation_id=conversation.id,
+            message_type=message_types[i % 3],
+            content=f"Message {i}: Where does this evidence come from, and why should your audience trust it?",
+            stage=SAWAStage.EVIDENCE.value,
+            iteration=i // 3,
+            rubric_score=2 if i % 3 == 1 else None,
+            feedback_triggered=i % 3 != 0
+        )
+        for i in range(message_count)
+    ])
+    db.commit()
+    return conversation.id
+
+def orm_path(service: SAWAService, conversation_id: int) -> bytes:
+    """What FastAPI does with response_model: validate ORM objects, then encode"""
+    history = service.get_conversation_history(conversation_id)
+    return SAWAHistoryResponse.model_validate(history, from_attributes=True).model_dump_json().encode()
+
+def fast_path(service: SAWAService, conversation_id: int) -> bytes:
+    """Row tuples straight to JSON"""
+    return service.get_conversation_history_json(conversation_id)
+
+def time_path(path, service: SAWAService, conversation_id: int, repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        service.db.expire_all()
+        start = time.perf_counter()
+        path(service, conversation_id)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history serialization")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(email="bench@sawa.edu", username="bench", hashed_password="x"))
+    db.commit()
+    service = SAWAService(db)
+
+    encoder = "orjson" if serialization.orjson is not None else "json (install orjson for the full speed-up)"
+    print(f"Encoder: {encoder}")
+    print(f"{'messages':>9} {'orm+model ms':>13} {'fast path ms':>13} {'speedup':>8}")
+    for count in MESSAGE_COUNTS:
+        conversation_id = seed_conversation(db, count)
+        orm_ms = time_path(orm_path, service, conversation_id, args.repeat)
+        fast_ms = time_path(fast_path, service, conversation_id, args.repeat)
+        print(f"{count:>9} {orm_ms:>13.3f} {fast_ms:>13.3f} {orm_ms / fast_ms:>7.1f}x")
+
+    db.close()
+
+if __name__ == "__main__":
+    main()
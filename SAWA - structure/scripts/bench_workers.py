@@ -0,0 +1,145 @@
+"""
+Script to compare SAWA throughput with one worker versus N workers
+
+Starts the production launcher for the database-backed API twice on a free
+port (--workers 1, then --workers N), against a throwaway SQLite database
+seeded with the built-in rubric, drives each with concurrent keep-alive
+clients and prints requests per second and latency percentiles for both
+runs. (The in-memory demo always runs as one worker.)
+
+Usage:
+    python scripts/bench_workers.py [--workers N] [--clients 32] [--seconds 10]
+"""
+
+import sys
+import os
+import time
+import json
+import socket
+import argparse
+import subprocess
+import http.client
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from run_server import available_cpus
+
+# Mix of a tiny turn-sized payload and a larger static payload
+BENCH_PATHS = ["/health", "/api/sawa/rubric/claim", "/api/sawa/rebuttal-strategies"]
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(port: int, timeout: float = 30.0):
+    """Poll /health until the server answers"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+def client_loop(port: int, stop_at: float, latencies: list, errors: list):
+    """Issue requests over one keep-alive connection until stop_at"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    i = 0
+    while time.time() < stop_at:
+        path = BENCH_PATHS[i % len(BENCH_PATHS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException):
+            errors.append("connection")
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+def run_benchmark(workers: int, clients: int, seconds: float, database_env: dict) -> dict:
+    """Start a production API server with `workers` processes and load it"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", **database_env)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "run_server.py", "--production", "--api", "--workers", str(workers)],
+        cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(port)
+        latencies, errors = [], []
+        stop_at = time.time() + seconds
+        threads = [
+            threading.Thread(target=client_loop, args=(port, stop_at, latencies, errors))
+            for _ in range(clients)
+        ]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    latencies.sort()
+    return {
+        "workers": workers,
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare 1 worker vs N workers")
+    parser.add_argument("--workers", type=int, default=available_cpus())
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"🔄 Benchmarking 1 worker vs {args.workers} workers "
+          f"({args.clients} clients, {args.seconds:.0f}s each)...")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as directory:
+        database_env = {
+            "DATABASE_URL": f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            "BACKGROUND_TASKS_PATH": os.path.join(directory, "tasks.db"),
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        subprocess.run([sys.executable, "scripts/init_db.py"], cwd=root, env=dict(os.environ, **database_env),
+                       check=True, stdout=subprocess.DEVNULL)
+        single = run_benchmark(1, args.clients, args.seconds, database_env)
+        multi = run_benchmark(args.workers, args.clients, args.seconds, database_env)
+
+    speedup = multi["requests_per_second"] / single["requests_per_second"] if single["requests_per_second"] else 0.0
+    print(json.dumps({"single": single, "multi": multi, "speedup": round(speedup, 2)}, indent=2))
+    if args.workers > 1 and available_cpus() < 2:
+        print("⚠️  Only one CPU is available here, so extra workers cannot add throughput")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Sign and bucket class responses saved before similarity detection existed
+
+New responses are indexed as they are saved; run this once on an existing
+database so they are also compared with older ones. Responses are processed
+oldest first, exactly as if they had arrived one by one. Safe to run again:
+indexed responses are skipped.
+
+Usage:
+    python scripts/build_similarity_index.py
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.similarity import index_existing_responses
+from app.services.evaluation_scheduler import evaluation_scheduler, BATCH
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the near-duplicate index for existing class responses")
+    parser.add_argument("--batch-size", type=int, default=500, help="Responses per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        checked = evaluation_scheduler.submit(
+            index_existing_responses, db, batch_size=args.batch_size, lane=BATCH, key="similarity"
+        ).result()
+    finally:
+        db.close()
+    print(f"✅ Checked {checked} responses")
+
+if __name__ == "__main__":
+    main()
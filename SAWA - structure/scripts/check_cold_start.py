@@ -0,0 +1,69 @@
+"""
+Regression check for SAWA cold start time
+
+Launches a single production worker, measures the time from process start
+until the first request is answered, and exits non-zero when that exceeds
+the budget. Run it in CI before deploying:
+
+    python scripts/check_cold_start.py --budget 3.0 --runs 3
+"""
+
+import sys
+import os
+import time
+import argparse
+import subprocess
+import http.client
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from scripts.bench_workers import free_port
+
+DEFAULT_BUDGET_SECONDS = float(os.getenv("COLD_START_BUDGET", "3.0"))
+
+def time_to_first_request(path: str = "/health", timeout: float = 60.0) -> float:
+    """Seconds from launching the server until `path` answers 200"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), HOST="127.0.0.1")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "run_server.py", "--production", "--workers", "1"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", path)
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+        raise RuntimeError(f"No response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if time-to-first-request exceeds a budget")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="Maximum allowed seconds (default: $COLD_START_BUDGET or 3.0)")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to measure; the best is compared")
+    parser.add_argument("--path", default="/health")
+    args = parser.parse_args()
+
+    samples = [time_to_first_request(args.path) for _ in range(args.runs)]
+    best = min(samples)
+    print("Cold start samples: " + ", ".join(f"{sample:.2f}s" for sample in samples))
+
+    if best > args.budget:
+        print(f"❌ Time to first request {best:.2f}s exceeds budget of {args.budget:.2f}s")
+        print("💡 Run `python run_server.py --import-report` to see which imports are slow")
+        sys.exit(1)
+    print(f"✅ Time to first request {best:.2f}s is within budget of {args.budget:.2f}s")
+
+if __name__ == "__main__":
+    main()
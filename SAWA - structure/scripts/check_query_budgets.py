@@ -0,0 +1,168 @@
+"""
+Check that each API endpoint stays within its SQL query budget
+
+Drives the auth and SAWA routers against a throwaway SQLite database and
+fails when an endpoint runs more statements than QUERY_BUDGETS allows or
+repeats one statement shape often enough to look like an N+1 lazy load.
+Run it before deploying; lower a budget when an endpoint gets cheaper.
+
+Usage:
+    python scripts/check_query_budgets.py [--repeat-threshold 3]
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Throwaway database; background tasks are left queued so their writes are not counted
+CHECK_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(CHECK_DIR, 'budgets.db')}"
+os.environ["BACKGROUND_TASKS_PATH"] = os.path.join(CHECK_DIR, "tasks.db")
+os.environ["BACKGROUND_TASK_WORKERS"] = "0"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import Base, engine
+from app.database import SessionLocal
+from app.models import user, sawa_conversation, sawa_message, sawa_rubric, classroom, class_analytics, similarity  # noqa: F401 (register tables)
+from app.routers import auth, sawa, teacher
+from app.services.question_bank import question_bank
+from app.services.background_tasks import background_tasks
+from app.core.query_budget import count_queries
+from scripts.seed_sawa_rubric import seed_sawa_rubric
+from app.services.catalog import catalog_store
+
+# Maximum statements per request
+QUERY_BUDGETS = {
+    "POST /api/auth/register": 3,
+    "POST /api/auth/login": 1,
+    "GET /api/auth/me": 1,
+    "POST /api/sawa/start": 6,  # Includes the batch-lane lookup of the new topic's question bank
+    "POST /api/sawa/respond (feedback)": 6,
+    "POST /api/sawa/respond (advance)": 6,
+    "GET /api/sawa/history/{id}": 3,
+    "GET /api/sawa/conversations": 2,
+    "GET /api/sawa/rubric/{facet}": 0,  # Served from the in-memory catalog
+    "POST /api/teacher/classes/{id}/students": 5,
+    "POST /api/sawa/start (class)": 7,
+    "POST /api/sawa/respond (class)": 10,
+    "GET /api/teacher/classes/{id}/analytics": 4,
+    "GET /api/teacher/search": 3,
+    "GET /api/teacher/classes/{id}/similarity": 4,
+    "POST /api/teacher/classes/{id}/assignments": 8,
+    "POST /api/sawa/assignments/{id}/resume": 4,
+}
+
+def build_client() -> TestClient:
+    """The DB-backed routers, mounted the way a deployment would"""
+    Base.metadata.create_all(bind=engine)
+    seed_sawa_rubric()
+    catalog_store.load()  # Warm-up does this in a deployment
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/auth")
+    app.include_router(sawa.router, prefix="/api/sawa")
+    app.include_router(teacher.router, prefix="/api/teacher")
+    return TestClient(app)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check per-endpoint SQL query budgets")
+    parser.add_argument("--repeat-threshold", type=int, default=3,
+                        help="Flag a statement shape run this many times in one request")
+    args = parser.parse_args()
+
+    client = build_client()
+    failures = []
+
+    def check(name: str, method: str, url: str, **kwargs):
+        with count_queries() as stats:
+            response = getattr(client, method)(url, **kwargs)
+        if response.status_code >= 400:
+            failures.append(f"{name}: HTTP {response.status_code} {response.text[:200]}")
+        budget = QUERY_BUDGETS[name]
+        mark = "✅" if stats.count <= budget else "❌"
+        print(f"{mark} {name:<42} {stats.count:>3} queries (budget {budget:>2}) {stats.seconds * 1000:7.2f} ms")
+        if stats.count > budget:
+            failures.append(f"{name}: {stats.count} queries, budget {budget}")
+        for shape, count in stats.repeated(args.repeat_threshold):
+            print(f"   ⚠️  {count}x {shape}")
+            failures.append(f"{name}: possible N+1, {count}x {shape}")
+        return response
+
+    credentials = {"username": "budget", "password": "budget-check"}
+    check("POST /api/auth/register", "post", "/api/auth/register",
+          json={"email": "budget@sawa.edu", "full_name": "Budget Check", **credentials})
+    token = check("POST /api/auth/login", "post", "/api/auth/login", data=credentials).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    check("GET /api/auth/me", "get", "/api/auth/me", headers=headers)
+
+    conversation_id = check("POST /api/sawa/start", "post", "/api/sawa/start",
+                            json={"topic": "GMO safety"}, headers=headers).json()["conversation_id"]
+    check("POST /api/sawa/respond (feedback)", "post", "/api/sawa/respond",
+          json={"conversation_id": conversation_id, "content": "GMOs are food"}, headers=headers)
+    check("POST /api/sawa/respond (advance)", "post", "/api/sawa/respond",
+          json={"conversation_id": conversation_id,
+                "content": "Studies suggest GMO crops are generally safe to eat under current regulatory testing conditions"},
+          headers=headers)
+    check("GET /api/sawa/history/{id}", "get", f"/api/sawa/history/{conversation_id}", headers=headers)
+    check("GET /api/sawa/conversations", "get", "/api/sawa/conversations", headers=headers)
+    check("GET /api/sawa/rubric/{facet}", "get", "/api/sawa/rubric/claim", headers=headers)
+
+    # Class-scoped sessions also update the analytics aggregates
+    teacher_credentials = {"username": "budget-teacher", "password": "budget-check"}
+    client.post("/api/auth/register", json={"email": "teacher@sawa.edu", **teacher_credentials})
+    db = SessionLocal()
+    db.query(user.User).filter(user.User.username == "budget-teacher").update({"is_teacher": True})
+    db.commit()
+    db.close()
+    teacher_token = client.post("/api/auth/login", data=teacher_credentials).json()["access_token"]
+    teacher_headers = {"Authorization": f"Bearer {teacher_token}"}
+    classroom_id = client.post("/api/teacher/classes", json={"name": "Budget class"},
+                               headers=teacher_headers).json()["id"]
+    check("POST /api/teacher/classes/{id}/students", "post", f"/api/teacher/classes/{classroom_id}/students",
+          json={"usernames": ["budget"]}, headers=teacher_headers)
+    conversation_id = check("POST /api/sawa/start (class)", "post", "/api/sawa/start",
+                            json={"topic": "GMO safety", "classroom_id": classroom_id},
+                            headers=headers).json()["conversation_id"]
+    # Long enough to be signed and checked for near-duplicates
+    check("POST /api/sawa/respond (class)", "post", "/api/sawa/respond",
+          json={"conversation_id": conversation_id,
+                "content": "GMOs are food that some people worry about but most studies find them safe"},
+          headers=headers)
+    check("GET /api/teacher/classes/{id}/analytics", "get", f"/api/teacher/classes/{classroom_id}/analytics",
+          headers=teacher_headers)
+    check("GET /api/teacher/search", "get", "/api/teacher/search",
+          params={"q": "GMOs", "classroom_id": classroom_id}, headers=teacher_headers)
+    check("GET /api/teacher/classes/{id}/similarity", "get", f"/api/teacher/classes/{classroom_id}/similarity",
+          headers=teacher_headers)
+
+    # The bulk launch runs the same statements for one student or a whole roster; the topic's
+    # question bank is written once per topic, so it is not part of the steady-state cost
+    question_bank.ensure("GMO safety")
+    assignment_id = check("POST /api/teacher/classes/{id}/assignments", "post",
+                          f"/api/teacher/classes/{classroom_id}/assignments",
+                          json={"topic": "GMO safety"}, headers=teacher_headers).json()["assignment_id"]
+    assignment_conversation_id = check("POST /api/sawa/assignments/{id}/resume", "post",
+                                       f"/api/sawa/assignments/{assignment_id}/resume",
+                                       headers=headers).json()["conversation_id"]
+
+    # Resuming after a feedback loop returns the open question, not the nudge saved after it
+    reply = client.post("/api/sawa/respond", json={"conversation_id": assignment_conversation_id,
+                                                   "content": "GMOs are food"}, headers=headers).json()
+    background_tasks.run_pending()
+    resumed = client.post(f"/api/sawa/assignments/{assignment_id}/resume", headers=headers).json()
+    if reply["message"].rsplit("\n\n", 1)[-1] != resumed["message"]:
+        failures.append(f"Resume after a feedback loop returned {resumed['message']!r}")
+
+    if failures:
+        print("\n❌ Query budget check failed:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("\n✅ All endpoints within their query budgets")
+
+if __name__ == "__main__":
+    main()
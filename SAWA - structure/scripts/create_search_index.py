@@ -0,0 +1,32 @@
+"""
+Create the full-text search index on an existing database
+
+New databases get it from Base.metadata.create_all(). Run this once on a
+database created before search existed: it adds the tsvector column and GIN
+index (PostgreSQL) or the FTS5 table and triggers (SQLite), then indexes the
+student responses already stored. Safe to run again.
+
+Usage:
+    python scripts/create_search_index.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.search import create_search_index, SearchUnavailable
+
+def main():
+    db = SessionLocal()
+    try:
+        dialect = create_search_index(db)
+    except SearchUnavailable as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    print(f"✅ Full-text search index ready ({dialect})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Export conversations, stage scores and messages for research
+
+Streams the database into Hive-partitioned Parquet (or Arrow IPC) files in
+bounded memory. Read the result with DuckDB or pandas:
+
+    SELECT * FROM read_parquet('export/stage_scores/**/*.parquet', hive_partitioning = true);
+    pandas.read_parquet("export/messages")
+
+Usage:
+    python scripts/export_research_data.py --output export/                       # full export
+    python scripts/export_research_data.py --output export/ --incremental         # rows changed since the last run
+    python scripts/export_research_data.py --output export/ --anonymize --format arrow
+"""
+
+import sys
+import os
+import json
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.services.research_export import export_research_data, FORMATS, PARQUET
+from app.services.evaluation_scheduler import evaluation_scheduler, BATCH
+
+def main():
+    parser = argparse.ArgumentParser(description="Export SAWA data to partitioned columnar files")
+    parser.add_argument("--output", required=True, help="Directory for the partitioned files and watermark")
+    parser.add_argument("--format", choices=FORMATS, default=PARQUET)
+    parser.add_argument("--anonymize", action="store_true",
+                        help="Replace user_id with a keyed hash (needs RESEARCH_EXPORT_SALT)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rows changed since the watermark of the previous run in --output")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows held in memory per table at a time")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = evaluation_scheduler.submit(
+            export_research_data, db, args.output, fmt=args.format, anonymize=args.anonymize,
+            salt=settings.RESEARCH_EXPORT_SALT, incremental=args.incremental, batch_size=args.batch_size,
+            lane=BATCH, key="export"
+        ).result()
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    for table, counts in result["tables"].items():
+        print(f"✅ {table:<14} {counts['rows']:>9} rows in {counts['files']} files")
+    print(f"📝 Watermark: {json.dumps(result['watermark'])}")
+    print(f"⏱️  {result['seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Create the SAWA tables and seed the built-in rubric
+
+Creates every table the database-backed API (app/api.py) uses that does not
+exist yet, including the full-text search index, then loads the built-in
+content pack. Safe to run on every start; databases created before a schema
+change also need the upgrade scripts named in README.md.
+
+Usage:
+    python scripts/init_db.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import Base, engine
+from app.models import (  # noqa: F401 (register tables)
+    user, sawa_conversation, sawa_message, sawa_rubric, classroom, class_analytics, similarity, question_bank
+)
+from scripts.seed_sawa_rubric import seed_sawa_rubric
+
+def init_db():
+    Base.metadata.create_all(bind=engine)
+    print(f"✅ Tables ready ({engine.dialect.name})")
+    seed_sawa_rubric()
+
+if __name__ == "__main__":
+    init_db()
@@ -0,0 +1,49 @@
+"""
+Load rubric content packs (courses, languages) into the database
+
+Each file is a complete pack in the format of app/content/default.json. The
+stored rows are diffed against the files and only the difference is written,
+all packs in one transaction, followed by a new catalog version that workers
+pick up on their next refresh. Re-running with unchanged files writes nothing.
+
+Usage:
+    python scripts/load_content_pack.py content/biology-101.json content/biologia-101-es.json
+    python scripts/load_content_pack.py content/*.json --dry-run    # show the diff only
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.content_packs import load_packs, read_pack, ContentPackError
+
+def main():
+    parser = argparse.ArgumentParser(description="Load SAWA rubric content packs")
+    parser.add_argument("paths", nargs="+", help="Content pack JSON files")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing it")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = load_packs(db, [read_pack(path) for path in args.paths], dry_run=args.dry_run)
+    except ContentPackError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    for name, counts in result["packs"].items():
+        print(f"✅ {name:<20} {counts['inserted']:>3} added {counts['updated']:>3} updated "
+              f"{counts['deleted']:>3} removed {counts['unchanged']:>3} unchanged")
+    if result["dry_run"]:
+        print("📝 Dry run: nothing was written")
+    elif result["version"] is not None:
+        print(f"📝 Published catalog version {result['version']}")
+    else:
+        print("📝 Rubric content already up to date")
+    print(f"⏱️  {result['seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Classroom load test: N simulated students walking full Toulmin sessions
+
+Each student logs in, starts a conversation and answers stage after stage
+until the prep sheet is produced. Answers are drawn from the seeded rubric
+examples: weak ones (levels 1-2) with probability --weak-ratio, otherwise
+strong ones (levels 3-4), with a randomised think time between turns.
+Prints (or writes) a JSON report with throughput, per-stage latency
+percentiles and error rates, so capacity can be compared across releases.
+
+Sessions that never get an answer accepted within --max-turns-per-stage are
+reported as "stuck"; with the rule-based evaluator some strong rubric
+examples still score below the threshold.
+
+Works against the DB-backed API (registers and logs in each student) and
+against the demo app in app/main.py (no auth endpoints; login is skipped).
+
+Usage:
+    python scripts/load_test_classroom.py --url http://127.0.0.1:8000 --students 30
+    python scripts/load_test_classroom.py --students 100 --think-time 5 --weak-ratio 0.4 --output report.json
+
+The per-IP rate limit applies to a load test run from one machine; start the
+target with RATE_LIMIT_ENABLED=false to measure raw capacity. Throttled
+requests (429/503) are retried after Retry-After and reported separately.
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlencode, urlparse
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Only the rubric data is needed; keep the seed script's database engine off the target's URL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from scripts.bench_workers import percentile
+from scripts.seed_sawa_rubric import rubric_entries
+
+STAGES = ["claim", "evidence", "reasoning", "backing", "qualifier", "rebuttal"]
+THROTTLED = (429, 503)
+
+def answer_pools() -> Dict[str, Dict[str, List[str]]]:
+    """Weak and strong example answers per stage, from the seeded rubric"""
+    pools = {stage: {"weak": [], "strong": []} for stage in STAGES}
+    for entry in rubric_entries():
+        kind = "weak" if entry["level"] <= 2 else "strong"
+        pools[entry["facet"]][kind].extend(entry["example_responses"].split("\n"))
+    return pools
+
+class Recorder:
+    """Thread-safe latency, error and outcome bookkeeping for the report"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.requests = 0
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.throttled = 0
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.turns_per_session: List[int] = []
+
+    def request(self, name: str, seconds: float, status: Optional[int], expected=()):
+        with self.lock:
+            self.requests += 1
+            if status in expected:
+                pass
+            elif status in THROTTLED:
+                self.throttled += 1
+            elif status is None or status >= 400:
+                self.errors[f"{name}:{status or 'connection'}"] += 1
+            else:
+                self.latencies[name].append(seconds)
+
+    def session(self, outcome: str, turns: int):
+        with self.lock:
+            self.outcomes[outcome] += 1
+            self.turns_per_session.append(turns)
+
+class Student:
+    """One simulated student on its own keep-alive connection"""
+
+    def __init__(self, index: int, args, pools, recorder: Recorder):
+        self.index = index
+        self.args = args
+        self.pools = pools
+        self.recorder = recorder
+        self.random = random.Random(args.seed + index)
+        url = urlparse(args.url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=args.timeout)
+        self.headers = {"Content-Type": "application/json"}
+
+    def call(self, name: str, method: str, path: str, body=None, form: bool = False, expected=()):
+        """Send a request, retrying throttled ones; returns (status, parsed JSON or None)
+
+        Statuses in `expected` are neither errors nor latency samples.
+        """
+        headers = dict(self.headers)
+        if form:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            payload = urlencode(body)
+        else:
+            payload = json.dumps(body) if body is not None else None
+        for _ in range(self.args.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                raw = response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                self.recorder.request(name, time.perf_counter() - start, None)
+                self.conn.close()
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.args.timeout)
+                return None, None
+            self.recorder.request(name, time.perf_counter() - start, status, expected)
+            if status in THROTTLED:
+                time.sleep(float(response.getheader("Retry-After") or 1))
+                continue
+            try:
+                return status, json.loads(raw) if raw else None
+            except ValueError:
+                return status, None
+        return status, None
+
+    def think(self):
+        if self.args.think_time > 0:
+            time.sleep(self.random.uniform(0.5, 1.5) * self.args.think_time)
+
+    def login(self) -> bool:
+        """Register and log in; False only on a real failure (demo app has no auth)"""
+        username = f"loadtest-{self.args.run_id}-{self.index}"
+        password = "load-test-password"
+        status, _ = self.call("register", "POST", "/api/auth/register", {
+            "email": f"{username}@loadtest.sawa", "username": username,
+            "full_name": f"Load Test {self.index}", "password": password
+        }, expected=(404,))
+        if status == 404:
+            return True
+        status, body = self.call("login", "POST", "/api/auth/login",
+                                 {"username": username, "password": password}, form=True)
+        if status != 200 or not body:
+            return False
+        self.headers["Authorization"] = f"Bearer {body['access_token']}"
+        return True
+
+    def run(self):
+        turns = 0
+        try:
+            if not self.login():
+                self.recorder.session("login_failed", turns)
+                return
+            status, body = self.call("start", "POST", "/api/sawa/start", {"topic": self.random.choice(self.args.topics)})
+            if status != 200 or not body:
+                self.recorder.session("start_failed", turns)
+                return
+            conversation_id = body["conversation_id"]
+            stage, stage_turns = body["current_stage"], 0
+
+            while stage in STAGES:
+                if stage_turns >= self.args.max_turns_per_stage:
+                    self.recorder.session("stuck", turns)
+                    return
+                self.think()
+                kind = "weak" if self.random.random() < self.args.weak_ratio else "strong"
+                answer = self.random.choice(self.pools[stage][kind])
+                status, body = self.call(stage, "POST", "/api/sawa/respond",
+                                         {"conversation_id": conversation_id, "content": answer})
+                turns += 1
+                if status != 200 or not body:
+                    self.recorder.session("failed", turns)
+                    return
+                stage_turns = 0 if body["current_stage"] != stage else stage_turns + 1
+                stage = body["current_stage"]
+            self.recorder.session("completed", turns)
+        finally:
+            self.conn.close()
+
+def summarize(values: List[float], scale: float = 1000.0) -> dict:
+    """Count and percentiles (milliseconds by default)"""
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50) * scale, 2),
+        "p90": round(percentile(values, 90) * scale, 2),
+        "p95": round(percentile(values, 95) * scale, 2),
+        "p99": round(percentile(values, 99) * scale, 2),
+        "max": round(values[-1] * scale, 2) if values else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a classroom of students walking full SAWA sessions")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--think-time", type=float, default=2.0, help="Mean seconds between turns (0 for none)")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which students join")
+    parser.add_argument("--weak-ratio", type=float, default=0.3, help="Probability an answer is a weak example")
+    parser.add_argument("--max-turns-per-stage", type=int, default=20,
+                        help="Give up (reported as stuck) after this many turns in one stage")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries of a throttled request")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--topics", nargs="+", default=["GMO safety", "Climate change", "mRNA vaccines"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None, help="Release or build label stored in the report")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    args.run_id = f"{int(time.time())}{random.randint(0, 999):03d}"
+
+    pools = answer_pools()
+    recorder = Recorder()
+    students = [Student(i, args, pools, recorder) for i in range(args.students)]
+    threads = []
+
+    print(f"🎓 {args.students} students against {args.url} (think time {args.think_time}s, weak ratio {args.weak_ratio})",
+          file=sys.stderr)
+    started = time.perf_counter()
+    for i, student in enumerate(students):
+        thread = threading.Thread(target=student.run, name=f"student-{i}", daemon=True)
+        thread.start()
+        threads.append(thread)
+        if args.ramp_up > 0 and args.students > 1:
+            time.sleep(args.ramp_up / (args.students - 1))
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    errors = sum(recorder.errors.values())
+    report = {
+        "label": args.label,
+        "config": {
+            "url": args.url, "students": args.students, "think_time": args.think_time,
+            "ramp_up": args.ramp_up, "weak_ratio": args.weak_ratio, "seed": args.seed,
+        },
+        "duration_seconds": round(elapsed, 2),
+        "sessions": dict(recorder.outcomes),
+        "requests": {
+            "total": recorder.requests,
+            "throughput_rps": round(recorder.requests / elapsed, 2) if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": round(errors / recorder.requests, 4) if recorder.requests else 0.0,
+            "throttled": recorder.throttled,
+            "errors_by_endpoint": dict(recorder.errors),
+        },
+        "latency_ms": {
+            name: summarize(recorder.latencies[name])
+            for name in ["register", "login", "start"] + STAGES
+            if recorder.latencies.get(name)
+        },
+        "turns_per_session": summarize(recorder.turns_per_session, scale=1.0),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Bring the rubric tables on an existing database up to content packs
+
+New databases get them from Base.metadata.create_all(), which never alters a
+table that already exists. Run this once on a database created before
+content packs: it adds sawa_rubric.pack (existing rows become the `default`
+pack) and the unique (pack, facet, level) index the loader's upserts rely
+on, creates content_packs and catalog_versions if missing, and adds the
+questions and feedback columns to a content_packs table from before they
+existed. Then run scripts/seed_sawa_rubric.py to load and publish the pack.
+Safe to run again.
+
+Usage:
+    python scripts/upgrade_content_packs.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import inspect, text
+
+from app.database import Base, engine
+from app.models.sawa_rubric import SAWARubric, ContentPack, CatalogVersion
+
+# (table, column, definition); NOT NULL columns need a default so existing rows satisfy it
+COLUMNS = (
+    ("sawa_rubric", "pack", "VARCHAR NOT NULL DEFAULT 'default'"),
+    ("content_packs", "questions", "TEXT"),
+    ("content_packs", "feedback", "TEXT"),
+)
+UNIQUE_COLUMNS = ["pack", "facet", "level"]
+UNIQUE_INDEX = "sawa_rubric_pack_facet_level_key"  # PostgreSQL's name for the model's constraint
+
+def upgrade_content_packs() -> list:
+    """Add what the rubric tables are missing; returns a description of each change"""
+    Base.metadata.create_all(bind=engine, tables=[SAWARubric.__table__, ContentPack.__table__,
+                                                  CatalogVersion.__table__])
+    changes = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table, column, definition in COLUMNS:
+            if column not in {existing["name"] for existing in inspector.get_columns(table)}:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+                changes.append(f"added column {table}.{column}")
+
+        inspector = inspect(conn)
+        unique = inspector.get_unique_constraints("sawa_rubric") + [
+            index for index in inspector.get_indexes("sawa_rubric") if index["unique"]
+        ]
+        if not any(sorted(item["column_names"]) == sorted(UNIQUE_COLUMNS) for item in unique):
+            duplicates = conn.execute(text(
+                "SELECT pack, facet, level, COUNT(*) FROM sawa_rubric "
+                "GROUP BY pack, facet, level HAVING COUNT(*) > 1"
+            )).all()
+            if duplicates:
+                listed = ", ".join(f"{pack}/{facet}/{level} ({n}x)" for pack, facet, level, n in duplicates[:10])
+                raise RuntimeError(f"Rubric levels stored more than once: {listed}; "
+                                   f"remove the extra rows (seed_sawa_rubric.py rewrites them) and run again")
+            conn.execute(text(f"CREATE UNIQUE INDEX {UNIQUE_INDEX} ON sawa_rubric ({', '.join(UNIQUE_COLUMNS)})"))
+            changes.append(f"added unique index {UNIQUE_INDEX}")
+    return changes
+
+def main():
+    try:
+        changes = upgrade_content_packs()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for change in changes:
+        print(f"   {change}")
+    print(f"✅ Rubric tables ready for content packs ({engine.dialect.name}, {len(changes)} changes)")
+    if changes:
+        print("   Next: python scripts/seed_sawa_rubric.py")
+
+if __name__ == "__main__":
+    main()
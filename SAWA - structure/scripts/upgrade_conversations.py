@@ -0,0 +1,88 @@
+"""
+Bring sawa_conversations on an existing database up to the current schema
+
+New databases get it from Base.metadata.create_all(), which never alters a
+table that already exists. Run this once on a database created before
+classes, assignments or conversation versions existed: it adds the
+classroom_id, assignment_id and version columns (existing conversations
+start at version 1), their indexes, and the one-session-per-student unique
+index on (assignment_id, user_id). Safe to run again.
+
+Usage:
+    python scripts/upgrade_conversations.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import inspect, text
+
+from app.database import Base, engine
+from app.models import (  # noqa: F401 (register tables)
+    user, sawa_conversation, sawa_message, classroom
+)
+
+TABLE = "sawa_conversations"
+
+# Added in order; NOT NULL columns need a default so existing rows satisfy it
+COLUMNS = (
+    ("classroom_id", "INTEGER REFERENCES classrooms(id)"),
+    ("assignment_id", "INTEGER REFERENCES assignments(id)"),
+    ("version", "INTEGER NOT NULL DEFAULT 1"),
+)
+INDEXES = (
+    ("ix_sawa_conversations_classroom_id", "classroom_id"),
+    ("ix_sawa_conversations_assignment_id", "assignment_id"),
+)
+UNIQUE_COLUMNS = ["assignment_id", "user_id"]
+UNIQUE_INDEX = "sawa_conversations_assignment_id_user_id_key"  # PostgreSQL's name for the model's constraint
+
+def _has_unique(inspector) -> bool:
+    constraints = inspector.get_unique_constraints(TABLE)
+    indexes = [index for index in inspector.get_indexes(TABLE) if index["unique"]]
+    return any(sorted(item["column_names"]) == sorted(UNIQUE_COLUMNS) for item in constraints + indexes)
+
+def upgrade_conversations() -> list:
+    """Add what the table is missing; returns a description of each change"""
+    # The columns reference classrooms and assignments, so those tables must exist first
+    Base.metadata.create_all(bind=engine)
+    changes = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        columns = {column["name"] for column in inspector.get_columns(TABLE)}
+        for name, definition in COLUMNS:
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN {name} {definition}"))
+                changes.append(f"added column {name}")
+
+        for name, column in INDEXES:
+            if name not in {index["name"] for index in inspector.get_indexes(TABLE)}:
+                conn.execute(text(f"CREATE INDEX {name} ON {TABLE} ({column})"))
+                changes.append(f"added index {name}")
+
+        if not _has_unique(inspect(conn)):
+            duplicates = conn.execute(text(
+                f"SELECT assignment_id, user_id, COUNT(*) FROM {TABLE} WHERE assignment_id IS NOT NULL "
+                f"GROUP BY assignment_id, user_id HAVING COUNT(*) > 1"
+            )).all()
+            if duplicates:
+                listed = ", ".join(f"assignment {a} / user {u} ({n}x)" for a, u, n in duplicates[:10])
+                raise RuntimeError(f"Students with several sessions for one assignment: {listed}; "
+                                   f"remove the extra sessions and run again")
+            conn.execute(text(f"CREATE UNIQUE INDEX {UNIQUE_INDEX} ON {TABLE} ({', '.join(UNIQUE_COLUMNS)})"))
+            changes.append(f"added unique index {UNIQUE_INDEX}")
+    return changes
+
+def main():
+    try:
+        changes = upgrade_conversations()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for change in changes:
+        print(f"   {change}")
+    print(f"✅ {TABLE} up to date ({engine.dialect.name}, {len(changes)} changes)")
+
+if __name__ == "__main__":
+    main()